@@ -0,0 +1,329 @@
+"""End-to-end benchmark of DownloadWorker against the local media server.
+
+Each scenario runs in a fresh child process (so CPU time and peak RSS are
+per run) that drives DownloadWorker.run() against synthetic media served by
+media_server.py. Reported per run: wall time, throughput, time-to-first-byte
+per entry, extraction time per entry, CPU time and peak RSS.
+
+    python benchmarks/bench_engine.py                       # all scenarios
+    python benchmarks/bench_engine.py -s playlist --repeat 5
+    python benchmarks/bench_engine.py --rate 2000000 --opt concurrent_fragment_downloads=8
+    python benchmarks/bench_engine.py --json new.json --baseline old.json
+    python benchmarks/bench_engine.py -s playlist --proxy "" --proxy rate=300000 --proxy fail=403
+
+With --baseline the run exits 1 if a scenario's median throughput dropped
+(or wall time grew) by more than --tolerance.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import statistics
+from typing import Optional, Dict, Any, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))  # MyVideoDownload/, for myvideodownload
+sys.path.insert(0, HERE)
+
+from media_server import MediaServer  # noqa: E402
+from proxy_server import ProxyServer  # noqa: E402
+
+KiB = 1024
+MiB = 1024 * 1024
+
+SCENARIOS: Dict[str, str] = {
+    "progressive": f"/media/progressive.mp4?size={64 * MiB}",
+    "hls": f"/hls/h1/index.m3u8?segments=64&seg_size={512 * KiB}",
+    "dash": f"/dash/d1/manifest.mpd?segments=64&seg_size={512 * KiB}",
+    "playlist": f"/feed.xml?n=50&kind=mp4&size={256 * KiB}",
+    "playlist_hls": f"/feed.xml?n=20&kind=hls&segments=8&seg_size={128 * KiB}",
+    # Entries large enough to measure per-route throughput (compare --proxy pools)
+    "playlist_large": f"/feed.xml?n=24&kind=mp4&size={2 * MiB}",
+    # Many tiny entries: listing and bookkeeping cost (compare --worker streaming=true)
+    "channel": f"/feed.xml?n=2000&kind=mp4&size={4 * KiB}",
+}
+
+
+# --- child side -----------------------------------------------------------
+
+def _rusage() -> Dict[str, Optional[float]]:
+    try:
+        import resource
+
+        ru = resource.getrusage(resource.RUSAGE_SELF)
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        rss = ru.ru_maxrss if sys.platform == "darwin" else ru.ru_maxrss * 1024
+        return {"cpu": ru.ru_utime + ru.ru_stime, "rss": float(rss)}
+    except ImportError:
+        rss = None
+        try:
+            import psutil  # optional on Windows
+
+            rss = float(psutil.Process().memory_info().peak_wset)
+        except Exception:
+            pass
+        return {"cpu": time.process_time(), "rss": rss}
+
+
+def _pctl(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    vals = sorted(values)
+    return vals[min(len(vals) - 1, int(round(q * (len(vals) - 1))))]
+
+
+def run_child(spec: Dict[str, Any]) -> Dict[str, Any]:
+    from PySide6.QtCore import QCoreApplication
+    from yt_dlp.extractor.common import InfoExtractor
+    from yt_dlp.postprocessor.common import PostProcessor
+
+    from myvideodownload.downloader import DownloadWorker
+
+    app = QCoreApplication.instance() or QCoreApplication([])  # noqa: F841 - signals need an app
+
+    extraction: List[float] = []
+    orig_extract = InfoExtractor.extract
+
+    def timed_extract(self, url):
+        t = time.perf_counter()
+        try:
+            return orig_extract(self, url)
+        finally:
+            extraction.append(time.perf_counter() - t)
+
+    InfoExtractor.extract = timed_extract
+
+    dl_start: Dict[str, float] = {}
+    ttfb: List[float] = []
+    first_seen: set = set()
+
+    class _MarkPP(PostProcessor):
+        def run(self, info):
+            dl_start[str(info.get("id"))] = time.perf_counter()
+            return [], info
+
+    def ttfb_hook(d):
+        if d.get("status") != "downloading" or not d.get("downloaded_bytes"):
+            return
+        vid = str((d.get("info_dict") or {}).get("id"))
+        if vid in first_seen or vid not in dl_start:
+            return
+        first_seen.add(vid)
+        ttfb.append(time.perf_counter() - dl_start[vid])
+
+    overrides = spec.get("opts") or {}
+
+    class BenchWorker(DownloadWorker):
+        def _build_opts(self):
+            opts = super()._build_opts()
+            opts.update(overrides)
+            opts["progress_hooks"] = list(opts.get("progress_hooks") or []) + [ttfb_hook]
+            return opts
+
+        def _download(self, ydl):
+            ydl.add_post_processor(_MarkPP(None), when="before_dl")
+            return super()._download(ydl)
+
+    result: Dict[str, Any] = {}
+    worker = BenchWorker(
+        spec["url"],
+        spec.get("mode", "mp4"),
+        spec["root"],
+        ignore_archive=True,
+        space_check=spec.get("space_check", True),
+        work_dir=spec.get("work_dir"),
+        **(spec.get("worker") or {}),
+    )
+    worker.finished.connect(lambda ok, msg: result.update(ok=ok, message=msg))
+    files: List[str] = []
+    worker.file_done.connect(files.append)
+
+    before = _rusage()
+    t0 = time.perf_counter()
+    worker.run()
+    wall = time.perf_counter() - t0
+    after = _rusage()
+
+    total_bytes = 0
+    for dirpath, _, names in os.walk(spec["root"]):
+        for n in names:
+            if not n.startswith("."):
+                total_bytes += os.path.getsize(os.path.join(dirpath, n))
+    cpu = (after["cpu"] - before["cpu"]) if after["cpu"] is not None else None
+    return {
+        "ok": bool(result.get("ok")),
+        "message": result.get("message", ""),
+        "files": len(files),
+        "wall_s": wall,
+        "bytes": total_bytes,
+        "throughput_mib_s": (total_bytes / MiB / wall) if wall > 0 else 0.0,
+        "ttfb_mean_s": statistics.mean(ttfb) if ttfb else None,
+        "ttfb_p95_s": _pctl(ttfb, 0.95),
+        "extract_count": len(extraction),
+        "extract_mean_s": statistics.mean(extraction) if extraction else None,
+        "extract_p95_s": _pctl(extraction, 0.95),
+        "cpu_s": cpu,
+        "cpu_pct": (100.0 * cpu / wall) if cpu is not None and wall > 0 else None,
+        "peak_rss_mib": (after["rss"] / MiB) if after["rss"] else None,
+    }
+
+
+# --- parent side ----------------------------------------------------------
+
+def _parse_opt(text: str):
+    key, _, raw = text.partition("=")
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    return key.strip(), value
+
+
+def run_once(name: str, server: MediaServer, args: argparse.Namespace, routes: Optional[List[str]] = None) -> Dict[str, Any]:
+    tmp = tempfile.mkdtemp(prefix=f"mvd-bench-{name}-")
+    try:
+        spec = {
+            "url": server.base_url + SCENARIOS[name],
+            "mode": args.mode,
+            "root": os.path.join(tmp, "out"),
+            "work_dir": os.path.join(tmp, "work") if args.work_dir else None,
+            "space_check": not args.no_space_check,
+            "opts": dict(_parse_opt(o) for o in args.opt),
+            "worker": dict(_parse_opt(o) for o in args.worker),
+        }
+        if routes:
+            spec["worker"]["routes"] = routes
+        env = dict(os.environ)
+        # Keep bench logs out of the user's app.log
+        env["LOCALAPPDATA"] = tmp
+        env["HOME"] = tmp
+        before = server.stats.snapshot()
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec)],
+            env=env, capture_output=True, text=True, timeout=args.timeout,
+        )
+        after = server.stats.snapshot()
+        lines = [ln for ln in proc.stdout.splitlines() if ln.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            return {"ok": False, "message": (proc.stderr or proc.stdout)[-2000:]}
+        res = json.loads(lines[-1])
+        res["server_requests"] = after["requests"] - before["requests"]
+        res["server_connections"] = after["connections"] - before["connections"]
+        return res
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _median(runs: List[Dict[str, Any]], key: str) -> Optional[float]:
+    vals = [r[key] for r in runs if r.get(key) is not None]
+    return statistics.median(vals) if vals else None
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    keys = [
+        "wall_s", "bytes", "throughput_mib_s", "ttfb_mean_s", "ttfb_p95_s", "extract_count",
+        "extract_mean_s", "extract_p95_s", "cpu_s", "cpu_pct", "peak_rss_mib",
+        "server_requests", "server_connections", "files",
+    ]
+    out = {k: _median(runs, k) for k in keys}
+    out["runs"] = len(runs)
+    out["failures"] = sum(1 for r in runs if not r.get("ok"))
+    return out
+
+
+def _fmt(v: Optional[float], spec: str = ".2f") -> str:
+    return "-" if v is None else format(v, spec)
+
+
+def print_table(results: Dict[str, Dict[str, Any]]) -> None:
+    head = f"{'scenario':<14}{'wall s':>8}{'MiB/s':>9}{'TTFB ms':>9}{'extr ms':>9}{'CPU s':>8}{'CPU %':>7}{'RSS MiB':>9}{'conns':>7}{'fail':>6}"
+    print(head)
+    print("-" * len(head))
+    for name, s in results.items():
+        ttfb = s["ttfb_mean_s"] * 1000 if s["ttfb_mean_s"] is not None else None
+        extr = s["extract_mean_s"] * 1000 if s["extract_mean_s"] is not None else None
+        print(
+            f"{name:<14}{_fmt(s['wall_s']):>8}{_fmt(s['throughput_mib_s']):>9}{_fmt(ttfb, '.1f'):>9}"
+            f"{_fmt(extr, '.1f'):>9}{_fmt(s['cpu_s']):>8}{_fmt(s['cpu_pct'], '.0f'):>7}"
+            f"{_fmt(s['peak_rss_mib'], '.0f'):>9}{_fmt(s['server_connections'], '.0f'):>7}{s['failures']:>6}"
+        )
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    problems = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if cur["failures"]:
+            problems.append(f"{name}: {cur['failures']} failed run(s)")
+        bt, ct = base.get("throughput_mib_s"), cur.get("throughput_mib_s")
+        if bt and ct is not None and ct < bt * (1 - tolerance):
+            problems.append(f"{name}: throughput {ct:.2f} MiB/s vs baseline {bt:.2f}")
+        bw, cw = base.get("wall_s"), cur.get("wall_s")
+        if bw and cw is not None and cw > bw * (1 + tolerance):
+            problems.append(f"{name}: wall {cw:.2f}s vs baseline {bw:.2f}s")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="scenario(s) to run (default: all)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--mode", default="mp4", choices=["mp4", "mp3", "mp4+mp3"])
+    ap.add_argument("--rate", type=int, default=0, help="server throttle, bytes/s per connection")
+    ap.add_argument("--delay", type=float, default=0.0, help="server latency per request, seconds")
+    ap.add_argument("--opt", action="append", default=[], help="yt-dlp option override, key=json_value")
+    ap.add_argument("--worker", action="append", default=[], help="DownloadWorker argument, key=json_value (e.g. prefetch=0)")
+    ap.add_argument("--proxy", action="append", default=[], help="local proxy stand-in as a pool member: '', rate=N, fail=STATUS")
+    ap.add_argument("--work-dir", action="store_true", help="use a separate work directory")
+    ap.add_argument("--no-space-check", action="store_true")
+    ap.add_argument("--timeout", type=float, default=600)
+    ap.add_argument("--json", help="write the summary as JSON to this file")
+    ap.add_argument("--baseline", help="JSON summary of a previous run to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(json.loads(args.child))))
+        return 0
+
+    names = args.scenario or list(SCENARIOS)
+    results: Dict[str, Dict[str, Any]] = {}
+    proxies = [ProxyServer.from_spec(p).start() for p in args.proxy]
+    routes = [p.url for p in proxies] or None
+    try:
+        with MediaServer(rate=args.rate, delay=args.delay) as server:
+            for name in names:
+                runs = [run_once(name, server, args, routes) for _ in range(max(1, args.repeat))]
+                for r in runs:
+                    if not r.get("ok"):
+                        print(f"[{name}] run failed: {r.get('message')}", file=sys.stderr)
+                results[name] = summarize(runs)
+    finally:
+        for spec, p in zip(args.proxy, proxies):
+            st = p.stats.snapshot()
+            print(f"proxy {spec or 'plain'}: {st['requests']} requests, {st['bytes_sent'] / MiB:.1f} MiB", file=sys.stderr)
+            p.stop()
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        for p in problems:
+            print("REGRESSION:", p)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,287 @@
+"""Local HTTP stand-in for a video CDN, used by the benchmarks.
+
+Serves deterministic synthetic bytes, so no real media or network access
+is needed:
+
+    /media/<name>.mp4?size=N            progressive file (Range supported)
+    /hls/<name>/index.m3u8?segments=N&seg_size=N
+    /hls/<name>/seg<i>.ts?seg_size=N     HLS media playlist + fragments
+    /dash/<name>/manifest.mpd?segments=N&seg_size=N
+    /dash/<name>/seg<i>.m4s?seg_size=N   DASH (SegmentList) + fragments
+    /feed.xml?n=N&kind=mp4|hls|dash&size=N&segments=N&seg_size=N
+                                         RSS playlist of N entries
+    /feed.xml?...&fail=I:STATUS:TIMES,... entry I gets fail/fail_times below
+
+Any URL accepts fail=STATUS&fail_times=N: the first N requests for that
+path are answered with STATUS (429 with Retry-After: 1), to exercise
+retries.
+
+Optional per-connection throttling (rate, bytes/s) and a fixed latency
+(delay, seconds) before every response emulate a throttling CDN.
+"""
+from __future__ import annotations
+
+import re
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+_BLOCK = bytes(range(256)) * 256  # 64 KiB pattern
+
+
+def _qint(q: Dict[str, Any], key: str, default: int) -> int:
+    try:
+        return int(q.get(key, [default])[0])
+    except (TypeError, ValueError):
+        return default
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.bytes_sent = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return {"requests": self.requests, "connections": self.connections, "bytes_sent": self.bytes_sent}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real CDN
+    server: "MediaServer"
+
+    def log_message(self, format, *args):  # noqa: A002 - signature from base class
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.stats.lock:
+            self.server.stats.connections += 1
+
+    def do_HEAD(self):
+        self._dispatch(head=True)
+
+    def do_GET(self):
+        self._dispatch(head=False)
+
+    # --- routing ---
+    def _dispatch(self, head: bool) -> None:
+        with self.server.stats.lock:
+            self.server.stats.requests += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        parts = urlsplit(self.path)
+        q = parse_qs(parts.query)
+        path = parts.path
+        if "fail" in q and self.server.should_fail(path, _qint(q, "fail_times", 1)):
+            return self._send_error_status(_qint(q, "fail", 503), head)
+        m = re.fullmatch(r"/media/([\w.-]+)\.mp4", path)
+        if m:
+            return self._send_bytes(_qint(q, "size", 4 * 1024 * 1024), "video/mp4", head)
+        m = re.fullmatch(r"/hls/([\w.-]+)/index\.m3u8", path)
+        if m:
+            return self._send_text(self._m3u8(q), "application/vnd.apple.mpegurl", head)
+        m = re.fullmatch(r"/hls/([\w.-]+)/seg(\d+)\.ts", path)
+        if m:
+            return self._send_bytes(_qint(q, "seg_size", 256 * 1024), "video/mp2t", head)
+        m = re.fullmatch(r"/dash/([\w.-]+)/manifest\.mpd", path)
+        if m:
+            return self._send_text(self._mpd(q), "application/dash+xml", head)
+        m = re.fullmatch(r"/dash/([\w.-]+)/seg(\d+)\.m4s", path)
+        if m:
+            return self._send_bytes(_qint(q, "seg_size", 256 * 1024), "video/iso.segment", head)
+        if path == "/feed.xml":
+            return self._send_text(self._feed(q), "application/rss+xml", head)
+        self.send_error(404)
+
+    # --- documents ---
+    def _m3u8(self, q) -> str:
+        n = _qint(q, "segments", 10)
+        seg_size = _qint(q, "seg_size", 256 * 1024)
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:4", "#EXT-X-MEDIA-SEQUENCE:0"]
+        for i in range(n):
+            lines += ["#EXTINF:4.0,", f"seg{i}.ts?seg_size={seg_size}"]
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def _mpd(self, q) -> str:
+        n = _qint(q, "segments", 10)
+        seg_size = _qint(q, "seg_size", 256 * 1024)
+        segs = "".join(f'<SegmentURL media="seg{i}.m4s?seg_size={seg_size}"/>' for i in range(1, n + 1))
+        return (
+            '<?xml version="1.0"?>'
+            '<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" '
+            f'mediaPresentationDuration="PT{4 * n}S" minBufferTime="PT2S" profiles="urn:mpeg:dash:profile:isoff-main:2011">'
+            '<Period><AdaptationSet mimeType="video/mp4">'
+            '<Representation id="1" codecs="avc1.4d401f,mp4a.40.2" bandwidth="2000000" width="1280" height="720">'
+            '<SegmentList duration="4" timescale="1"><Initialization sourceURL="seg0.m4s?seg_size=1024"/>'
+            f"{segs}</SegmentList></Representation></AdaptationSet></Period></MPD>"
+        )
+
+    def _feed(self, q) -> str:
+        n = _qint(q, "n", 10)
+        kind = (q.get("kind", ["mp4"])[0] or "mp4").lower()
+        size = _qint(q, "size", 1024 * 1024)
+        segments = _qint(q, "segments", 10)
+        seg_size = _qint(q, "seg_size", 256 * 1024)
+        base = f"http://{self.headers.get('Host')}"
+        fails = {}
+        for spec in (q.get("fail", [""])[0] or "").split(","):
+            if spec.count(":") == 2:
+                i, status, times = spec.split(":")
+                fails[int(i)] = f"&amp;fail={int(status)}&amp;fail_times={int(times)}"
+        items = []
+        for i in range(1, n + 1):
+            if kind == "hls":
+                url = f"{base}/hls/e{i}/index.m3u8?segments={segments}&amp;seg_size={seg_size}"
+            elif kind == "dash":
+                url = f"{base}/dash/e{i}/manifest.mpd?segments={segments}&amp;seg_size={seg_size}"
+            else:
+                url = f"{base}/media/e{i}.mp4?size={size}"
+            url += fails.get(i, "")
+            items.append(
+                f"<item><title>Entry {i}</title><guid>bench{i:05d}</guid><link>{url}</link>"
+                f"<itunes:duration>60</itunes:duration></item>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"><channel>'
+            f"<title>Bench {kind} x{n}</title><link>{base}/</link><description>synthetic</description>"
+            + "".join(items)
+            + "</channel></rss>"
+        )
+
+    # --- senders ---
+    def _send_error_status(self, status: int, head: bool) -> None:
+        body = f"injected {status}".encode()
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self._write(body)
+
+    def _send_text(self, text: str, ctype: str, head: bool) -> None:
+        body = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self._write(body)
+
+    def _parse_range(self, total: int) -> Optional[Tuple[int, int]]:
+        rng = self.headers.get("Range")
+        m = re.fullmatch(r"bytes=(\d*)-(\d*)", (rng or "").strip())
+        if not m:
+            return None
+        start = int(m.group(1)) if m.group(1) else 0
+        end = int(m.group(2)) if m.group(2) else total - 1
+        return start, min(end, total - 1)
+
+    def _send_bytes(self, total: int, ctype: str, head: bool) -> None:
+        rng = self._parse_range(total)
+        if rng and rng[0] >= total:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{total}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start, end = rng or (0, total - 1)
+        self.send_response(206 if rng else 200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if rng:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{total}")
+        self.end_headers()
+        if head:
+            return
+        remaining = end - start + 1
+        offset = start % len(_BLOCK)
+        rate = self.server.rate
+        t0 = time.monotonic()
+        sent = 0
+        while remaining > 0:
+            chunk = _BLOCK[offset:offset + min(remaining, 64 * 1024)]
+            offset = 0
+            if not self._write(chunk):
+                return
+            remaining -= len(chunk)
+            sent += len(chunk)
+            if rate:
+                ahead = sent / rate - (time.monotonic() - t0)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+    def _write(self, data: bytes) -> bool:
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            return False
+        with self.server.stats.lock:
+            self.server.stats.bytes_sent += len(data)
+        return True
+
+
+class MediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, rate: int = 0, delay: float = 0.0) -> None:
+        super().__init__((host, port), _Handler)
+        self.rate = int(rate)  # bytes/s per connection, 0 = unlimited
+        self.delay = float(delay)
+        self.stats = _Stats()
+        self._fail_lock = threading.Lock()
+        self._failed: Dict[str, int] = {}  # path -> injected failures so far
+        self._thread: Optional[threading.Thread] = None
+
+    def should_fail(self, path: str, times: int) -> bool:
+        with self._fail_lock:
+            n = self._failed.get(path, 0)
+            if n >= times:
+                return False
+            self._failed[path] = n + 1
+            return True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MediaServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="media-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "MediaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Serve synthetic media for manual testing")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--rate", type=int, default=0, help="bytes/s per connection (0 = unlimited)")
+    ap.add_argument("--delay", type=float, default=0.0, help="seconds of latency per request")
+    args = ap.parse_args()
+    srv = MediaServer(port=args.port, rate=args.rate, delay=args.delay)
+    print(f"serving on {srv.base_url}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
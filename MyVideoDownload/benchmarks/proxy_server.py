@@ -0,0 +1,144 @@
+"""Local forward HTTP proxy stand-in, used to exercise the connection pool.
+
+Forwards plain-HTTP proxy requests (GET/HEAD with an absolute URL) to the
+upstream server, e.g. media_server.py. Each instance plays one pool member:
+
+    rate=N      throttle responses to N bytes/s per connection (a throttled identity)
+    fail=STATUS answer every request with STATUS (a blocked identity, e.g. 403)
+
+    python benchmarks/bench_engine.py -s playlist_large \\
+        --proxy "" --proxy rate=300000 --proxy fail=403
+"""
+from __future__ import annotations
+
+import sys
+import time
+import threading
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# Hop-by-hop headers are not forwarded
+_HOP = {"connection", "keep-alive", "proxy-connection", "proxy-authorization", "te", "trailers", "transfer-encoding", "upgrade"}
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return {"requests": self.requests, "bytes_sent": self.bytes_sent}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "ProxyServer"
+
+    def log_message(self, format, *args):  # noqa: A002 - signature from base class
+        pass
+
+    def do_HEAD(self):
+        self._forward(head=True)
+
+    def do_GET(self):
+        self._forward(head=False)
+
+    def _forward(self, head: bool) -> None:
+        with self.server.stats.lock:
+            self.server.stats.requests += 1
+        if self.server.fail:
+            body = f"proxy {self.server.fail}".encode()
+            self.send_response(self.server.fail)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+            return
+        parts = urlsplit(self.path)
+        if parts.scheme != "http" or not parts.hostname:
+            self.send_error(400, "absolute http:// URL expected")
+            return
+        headers = {k: v for k, v in self.headers.items() if k.lower() not in _HOP}
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        try:
+            conn.request(self.command, parts.path + (f"?{parts.query}" if parts.query else ""), headers=headers)
+            r = conn.getresponse()
+            self.send_response(r.status, r.reason)
+            for k, v in r.getheaders():
+                if k.lower() not in _HOP:
+                    self.send_header(k, v)
+            self.end_headers()
+            if head:
+                return
+            rate = self.server.rate
+            t0 = time.monotonic()
+            sent = 0
+            while True:
+                chunk = r.read(64 * 1024)
+                if not chunk:
+                    break
+                try:
+                    self.wfile.write(chunk)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                sent += len(chunk)
+                with self.server.stats.lock:
+                    self.server.stats.bytes_sent += len(chunk)
+                if rate:
+                    ahead = sent / rate - (time.monotonic() - t0)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except OSError as e:
+            self.send_error(502, str(e))
+        finally:
+            conn.close()
+
+
+class ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, rate: int = 0, fail: int = 0) -> None:
+        super().__init__((host, port), _Handler)
+        self.rate = int(rate)  # bytes/s per connection, 0 = unlimited
+        self.fail = int(fail)  # HTTP status for every request, 0 = forward
+        self.stats = _Stats()
+        self._thread: Optional[threading.Thread] = None
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients drop idle keep-alive connections; that is not worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "ProxyServer":
+        """"rate=300000", "fail=403", "" (plain forwarding) or a comma-separated mix."""
+        kwargs = {}
+        for item in filter(None, (s.strip() for s in spec.split(","))):
+            key, _, value = item.partition("=")
+            kwargs[key] = int(value)
+        return cls(**kwargs)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ProxyServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="proxy-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "ProxyServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
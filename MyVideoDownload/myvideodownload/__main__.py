@@ -1,9 +1,21 @@
-try:
-    # Frozen/packaged absolute import
-    from myvideodownload.ui import run_app  # type: ignore
-except Exception:
-    # Dev mode fallback when running as a module
-    from .ui import run_app
+import sys
+import multiprocessing
 
 if __name__ == "__main__":
+    # Worker processes (EntryProcessPool) re-launch the frozen exe; let them run their task instead
+    multiprocessing.freeze_support()
+    # Headless queue node / queue server only on an explicit subcommand (see cli.py);
+    # other arguments (file associations, shell verbs) still open the UI
+    if len(sys.argv) > 1 and sys.argv[1] in ("worker", "serve"):
+        try:
+            from myvideodownload.cli import main  # type: ignore
+        except Exception:
+            from .cli import main
+        raise SystemExit(main())
+    try:
+        # Frozen/packaged absolute import
+        from myvideodownload.ui import run_app  # type: ignore
+    except Exception:
+        # Dev mode fallback when running as a module
+        from .ui import run_app
     raise SystemExit(run_app())
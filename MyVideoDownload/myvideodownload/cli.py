@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+import sys
+import signal
+import logging
+import argparse
+import tempfile
+from typing import List, Optional
+
+from .distqueue import DEFAULT_PORT, QueueServer, SqliteQueue, open_queue, parse_address
+from .routes import invalid_route, parse_routes
+from .placement import POLICIES, ROUND_ROBIN
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="myvideodownload",
+        description="Arayüzsüz çalışma: ortak kuyruktan indiren düğüm veya kuyruk sunucusu.",
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+    w = sub.add_parser("worker", help="Ortak kuyruktan indiren düğüm")
+    w.add_argument("urls", nargs="*", help="Kuyruğa eklenecek video/oynatma listesi URL'leri")
+    w.add_argument("--queue", required=True, help="Ortak kuyruk: SQLite dosyası veya tcp://sunucu:port")
+    w.add_argument(
+        "--root", action="append", default=[],
+        help="Bu düğümün çıktı klasörü; birden çok kez verilirse öğeler klasörlere dağıtılır",
+    )
+    w.add_argument(
+        "--placement", choices=list(POLICIES), default=ROUND_ROBIN,
+        help="Birden fazla --root varken yerleşim: sırayla, en boş disk veya liste başına sabit",
+    )
+    w.add_argument("--mode", choices=["mp4", "mp3", "mp4+mp3"], default="mp4")
+    w.add_argument("--max-height", type=int, default=1080)
+    w.add_argument("--processes", type=int, default=0, help="Girdileri bu kadar süreçte indir (0 = kapalı)")
+    w.add_argument("--cookies", help="cookies.txt dosyası")
+    w.add_argument(
+        "--route", action="append", default=[],
+        help="Bağlantı havuzu üyesi: proxy (http://, socks5://) veya yerel IP adresi; birden çok kez verilebilir",
+    )
+    w.add_argument("--publish-only", action="store_true", help="URL'leri listele ve kuyruğa ekle, indirme")
+    srv = sub.add_parser("serve", help="SQLite kuyruğunu TCP üzerinden paylaş")
+    srv.add_argument("db", metavar="DB", help="Paylaşılacak SQLite kuyruk dosyası")
+    srv.add_argument("--listen", default=f"127.0.0.1:{DEFAULT_PORT}", help="Dinlenecek adres (host:port)")
+    return p
+
+
+def _console(logger: logging.Logger) -> None:
+    if not any(type(h) is logging.StreamHandler for h in logger.handlers):
+        h = logging.StreamHandler(sys.stderr)
+        h.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+        logger.addHandler(h)
+    logger.setLevel(logging.INFO)
+
+
+def _serve(path: str, listen: str, logger: logging.Logger) -> int:
+    server = QueueServer(SqliteQueue(path), parse_address(listen))
+    logger.info("queue server: %s on %s:%d", path, *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.shared.close()
+    return 0
+
+
+def _publish(worker, urls: List[str], logger: logging.Logger) -> int:
+    from .downloader import _new_ydl
+
+    shared = open_queue(worker.shared_queue)
+    try:
+        with _new_ydl(worker._build_opts()) as ydl:
+            for url in urls:
+                added = shared.publish(worker._list_source(ydl, url), worker.mode)
+                logger.info("queue: %d new entries from %s", added, url)
+        logger.info("queue: %s", shared.counts(worker.mode))
+    finally:
+        shared.close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logger = logging.getLogger("myvideodownload")
+    _console(logger)
+    if args.command == "serve":
+        return _serve(args.db, args.listen, logger)
+    if not args.publish_only and not args.root:
+        parser.error("--root gerekli")
+    if args.publish_only and not args.urls:
+        parser.error("--publish-only için en az bir URL gerekli")
+    routes = parse_routes(",".join(args.route))
+    bad = invalid_route(routes)
+    if bad:
+        parser.error(f"geçersiz --route: {bad}")
+
+    from .downloader import DownloadWorker
+
+    worker = DownloadWorker(
+        args.urls[0] if args.urls else "",
+        args.mode,
+        args.root[0] if args.root else tempfile.gettempdir(),
+        max_height=args.max_height,
+        cookies_path=args.cookies,
+        processes=args.processes,
+        routes=routes or None,
+        roots=args.root,
+        placement=args.placement,
+        shared_queue=os.path.abspath(args.queue) if "://" not in args.queue else args.queue,
+    )
+    if args.publish_only:
+        return _publish(worker, args.urls, logger)
+    for url in args.urls[1:]:
+        worker.enqueue(url)
+
+    result = {"ok": False}
+    worker.file_done.connect(lambda fn: logger.info("saved: %s", fn))
+    worker.skipped.connect(lambda msg: logger.warning("skipped: %s", msg))
+    worker.finished.connect(lambda ok, msg: result.update(ok=ok, msg=msg))
+
+    def on_interrupt(*_):
+        # First Ctrl+C stops after giving back the leases; a second one interrupts at once
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        worker.stop()
+
+    signal.signal(signal.SIGINT, on_interrupt)
+    worker.run()
+    logger.info("finished: %s", result.get("msg", ""))
+    return 0 if result["ok"] else 1
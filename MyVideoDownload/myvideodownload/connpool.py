@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import time
+import select
+import logging
+import threading
+import http.client
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from yt_dlp.networking.common import _REQUEST_HANDLERS, _RH_PREFERENCES
+
+# Idle keep-alive connections kept per host / in total, and how long they stay usable
+MAX_IDLE_PER_HOST = 6
+MAX_IDLE_TOTAL = 64
+IDLE_TIMEOUT = 60.0
+
+Key = Tuple[Any, ...]
+
+
+class PoolStats:
+    """Process-wide connection counters (new connections = TCP/TLS handshakes)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.reused = 0
+        self.stale = 0
+        self.tls_handshakes = 0
+        self.untimed = 0  # connections opened by urllib3 (requests handler): counted, not timed
+        self.tcp_seconds = 0.0
+        self.tls_seconds = 0.0
+        self.hosts: Dict[str, list] = {}  # host -> [new, reused]
+
+    def record_connect(self, host: str, tcp: Optional[float], tls: Optional[float], secure: bool = False) -> None:
+        with self._lock:
+            self.connections += 1
+            if tcp is None:
+                self.untimed += 1
+            else:
+                self.tcp_seconds += tcp
+            if tls is not None or secure:
+                self.tls_handshakes += 1
+            if tls is not None:
+                self.tls_seconds += tls
+            self.hosts.setdefault(host, [0, 0])[0] += 1
+
+    def record_request(self, host: str, reused: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            if reused:
+                self.reused += 1
+                self.hosts.setdefault(host, [0, 0])[1] += 1
+
+    def record_stale(self) -> None:
+        with self._lock:
+            self.stale += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "reused": self.reused,
+                "stale": self.stale,
+                "tls_handshakes": self.tls_handshakes,
+                "untimed": self.untimed,
+                "tcp_seconds": self.tcp_seconds,
+                "tls_seconds": self.tls_seconds,
+                "hosts": {h: list(v) for h, v in self.hosts.items()},
+            }
+
+
+def stats_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    out = {k: after[k] - before.get(k, 0) for k in after if k != "hosts"}
+    hosts = {}
+    for h, (new, reused) in after["hosts"].items():
+        b = before.get("hosts", {}).get(h, [0, 0])
+        if (new - b[0]) or (reused - b[1]):
+            hosts[h] = [new - b[0], reused - b[1]]
+    out["hosts"] = hosts
+    return out
+
+
+def format_stats(s: Dict[str, Any]) -> str:
+    hosts = sorted(s["hosts"].items(), key=lambda kv: -(kv[1][0] + kv[1][1]))[:5]
+    per_host = ", ".join(f"{h} {new} new/{reused} reused" for h, (new, reused) in hosts)
+    return (
+        f"{s['requests']} requests, {s['connections']} new connections, {s['reused']} reused, "
+        f"{s['stale']} stale; TCP {s['tcp_seconds']:.2f} s, "
+        f"TLS {s['tls_handshakes']} handshakes {s['tls_seconds']:.2f} s"
+        + (f" ({s['untimed']} connections untimed)" if s.get("untimed") else "")
+        + (f" [{per_host}]" if per_host else "")
+    )
+
+
+class ConnectionPool:
+    """Bounded per-host pool of idle keep-alive http.client connections, shared by every YoutubeDL in the process."""
+
+    def __init__(
+        self,
+        max_per_host: int = MAX_IDLE_PER_HOST,
+        max_total: int = MAX_IDLE_TOTAL,
+        idle_timeout: float = IDLE_TIMEOUT,
+    ) -> None:
+        self.max_per_host = max_per_host
+        self.max_total = max_total
+        self.idle_timeout = idle_timeout
+        self.stats = PoolStats()
+        self._lock = threading.Lock()
+        self._idle: "OrderedDict[Key, Deque[Tuple[float, http.client.HTTPConnection]]]" = OrderedDict()
+        self._count = 0
+
+    def acquire(self, key: Key) -> Optional[http.client.HTTPConnection]:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                conns = self._idle.get(key)
+                if not conns:
+                    return None
+                ts, conn = conns.pop()  # most recently used first
+                self._count -= 1
+            if now - ts < self.idle_timeout and self._alive(conn):
+                return conn
+            self.stats.record_stale()
+            conn.close()
+
+    def release(self, key: Key, conn: http.client.HTTPConnection) -> None:
+        evicted = []
+        with self._lock:
+            conns = self._idle.setdefault(key, deque())
+            self._idle.move_to_end(key)
+            conns.append((time.monotonic(), conn))
+            self._count += 1
+            if len(conns) > self.max_per_host:
+                evicted.append(conns.popleft()[1])
+                self._count -= 1
+            while self._count > self.max_total:
+                oldest_key = next(iter(self._idle))
+                q = self._idle[oldest_key]
+                if q:
+                    evicted.append(q.popleft()[1])
+                    self._count -= 1
+                if not q:
+                    del self._idle[oldest_key]
+        for c in evicted:
+            c.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            idle, self._idle, self._count = self._idle, OrderedDict(), 0
+        for conns in idle.values():
+            for _, c in conns:
+                c.close()
+
+    @staticmethod
+    def _alive(conn: http.client.HTTPConnection) -> bool:
+        # An idle keep-alive socket that is readable was closed by the server (EOF)
+        sock = conn.sock
+        if sock is None:
+            return False
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+
+POOL = ConnectionPool()
+
+
+_unavailable: Optional[str] = None  # why pooling is off (yt-dlp internals changed), once known
+
+
+def _disable(e: Exception) -> None:
+    global _unavailable
+    _unavailable = f"{type(e).__name__}: {e}"
+    logging.getLogger("myvideodownload").warning(
+        "connection pool unavailable with this yt-dlp (%s); using its own handlers", _unavailable)
+
+
+def _pooled_rh():
+    if _unavailable is not None:
+        return None
+    try:
+        from .pooledrh import PooledRH
+    except Exception as e:  # ImportError, or a base class that changed shape
+        _disable(e)
+        return None
+    return PooledRH
+
+
+def _pooled_preference(rh, request):
+    # Below yt-dlp's requests handler (100), which keeps its own keep-alive pool (proxies included);
+    # above urllib (0), which opens a connection per request
+    return 50 if rh.RH_NAME == "pooled" else 0
+
+
+class _Urllib3Stats(logging.Filter):
+    """Counts the requests handler's connections from urllib3's debug records; passes on only what urllib3 would emit."""
+
+    def __init__(self, stats: PoolStats) -> None:
+        super().__init__()
+        self._stats = stats
+        self._new = threading.local()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        msg = record.msg
+        if isinstance(msg, str):
+            if msg.startswith("Resetting dropped connection"):
+                self._stats.record_stale()
+            elif msg.startswith("Starting new HTTP"):
+                host = str(record.args[1])
+                self._stats.record_connect(host, None, None, secure=msg.startswith("Starting new HTTPS"))
+                self._new.host = host
+            elif msg.startswith('%s://%s:%s "'):
+                host = str(record.args[1])
+                self._stats.record_request(host, getattr(self._new, "host", None) != host)
+                self._new.host = None
+        return record.levelno >= logging.getLogger("urllib3").getEffectiveLevel()
+
+
+_urllib3_stats: Optional[_Urllib3Stats] = None
+
+
+def _count_urllib3() -> None:
+    global _urllib3_stats
+    if _urllib3_stats is not None:
+        return
+    _urllib3_stats = _Urllib3Stats(POOL.stats)
+    log = logging.getLogger("urllib3.connectionpool")
+    log.addFilter(_urllib3_stats)
+    log.setLevel(logging.DEBUG)
+
+
+def build_director(ydl):
+    """A request director for ydl built like yt-dlp's own, plus the pooled handler when it is available."""
+    _count_urllib3()
+    handlers = list(_REQUEST_HANDLERS.values())
+    preferences = list(_RH_PREFERENCES)
+    rh = _pooled_rh()
+    if rh is not None:
+        try:
+            return ydl.build_request_director(handlers + [rh], preferences + [_pooled_preference])
+        except Exception as e:  # the handler no longer fits yt-dlp's constructor arguments
+            _disable(e)
+    return ydl.build_request_director(handlers, preferences)
+
+
+def install(ydl) -> None:
+    """Pool and count this YoutubeDL's connections; call it before routes.install()."""
+    old = ydl.__dict__.get("_request_director")
+    # _request_director is a cached_property: the instance attribute replaces it
+    ydl.__dict__["_request_director"] = build_director(ydl)
+    if old is not None:
+        old.close()
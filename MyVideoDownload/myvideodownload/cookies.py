@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import logging
+import threading
+from http.cookiejar import MozillaCookieJar
+from typing import Optional, Dict, Any, Tuple
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+BROWSERS = ("brave", "firefox", "chrome", "edge")
+COOKIE_DOMAINS = ("youtube.com", "google.com")
+# Cookies whose expiry decides whether the cached jar is still usable
+AUTH_COOKIES = ("SID", "HSID", "SSID", "SAPISID", "__Secure-1PSID", "__Secure-3PSID", "LOGIN_INFO")
+
+
+def _domain_matches(domain: str) -> bool:
+    d = (domain or "").lstrip(".").lower()
+    return any(d == base or d.endswith("." + base) for base in COOKIE_DOMAINS)
+
+
+def extract_browser_cookies(browser: str) -> MozillaCookieJar:
+    """Read youtube/google cookies from a browser profile (slow: decrypts the store)."""
+    import browser_cookie3 as bc3
+
+    getter = getattr(bc3, browser, None)
+    if getter is None:
+        raise ValueError(f"unsupported browser: {browser}")
+    jar = MozillaCookieJar()
+    for domain in COOKIE_DOMAINS:
+        try:
+            for c in getter(domain_name=domain):
+                if _domain_matches(c.domain):
+                    jar.set_cookie(c)
+        except Exception:
+            continue
+    if len(jar) == 0:
+        # Some profiles only answer the unfiltered query; filter here instead
+        for c in getter():
+            if _domain_matches(c.domain):
+                jar.set_cookie(c)
+    return jar
+
+
+def jar_expiry(jar) -> Optional[int]:
+    """Earliest expiry among auth cookies (or any persistent cookie if none are present)."""
+    auth = [c.expires for c in jar if c.expires and c.name in AUTH_COOKIES]
+    if auth:
+        return min(auth)
+    persistent = [c.expires for c in jar if c.expires]
+    return min(persistent) if persistent else None
+
+
+class CookieManager(QObject):
+    """Caches browser cookies as a read-only cookies.txt shared by all jobs and refreshes it off the GUI thread."""
+
+    refreshed = Signal(bool, str, str)  # ok, browser, message
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_age: float = 6 * 3600,
+        expiry_margin: float = 24 * 3600,
+        check_interval_ms: int = 10 * 60 * 1000,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.expiry_margin = expiry_margin
+        self._logger = logging.getLogger("myvideodownload")
+        self._lock = threading.Lock()  # guards _state, shared with the refresh thread
+        self._busy = False
+        self._queued: Optional[str] = None  # browser asked for while another refresh was running
+        self._state = self._load_state()
+        self._timer = QTimer(self)
+        self._timer.setInterval(check_interval_ms)
+        self._timer.timeout.connect(self.refresh_if_stale)
+        self._timer.start()
+
+    # --- state ---
+    def _state_path(self) -> str:
+        return os.path.join(self.cache_dir, "cookies-state.json")
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self._state_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_state(self) -> None:
+        # Caller must not hold _lock
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = self._state_path() + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._state, f)
+                os.replace(tmp, self._state_path())
+            except Exception:
+                pass
+
+    def cache_path(self, browser: str) -> str:
+        return os.path.join(self.cache_dir, f"cookies-{browser}.txt")
+
+    @property
+    def browser(self) -> Optional[str]:
+        with self._lock:
+            return self._state.get("browser")
+
+    # --- queries ---
+    def is_stale(self, browser: Optional[str] = None) -> bool:
+        browser = browser or self.browser
+        if not browser or not os.path.exists(self.cache_path(browser)):
+            return True
+        with self._lock:
+            info = dict(self._state.get("jars", {}).get(browser) or {})
+        now = time.time()
+        if now - float(info.get("fetched", 0)) > self.max_age:
+            return True
+        expires = info.get("expires")
+        return bool(expires) and expires - now < self.expiry_margin
+
+    def cookie_file(self, browser: Optional[str] = None) -> Optional[str]:
+        """Cached cookies.txt for browser (default: last used), if one exists."""
+        browser = browser or self.browser
+        if not browser:
+            return None
+        path = self.cache_path(browser)
+        return path if os.path.exists(path) else None
+
+    # --- refresh ---
+    def refresh_async(self, browser: str, queue: bool = True) -> bool:
+        """Start a background refresh; if one is running, False (with queue, this browser runs next)."""
+        with self._lock:
+            if self._busy:
+                if queue:
+                    self._queued = browser
+                return False
+            self._busy = True
+        self._start(browser)
+        return True
+
+    def _start(self, browser: str) -> None:
+        with self._lock:
+            self._state["browser"] = browser
+        self._save_state()
+        threading.Thread(target=self._refresh, args=(browser,), name="mvd-cookies", daemon=True).start()
+
+    def refresh_if_stale(self) -> None:
+        browser = self.browser
+        if browser and self.is_stale(browser):
+            self.refresh_async(browser, queue=False)
+
+    def _refresh(self, browser: str) -> None:
+        ok, msg = False, ""
+        try:
+            t0 = time.monotonic()
+            jar = extract_browser_cookies(browser)
+            if len(jar) == 0:
+                msg = "no cookies found"
+            else:
+                count, expires = self._write_jar(browser, jar)
+                ok = True
+                msg = f"{count} cookies"
+                with self._lock:
+                    self._state.setdefault("jars", {})[browser] = {"fetched": time.time(), "expires": expires, "count": count}
+                self._save_state()
+            self._logger.info("cookies refresh (%s): %s in %.1fs", browser, msg, time.monotonic() - t0)
+        except Exception as e:
+            msg = str(e)
+            self._logger.error("cookies refresh failed (%s): %s", browser, msg)
+        finally:
+            with self._lock:
+                queued, self._queued = self._queued, None
+                if queued == browser:
+                    queued = None  # just refreshed
+                self._busy = queued is not None
+        self.refreshed.emit(ok, browser, msg)
+        if queued:
+            self._start(queued)
+
+    def _write_jar(self, browser: str, jar) -> Tuple[int, Optional[int]]:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.cache_path(browser)
+        tmp = path + ".tmp"
+        out = MozillaCookieJar(tmp)
+        for c in jar:
+            out.set_cookie(c)
+        out.save(ignore_discard=True, ignore_expires=True)
+        try:
+            os.chmod(tmp, 0o600)
+        except OSError:
+            pass
+        # Atomic swap: a job that already opened the old file keeps reading a complete jar
+        os.replace(tmp, path)
+        return len(out), jar_expiry(out)
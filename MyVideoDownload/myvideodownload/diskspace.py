@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import os
+import time
+import shutil
+from typing import Optional, Dict, Any, Tuple, Iterable, Callable
+
+GiB = 1024 ** 3
+
+# Used when a format has neither filesize nor bitrate (rough 1080p figure)
+_FALLBACK_BYTES_PER_SEC = 600 * 1024
+
+
+def _usage(path: str):
+    """shutil.disk_usage of the volume holding path (walks up to an existing parent)."""
+    p = os.path.abspath(path)
+    while p and not os.path.exists(p):
+        parent = os.path.dirname(p)
+        if parent == p:
+            break
+        p = parent
+    try:
+        return shutil.disk_usage(p)
+    except OSError:
+        return None
+
+
+def free_bytes(path: str) -> Optional[int]:
+    """Free bytes on the volume holding path (walks up to an existing parent)."""
+    usage = _usage(path)
+    return usage.free if usage is not None else None
+
+
+def capacity_bytes(path: str) -> Optional[int]:
+    """Size of the volume holding path: its free space plus everything that could be reclaimed on it."""
+    usage = _usage(path)
+    return usage.total if usage is not None else None
+
+
+def format_size(fmt: Dict[str, Any], duration: Optional[float] = None) -> Optional[int]:
+    """Best size guess for one format dict: filesize, filesize_approx, then tbr*duration."""
+    for key in ("filesize", "filesize_approx"):
+        v = fmt.get(key)
+        if v:
+            return int(v)
+    tbr = fmt.get("tbr")
+    if tbr and duration:
+        return int(float(tbr) * 1000 / 8 * float(duration))
+    return None
+
+
+def estimate_entry(info: Dict[str, Any], mode: str = "mp4") -> Tuple[int, int, bool]:
+    """(final_bytes, temp_extra_bytes, exact) for a processed video; extra is held only until merge/extraction ends."""
+    duration = info.get("duration")
+    parts = info.get("requested_formats") or [info]
+    exact = True
+    total = 0
+    for f in parts:
+        size = format_size(f, duration)
+        if size is None:
+            exact = False
+            size = int(_FALLBACK_BYTES_PER_SEC * float(duration or 600))
+        total += size
+    mp3 = int(320 * 1000 / 8 * float(duration)) if duration else total
+    if mode == "mp3":
+        return mp3, total, exact
+    extra = total if len(parts) > 1 else 0
+    if mode == "mp4+mp3":
+        # The audio copy is written next to the merged video
+        return total + mp3, extra, exact
+    return total, extra, exact
+
+
+def estimate_total(entries: Iterable[Optional[Dict[str, Any]]], mode: str = "mp4") -> Tuple[int, int, int]:
+    """(required_bytes, counted, guessed): finished files add up, only one entry holds its extra space at a time."""
+    final_sum = 0
+    max_extra = 0
+    counted = 0
+    guessed = 0
+    for e in entries:
+        if not e:
+            continue
+        final, extra, exact = estimate_entry(e, mode)
+        final_sum += final
+        max_extra = max(max_extra, extra)
+        counted += 1
+        if not exact:
+            guessed += 1
+    return final_sum + max_extra, counted, guessed
+
+
+def extrapolate_total(
+    resolved: Iterable[Optional[Dict[str, Any]]],
+    pending: Iterable[Optional[Dict[str, Any]]],
+    mode: str = "mp4",
+) -> Tuple[int, int, int]:
+    """Like estimate_total, with unresolved stubs sized from the resolved entries' bytes per second."""
+    resolved = [e for e in resolved if e]
+    required, counted, guessed = estimate_total(resolved, mode)
+    finals = [(estimate_entry(e, mode)[0], e.get("duration")) for e in resolved]
+    timed = [(f, d) for f, d in finals if d]
+    rate = sum(f for f, _ in timed) / sum(d for _, d in timed) if timed else None
+    avg = sum(f for f, _ in finals) / len(finals) if finals else None
+    for stub in pending:
+        if not stub:
+            continue
+        d = stub.get("duration")
+        if rate and d:
+            required += int(rate * float(d))
+        elif avg:
+            required += int(avg)
+        counted += 1
+        guessed += 1
+    return required, counted, guessed
+
+
+def iter_video_entries(info: Optional[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+    """Yield video dicts from a (possibly nested) playlist info dict."""
+    if not info:
+        return
+    if info.get("_type") in ("playlist", "multi_video"):
+        for e in info.get("entries") or []:
+            yield from iter_video_entries(e)
+    else:
+        yield info
+
+
+def human_size(n: Optional[float]) -> str:
+    if n is None:
+        return "?"
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(n) < 1024 or unit == "TiB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{int(n)} B"
+        n /= 1024.0
+    return f"{n:.1f} TiB"
+
+
+class DiskSpaceMonitor:
+    """Pauses the calling thread while free space is below a floor; check() is rate limited."""
+
+    def __init__(
+        self,
+        path: str,
+        min_free_bytes: int = 1 * GiB,
+        interval: float = 2.0,
+        poll: float = 5.0,
+    ) -> None:
+        self.path = path
+        self.min_free_bytes = int(min_free_bytes)
+        self.interval = interval
+        self.poll = poll
+        self._last_check = 0.0
+
+    def has_room(self, need_bytes: int = 0) -> bool:
+        free = free_bytes(self.path)
+        if free is None:
+            return True  # cannot tell; do not block downloads
+        return free - int(need_bytes) >= self.min_free_bytes
+
+    def can_ever_fit(self, need_bytes: int = 0) -> bool:
+        """False when need_bytes plus the floor exceeds the whole volume: waiting would never end."""
+        capacity = capacity_bytes(self.path)
+        if capacity is None:
+            return True
+        return capacity - int(need_bytes) >= self.min_free_bytes
+
+    def check(
+        self,
+        need_bytes: int = 0,
+        on_pause: Optional[Callable[[str], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        force: bool = False,
+    ) -> None:
+        """Return once there is room; KeyboardInterrupt if should_stop() becomes true while waiting."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.interval:
+            return
+        self._last_check = now
+        notified = False
+        while not self.has_room(need_bytes):
+            if should_stop and should_stop():
+                raise KeyboardInterrupt("Cancelled by user")
+            if not notified and on_pause:
+                on_pause(
+                    f"Low disk space on {self.path}: {human_size(free_bytes(self.path))} free, "
+                    f"need {human_size(need_bytes + self.min_free_bytes)}. Waiting..."
+                )
+                notified = True
+            time.sleep(self.poll)
+        if notified and on_pause:
+            on_pause("")
@@ -0,0 +1,392 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import socketserver
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .retry import PERMANENT
+
+# A claimed entry goes back to the queue when its node stops renewing the lease for this long
+LEASE_SECONDS = 120
+# Leases are renewed this often while a node works (a few renewals may fail before one expires)
+RENEW_INTERVAL = 30
+# A failing entry is handed out this many times (preferably to other nodes) before it is given up
+MAX_ATTEMPTS = 3
+# Jobs per transaction / request when a listing is published
+PUBLISH_BATCH = 500
+DEFAULT_PORT = 8765
+# Replies to claim/complete requests are kept this long so a resent request gets the same answer
+REPLY_SECONDS = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    mode TEXT NOT NULL,
+    key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    last_owner TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    PRIMARY KEY (mode, key)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (mode, state, seq);
+CREATE TABLE IF NOT EXISTS archive (id TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS replies (
+    owner TEXT NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT NOT NULL,
+    at REAL NOT NULL,
+    PRIMARY KEY (owner, request)
+);
+"""
+
+
+def node_id() -> str:
+    """Lease owner name: readable in the queue file, unique per process."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def job_key(job: Dict[str, Any]) -> str:
+    """Queue key of a scheduler job: the video ID, so a video listed by two URLs is queued once."""
+    stub = job["stub"]
+    if stub.get("id"):
+        return f"{stub.get('ie_key') or ''} {stub['id']}".strip()
+    return f"{job['url']}#{job['index']}"
+
+
+def _batches(jobs: Iterable[Dict[str, Any]], size: int = PUBLISH_BATCH) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for job in jobs:
+        batch.append(job)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class SqliteQueue:
+    """Leased entry queue and archive in one SQLite file; nodes on other machines go through QueueServer."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        # Autocommit; writes take the database lock explicitly (BEGIN IMMEDIATE)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        with self._lock:
+            self._db.executescript(_SCHEMA)
+
+    def _write(self, fn):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._db)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    @staticmethod
+    def _once(db, owner: str, request: Optional[str], fn):
+        """fn(db) at most once per (owner, request), stored in the caller's transaction; a repeat gets the stored reply."""
+        if not request:
+            return fn(db)
+        row = db.execute("SELECT result FROM replies WHERE owner = ? AND request = ?", (owner, request)).fetchone()
+        if row is not None:
+            return json.loads(row[0])
+        result = fn(db)
+        now = time.time()
+        db.execute("DELETE FROM replies WHERE at < ?", (now - REPLY_SECONDS,))
+        db.execute(
+            "INSERT INTO replies (owner, request, result, at) VALUES (?, ?, ?, ?)",
+            (owner, request, json.dumps(result, default=str), now),
+        )
+        return result
+
+    def publish(self, jobs: Iterable[Dict[str, Any]], mode: str) -> int:
+        """Add jobs not queued yet for this mode; returns how many were new."""
+        added = 0
+        for batch in _batches(jobs):
+            rows = [(mode, job_key(j), json.dumps(j, default=str)) for j in batch]
+
+            def insert(db, rows=rows):
+                seq = db.execute("SELECT COALESCE(MAX(seq), 0) FROM jobs").fetchone()[0]
+                before = db.total_changes
+                db.executemany(
+                    "INSERT OR IGNORE INTO jobs (mode, key, seq, payload) VALUES (?, ?, ?, ?)",
+                    [(m, k, seq + n, p) for n, (m, k, p) in enumerate(rows, 1)],
+                )
+                return db.total_changes - before
+
+            added += self._write(insert)
+        return added
+
+    def claim(
+        self, owner: str, mode: str, lease: float = LEASE_SECONDS, request: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Lease the next pending or abandoned job (this node's failures last); a resent request gets the same job."""
+
+        def take(db):
+            now = time.time()
+            row = db.execute(
+                "SELECT key, payload FROM jobs WHERE mode = ? AND "
+                "(state = 'pending' OR (state = 'leased' AND lease_until < ?)) "
+                "ORDER BY last_owner IS ?, seq LIMIT 1",
+                (mode, now, owner),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE mode = ? AND key = ?",
+                (owner, now + lease, mode, row[0]),
+            )
+            return dict(json.loads(row[1]), key=row[0])
+
+        return self._write(lambda db: self._once(db, owner, request, take))
+
+    def renew(self, owner: str, lease: float = LEASE_SECONDS) -> int:
+        """Extend every lease this node holds; returns how many it still holds."""
+        return self._write(
+            lambda db: db.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND state = 'leased'",
+                (time.time() + lease, owner),
+            ).rowcount
+        )
+
+    def complete(
+        self,
+        owner: str,
+        mode: str,
+        key: str,
+        ok: bool,
+        error: Optional[str] = None,
+        request: Optional[str] = None,
+        error_class: Optional[str] = None,
+    ) -> bool:
+        """Finish a leased job: failures requeue until MAX_ATTEMPTS, permanent ones fail at once; False if the lease was lost."""
+        if ok:
+            sql, args = "UPDATE jobs SET state = 'done', owner = NULL, error = NULL", ()
+        else:
+            sql = (
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "owner = NULL, last_owner = ?, lease_until = 0, error = ?"
+            )
+            args = (1 if error_class in PERMANENT else MAX_ATTEMPTS, owner, error)
+        return bool(
+            self._write(
+                lambda db: self._once(
+                    db, owner, request,
+                    lambda db: db.execute(
+                        sql + " WHERE mode = ? AND key = ? AND owner = ? AND state = 'leased'",
+                        args + (mode, key, owner),
+                    ).rowcount,
+                )
+            )
+        )
+
+    def release(self, owner: str) -> int:
+        """Give back this node's unfinished leases (it is stopping) without counting an attempt."""
+        return self._write(
+            lambda db: db.execute(
+                "UPDATE jobs SET state = 'pending', owner = NULL, lease_until = 0, attempts = MAX(0, attempts - 1) "
+                "WHERE owner = ? AND state = 'leased'",
+                (owner,),
+            ).rowcount
+        )
+
+    def active(self, owner: str, mode: str) -> bool:
+        """Whether jobs are pending or leased by other nodes (which may still give them back)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM jobs WHERE mode = ? AND (state = 'pending' OR (state = 'leased' AND owner IS NOT ?)) LIMIT 1",
+                (mode, owner),
+            ).fetchone()
+        return row is not None
+
+    def counts(self, mode: Optional[str] = None) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT state, COUNT(*) FROM jobs WHERE ? IS NULL OR mode = ? GROUP BY state", (mode, mode)
+            ).fetchall()
+        return {state: n for state, n in rows}
+
+    def archived(self, archive_id: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM archive WHERE id = ?", (archive_id,)).fetchone() is not None
+
+    def archive(self, archive_id: str) -> None:
+        self._write(lambda db: db.execute("INSERT OR IGNORE INTO archive (id) VALUES (?)", (archive_id,)))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+# Methods a QueueServer client may call
+_REMOTE_OPS = ("publish", "claim", "renew", "complete", "release", "active", "counts", "archived", "archive")
+
+
+def _serve_line(shared: SqliteQueue, line: bytes) -> bytes:
+    """Run one JSON-line request against shared; the JSON-line reply."""
+    try:
+        req = json.loads(line)
+        op = req["op"]
+        if op not in _REMOTE_OPS:
+            raise ValueError(f"unknown op {op!r}")
+        reply = {"result": getattr(shared, op)(*req.get("args", []))}
+    except Exception as e:
+        reply = {"error": str(e)}
+    return (json.dumps(reply) + "\n").encode("utf-8")
+
+
+class _QueueHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        shared: SqliteQueue = self.server.shared  # type: ignore[attr-defined]
+        for line in self.rfile:
+            self.wfile.write(_serve_line(shared, line))
+            self.wfile.flush()
+
+
+class QueueServer(socketserver.ThreadingTCPServer):
+    """Serves a SqliteQueue to RemoteQueue clients, one JSON line per call (no authentication: trusted LAN only)."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, shared: SqliteQueue, address: Tuple[str, int]) -> None:
+        self.shared = shared
+        super().__init__(address, _QueueHandler)
+
+
+class RemoteQueue:
+    """SqliteQueue interface over a connection to a QueueServer (tcp://host:port)."""
+
+    def __init__(self, host: str, port: int, timeout: float = 30.0) -> None:
+        self.address = (host, port)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._rfile = None
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._rfile = self._sock.makefile("rb")
+
+    def _disconnect(self) -> None:
+        for c in (self._rfile, self._sock):
+            try:
+                if c is not None:
+                    c.close()
+            except OSError:
+                pass
+        self._sock = self._rfile = None
+
+    def _call(self, op: str, *args):
+        data = (json.dumps({"op": op, "args": list(args)}, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            # One reconnect: the server may have been restarted since the last call. Resending is
+            # safe: every op is idempotent or carries a request id (claim, complete)
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(data)
+                    line = self._rfile.readline()
+                    if not line:
+                        raise ConnectionError("queue server closed the connection")
+                    break
+                except OSError:
+                    self._disconnect()
+                    if attempt == 2:
+                        raise
+        reply = json.loads(line)
+        if "error" in reply:
+            raise RuntimeError(f"queue server: {reply['error']}")
+        return reply["result"]
+
+    def publish(self, jobs: Iterable[Dict[str, Any]], mode: str) -> int:
+        return sum(self._call("publish", batch, mode) for batch in _batches(jobs))
+
+    def claim(self, owner: str, mode: str, lease: float = LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        return self._call("claim", owner, mode, lease, uuid.uuid4().hex)
+
+    def renew(self, owner: str, lease: float = LEASE_SECONDS) -> int:
+        return self._call("renew", owner, lease)
+
+    def complete(
+        self, owner: str, mode: str, key: str, ok: bool, error: Optional[str] = None, error_class: Optional[str] = None
+    ) -> bool:
+        return self._call("complete", owner, mode, key, ok, error, uuid.uuid4().hex, error_class)
+
+    def release(self, owner: str) -> int:
+        return self._call("release", owner)
+
+    def active(self, owner: str, mode: str) -> bool:
+        return self._call("active", owner, mode)
+
+    def counts(self, mode: Optional[str] = None) -> Dict[str, int]:
+        return self._call("counts", mode)
+
+    def archived(self, archive_id: str) -> bool:
+        return self._call("archived", archive_id)
+
+    def archive(self, archive_id: str) -> None:
+        self._call("archive", archive_id)
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+
+def parse_address(text: str, default_host: str = "127.0.0.1") -> Tuple[str, int]:
+    host, _, port = text.rpartition(":")
+    return host or default_host, int(port or DEFAULT_PORT)
+
+
+def open_queue(spec: str):
+    """tcp://host:port -> RemoteQueue, anything else is the path of a SqliteQueue file."""
+    if spec.startswith("tcp://"):
+        return RemoteQueue(*parse_address(spec[len("tcp://"):]))
+    return SqliteQueue(spec)
+
+
+class LeaseKeeper:
+    """Renews a node's leases on a background thread while it downloads."""
+
+    def __init__(self, shared, owner: str, interval: float = RENEW_INTERVAL, logger=None) -> None:
+        self.shared = shared
+        self.owner = owner
+        self.interval = interval
+        self._logger = logger
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mvd-lease", daemon=True)
+
+    def start(self) -> "LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.shared.renew(self.owner)
+            except Exception as e:
+                # The lease survives a few missed renewals; the next one may get through
+                if self._logger is not None:
+                    self._logger.warning("queue: lease renewal failed: %s", e)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
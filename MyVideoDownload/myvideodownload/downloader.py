@@ -1,21 +1,270 @@
 from __future__ import annotations
 
 import os
-import sys
-import shutil
 import logging
+import time
 import tempfile
-from typing import Optional, Dict, Any
+import functools
+import threading
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, List, Tuple, TypeVar
 
 from PySide6.QtCore import QObject, Signal, QThread
 
 import yt_dlp
+from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.utils import DownloadError, PostProcessingError
+
+from .diskspace import (
+    DiskSpaceMonitor, GiB, capacity_bytes, estimate_entry, extrapolate_total, free_bytes, human_size, iter_video_entries,
+)
+from .workdir import atomic_move, dest_path_for, is_inside
+from .profiling import NULL_PROFILER, PipelineProfiler, profiling_enabled
+from .prefetch import PrefetchPipeline
+from .sync import SyncStore, is_newest_first, iter_new_entries
+from .procpool import EntryProcessPool
+from .connpool import POOL, format_stats, install as install_pool, stats_delta
+from .scheduler import EntryScheduler, job_label
+from .segmented import install as install_segmented
+from .parallelstreams import install as install_parallel_streams
+from .retry import (
+    AUTH, FORBIDDEN, INNER_FRAGMENT_RETRIES, INNER_RETRIES, RetryEngine, RetryGaveUp, backoff_delay, classify,
+    format_retry_stats,
+)
+from .ffmpegcaps import FFmpegCaps, ffmpeg_caps
+from .probe import FormatCache, ProbeReport, best_height, chosen_height, compact_formats
+from .transcode import BatchTranscoder, is_up_to_date
+from .distqueue import LeaseKeeper, node_id, open_queue
+from .routes import ROUTE_FAILURES, RoutePool, format_route_stats, install as install_routes, use_route
+from .placement import (
+    ROUND_ROBIN, PlacementIndex, RootPlacer, archive_path, format_placement_stats, load_archive_ids, output_template,
+    total_free_bytes, use_root,
+)
+
+# Merged MP4 plus an audio copy from the same download
+MULTI_MODE = "mp4+mp3"
+T = TypeVar("T")
+
+# Seconds between claim attempts while other nodes hold the last leases of a shared queue
+QUEUE_POLL = 5
+
+
+class _DiskSpacePP(PostProcessor):
+    """Waits before each download until the entry fits; one that can never fit fails instead."""
+
+    def __init__(self, worker: "DownloadWorker") -> None:
+        super().__init__(None)
+        self._worker = worker
+
+    def run(self, info):
+        w = self._worker
+        final, extra, _ = estimate_entry(info, w.mode)
+        for monitor, need in ((w._space, final + extra), (w._dest_space, final)):
+            if monitor is not None and not monitor.can_ever_fit(need):
+                # Not PostProcessingError: yt-dlp would only log that before_dl and download anyway
+                raise DownloadError(
+                    f"{info.get('title') or info.get('id')}: needs {human_size(need)} plus "
+                    f"{human_size(monitor.min_free_bytes)} kept free; the volume of {monitor.path} "
+                    f"holds {human_size(capacity_bytes(monitor.path))}"
+                )
+        w._space.check(final + extra, on_pause=w.paused.emit, should_stop=lambda: w._stop, force=True)
+        if w._dest_space is not None:
+            w._dest_space.check(final, on_pause=w.paused.emit, should_stop=lambda: w._stop, force=True)
+        return [], info
+
+
+class _PhasePP(PostProcessor):
+    """Marks a pipeline phase boundary for the profiler."""
+
+    def __init__(self, worker: "DownloadWorker", phase: str) -> None:
+        super().__init__(None)
+        self._worker = worker
+        self._phase = phase
+
+    def run(self, info):
+        self._worker._prof.switch(self._phase)
+        return [], info
+
+
+class _MoveToRootPP(PostProcessor):
+    """Moves the finished file from the work dir to the entry's root; the archive is written only after this."""
+
+    def __init__(self, worker: "DownloadWorker") -> None:
+        super().__init__(None)
+        self._worker = worker
+
+    def run(self, info):
+        w = self._worker
+        src = info.get("filepath")
+        if not src or not os.path.exists(src) or not is_inside(src, w.work_dir):
+            return [], info  # already at its final path (see _keep_existing)
+        dst = dest_path_for(src, w.work_dir, w._entry_root)
+        w._logger.info("moving %s -> %s", src, dst)
+        info["filepath"] = atomic_move(src, dst)
+        w.file_done.emit(dst)
+        audio = info.get("__audio_copy")
+        if audio and os.path.exists(audio):
+            audio_dst = dest_path_for(audio, w.work_dir, w._entry_root)
+            info["__audio_copy"] = atomic_move(audio, audio_dst)
+            w.file_done.emit(audio_dst)
+        return [], info
+
+
+class _AudioCopyPP(PostProcessor):
+    """Multi-output mode: writes the audio copy next to the merged video, from the same fetch."""
+
+    def __init__(self, worker: "DownloadWorker", transcoder: BatchTranscoder) -> None:
+        super().__init__(None)
+        self._worker = worker
+        self._transcoder = transcoder
+
+    def run(self, info):
+        w = self._worker
+        src = info.get("filepath")
+        if not src or not os.path.exists(src):
+            return [], info
+        dst = os.path.splitext(src)[0] + "." + self._transcoder.target
+        if not is_up_to_date(src, dst):
+            w._logger.info("audio copy: %s", dst)
+            err = self._transcoder.convert(src, dst)
+            if err:
+                raise PostProcessingError(f"audio copy failed: {err.splitlines()[-1]}")
+        info["__audio_copy"] = dst
+        if info.get("id"):
+            w._audio_done.add(str(info["id"]))
+        if not w.work_dir or not is_inside(dst, w.work_dir):
+            w.file_done.emit(dst)  # otherwise _MoveToRootPP emits it after the move
+        return [], info
+
+
+def _final_ext(ydl: "yt_dlp.YoutubeDL") -> Optional[str]:
+    """Extension the audio extraction postprocessor gives the file, if one is configured."""
+    for pp in ydl.params.get("postprocessors") or ():
+        if pp.get("key") == "FFmpegExtractAudio":
+            return pp.get("preferredcodec")
+    return None
+
+
+def _keep_existing(ydl: "yt_dlp.YoutubeDL", worker, entry: Dict[str, Any]) -> bool:
+    """With a work dir, finish an entry whose file is already in its root instead of downloading it again."""
+    if not worker.work_dir or ydl.in_download_archive(entry):
+        return False  # the archive check in process_ie_result decides
+    # yt-dlp itself only looks for the file under the work dir template
+    path = ydl.prepare_filename(entry, outtmpl=output_template(worker._entry_root))
+    ext = _final_ext(ydl)
+    if path and ext:
+        path = os.path.splitext(path)[0] + "." + ext
+    if not path or not os.path.exists(path):
+        return False
+    info = dict(ydl.sanitize_info(entry, True), __finaldir=os.path.dirname(path))
+    # Reported like yt-dlp's downloader reports a file that is already there
+    ydl.report_file_already_downloaded(path)
+    for ph in ydl._progress_hooks:
+        ph({"filename": path, "status": "finished", "total_bytes": os.path.getsize(path), "info_dict": info})
+    if ext:
+        # Already extracted audio: only the steps after the move are left
+        info = ydl.run_all_pps("after_move", dict(info, filepath=path))
+    else:
+        info = ydl.post_process(path, info)
+    ydl.record_download_archive(info)
+    return True
+
+
+def _install_audio_copy(ydl: "yt_dlp.YoutubeDL", worker, caps: FFmpegCaps, target: str) -> None:
+    """Add the audio copy postprocessor; the archive gets a second "<id> mp3" line for it."""
+    ydl.add_post_processor(_AudioCopyPP(worker, BatchTranscoder(caps, target, jobs=1, logger=worker._logger)), when="post_process")
+    record = ydl.record_download_archive
+    in_archive = ydl.in_download_archive
+
+    def record_both(info):
+        if not in_archive(info):  # already there when only the audio copy was missing
+            record(info)
+        if str(info.get("id")) in worker._audio_done:
+            record(_audio_id(info, target))
+
+    ydl.record_download_archive = record_both
+    _require_audio_copy(ydl, target)
+
+
+def _new_ydl(opts: Dict[str, Any]) -> "yt_dlp.YoutubeDL":
+    """YoutubeDL that never writes its jar back to the cookie file (the CookieManager's shared cache)."""
+    ydl = yt_dlp.YoutubeDL(opts)
+    ydl.save_cookies = lambda: None
+    return ydl
+
+
+def _audio_id(info: Dict[str, Any], target: str) -> Dict[str, Any]:
+    return dict(info, id=f"{info.get('id')} {target}", _old_archive_ids=None)
+
+
+def _require_audio_copy(ydl: "yt_dlp.YoutubeDL", target: str) -> None:
+    """Count an entry as archived only when its audio copy is archived too (extraction-only instances as well)."""
+    in_archive = ydl.in_download_archive
+
+    def in_archive_both(info):
+        return in_archive(info) and bool(info.get("id")) and in_archive(_audio_id(info, target))
+
+    ydl.in_download_archive = in_archive_both
+
+
+def _install_shared_archive(ydl: "yt_dlp.YoutubeDL", shared) -> None:
+    """Check and record archive IDs in the shared queue's archive as well as the root's file."""
+    record = ydl.record_download_archive
+    in_archive = ydl.in_download_archive
+
+    def record_shared(info):
+        record(info)
+        shared.archive(ydl._make_archive_id(info))
+
+    def in_archive_shared(info):
+        if in_archive(info):
+            return True
+        vid = ydl._make_archive_id(info)
+        return bool(vid) and shared.archived(vid)
+
+    ydl.record_download_archive = record_shared
+    ydl.in_download_archive = in_archive_shared
+
+
+class _PlacedPP(PostProcessor):
+    """Adds the entry's final files to the placement index (after the move to its root)."""
+
+    def __init__(self, worker: "DownloadWorker") -> None:
+        super().__init__(None)
+        self._worker = worker
+
+    def run(self, info):
+        w = self._worker
+        files = [p for p in (info.get("filepath"), info.get("__audio_copy")) if p]
+        if files and info.get("id"):
+            w._placed({
+                "id": self._downloader._make_archive_id(info) or str(info["id"]),
+                "root": w._entry_root,
+                "files": files,
+                "playlist": info.get("playlist_id"),
+            })
+        return [], info
+
+
+class _SyncSeenPP(PostProcessor):
+    """Collects IDs whose file went through every postprocessor (sync mode, pool processes)."""
+
+    def __init__(self, worker: "DownloadWorker") -> None:
+        super().__init__(None)
+        self._worker = worker
+
+    def run(self, info):
+        if info.get("id"):
+            self._worker._sync_done.add(str(info["id"]))
+        return [], info
 
 
 class DownloadWorker(QThread):
     progress = Signal(float, str, str, str)  # percent, speed, eta, title
     file_done = Signal(str)  # absolute filename saved by yt-dlp
     skipped = Signal(str)  # human-readable reason for a skipped entry
+    paused = Signal(str)  # non-empty while waiting for disk space, "" when resumed
+    format_chosen = Signal(str, int, int)  # title, selected height, best available height (0 = unknown)
+    probed = Signal(object)  # ProbeReport.as_dict() of a probe_only run
     finished = Signal(bool, str)  # success, output_path or error message
 
     def __init__(
@@ -27,24 +276,104 @@ class DownloadWorker(QThread):
         cookies_path: Optional[str] = None,
         cookies_from_browser: Optional[str] = None,
         ignore_archive: bool = False,
+        space_check: bool = True,
+        min_free_bytes: int = 1 * GiB,
+        work_dir: Optional[str] = None,
+        profile: Optional[bool] = None,
+        prefetch: int = 3,
+        sync: bool = False,
+        sync_store: Optional[SyncStore] = None,
+        processes: int = 0,
+        order: str = "playlist",
+        probe_only: bool = False,
+        segmented: bool = True,
+        parallel_streams: bool = True,
+        streaming: bool = False,
+        shared_queue: Optional[str] = None,
+        routes: Optional[List[str]] = None,
+        roots: Optional[List[str]] = None,
+        placement: str = ROUND_ROBIN,
         parent: Optional[QObject] = None,
     ) -> None:
         super().__init__(parent)
         self.url = url.strip()
-        self.mode = mode  # 'mp4' or 'mp3'
+        self.mode = mode  # 'mp4', 'mp3' or MULTI_MODE
         self.root_dir = root_dir
+        # Every output root (root_dir first); entries are spread over them by the placement policy
+        self.roots = list(dict.fromkeys([root_dir] + list(roots or [])))
+        self._entry_root = root_dir
         self.max_height = max_height
         self.cookies_path = cookies_path
         self.cookies_from_browser = cookies_from_browser
         self.ignore_archive = ignore_archive
+        self.space_check = space_check
+        # Optional fast local volume for .part files and merges; finished files are moved to root_dir
+        self.work_dir = work_dir or None
+        self._space = DiskSpaceMonitor(self.work_dir or root_dir, min_free_bytes)
+        self._dest_space = DiskSpaceMonitor(root_dir, min_free_bytes) if self.work_dir else None
+        self._root_space: Dict[str, DiskSpaceMonitor] = {root_dir: self._dest_space or self._space}
+        # Opt-in (argument or MYVIDEODOWNLOAD_PROFILE=1): phase timings + stack samples per run
+        if profile is None:
+            profile = profiling_enabled()
+        self._prof = PipelineProfiler() if profile else NULL_PROFILER
+        # Playlist entries resolved ahead of the one being downloaded
+        self.prefetch = max(0, int(prefetch))
+        self._pipeline: Optional[PrefetchPipeline] = None
+        self._tls = threading.local()
+        self._prefetch_ydls: List["yt_dlp.YoutubeDL"] = []
+        self._prefetch_lock = threading.Lock()
+        # Sync mode: only entries not seen on an earlier run of this URL are downloaded
+        self.sync = sync
+        self._sync_store = sync_store if sync_store is not None else (SyncStore(self.get_sync_path()) if sync else None)
+        self._sync_done: set = set()
+        self._sync_new = 0
+        # Multi-output mode: IDs whose audio copy was written (archived along with the video)
+        self._audio_done: set = set()
+        self._audio_fmt: Optional[str] = None
+        # >0: playlist entries are extracted and downloaded in that many worker processes
+        self.processes = max(0, int(processes))
+        self._proc_pool: Optional[EntryProcessPool] = None
+        # Pending entries of every URL in this job; the UI may pin/reorder them while it runs
+        self.scheduler = EntryScheduler(order)
+        # Empty for a queue node that only works on entries other instances published
+        self._urls = [self.url] if self.url else []
+        self._incoming: List[str] = []
+        self._incoming_lock = threading.Lock()
+        self._accepting = True
+        self._sync_titles: Dict[str, Optional[str]] = {}
+        # Compact format lists per video ID: filled by downloads, used by probe_only runs
+        self.probe_only = probe_only
+        # Progressive files are fetched as concurrent byte ranges (concurrent_fragment_downloads connections)
+        self.segmented = segmented
+        # Separate video and audio streams are fetched at the same time, then merged in one ffmpeg pass
+        self.parallel_streams = parallel_streams
+        # Playlists are listed page by page while entries download, keeping memory flat for huge channels
+        self.streaming = streaming
+        # Coordinator/worker mode: SQLite file or tcp://host:port of a queue shared by several instances
+        self.shared_queue = shared_queue or None
+        self._queue = None
+        self._node = node_id()
+        self._format_cache = FormatCache(self.get_format_cache_path())
         self._stop = False
         self._logger = logging.getLogger("myvideodownload")
         self._ensure_logging()
         self._saw_download = False
-        self._temp_handler = None
+        # Proxies / source addresses taking turns per entry; None = the default connection only
+        self._routes = RoutePool(routes, self._logger) if routes else None
+        self._entry_bytes = 0  # bytes downloaded by the current entry attempt (route throughput)
+        self._index = PlacementIndex(self.get_placement_index_path())
+        self._placer = RootPlacer(self.roots, placement, self._index, min_free_bytes, self._logger)
+        # Archive IDs of the other roots, added to every YoutubeDL's in-memory archive
+        self._other_archive_ids: set = set()
+        # Per-entry retries by failure class; yt-dlp itself only retries within a single request
+        self._retry = RetryEngine(lambda: self._stop, self._logger)
 
     def stop(self):
         self._stop = True
+        if self._pipeline is not None:
+            self._pipeline.cancel()
+        if self._proc_pool is not None:
+            self._proc_pool.cancel()
         try:
             self._logger.info("stop requested by user")
         except Exception:
@@ -82,45 +411,55 @@ class DownloadWorker(QThread):
             # Fallback to alongside executable/package (may fail under Program Files)
             return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "logs", "app.log"))
 
-    def _detect_ffmpeg(self) -> Optional[str]:
-        candidates = []
-        here = os.path.dirname(os.path.abspath(__file__))
-        # 1) Next to executable (installed/portable)
-        try:
-            exe_dir = os.path.dirname(sys.executable)
-            candidates.append(os.path.join(exe_dir, "ffmpeg", "bin"))
-        except Exception:
-            pass
-        # 2) PyInstaller temporary dir (MEIPASS)
-        try:
-            meipass = getattr(sys, "_MEIPASS", None)
-            if meipass:
-                candidates.append(os.path.join(meipass, "ffmpeg", "bin"))
-        except Exception:
-            pass
-        # 3) Package-relative (dev/portable)
-        candidates.append(os.path.join(here, "..", "ffmpeg", "bin"))
-        candidates.append(os.path.join(here, "..", "..", "ffmpeg", "bin"))
-        # 4) Env PATH
-        path_ffmpeg = shutil.which("ffmpeg")
-        if path_ffmpeg:
-            return os.path.dirname(path_ffmpeg)
-        for c in candidates:
-            if os.path.exists(os.path.join(c, "ffmpeg.exe")) or os.path.exists(os.path.join(c, "ffmpeg")):
-                return os.path.abspath(c)
-        return None
+    @classmethod
+    def get_sync_path(cls) -> str:
+        app_dir = os.path.dirname(os.path.dirname(cls.get_log_path()))
+        return os.path.join(app_dir, "sync-state.json")
+
+    @classmethod
+    def get_format_cache_path(cls) -> str:
+        app_dir = os.path.dirname(os.path.dirname(cls.get_log_path()))
+        return os.path.join(app_dir, "formats-cache.json")
+
+    @classmethod
+    def get_placement_index_path(cls) -> str:
+        app_dir = os.path.dirname(os.path.dirname(cls.get_log_path()))
+        return os.path.join(app_dir, "placement-index.jsonl")
+
+    @classmethod
+    def get_ffmpeg_caps_path(cls) -> str:
+        app_dir = os.path.dirname(os.path.dirname(cls.get_log_path()))
+        return os.path.join(app_dir, "ffmpeg-caps.json")
+
+    @classmethod
+    def _ffmpeg_caps(cls) -> Optional[FFmpegCaps]:
+        return ffmpeg_caps(cls.get_ffmpeg_caps_path())
+
+    @classmethod
+    def _detect_ffmpeg(cls) -> Optional[str]:
+        caps = cls._ffmpeg_caps()
+        return caps.dir if caps else None
+
+    def _audio_target(self) -> Optional[str]:
+        """Format of the multi-output audio copy: mp3, m4a without libmp3lame, None without ffmpeg."""
+        if self.mode != MULTI_MODE:
+            return None
+        caps = self._ffmpeg_caps()
+        if caps is None:
+            self._logger.warning("ffmpeg not found; multi-output mode saves the video only")
+            return None
+        return "mp3" if caps.can_mp3 else "m4a"
 
     def _build_opts(self) -> Dict[str, Any]:
-        os.makedirs(self.root_dir, exist_ok=True)
+        for root in self.roots:
+            os.makedirs(root, exist_ok=True)
+        if self.work_dir:
+            os.makedirs(self.work_dir, exist_ok=True)
 
-        # Output template: use autonumber to avoid missing playlist_index on single videos
-        outtmpl = os.path.join(
-            self.root_dir,
-            "%(playlist_title|Video)s",
-            "%(playlist_index|autonumber)03d - %(playlist_title|Video)s - %(title)s.%(ext)s",
-        )
+        outtmpl = output_template(self.work_dir or self.root_dir)
 
-        ffmpeg_loc = self._detect_ffmpeg()
+        caps = self._ffmpeg_caps()
+        ffmpeg_loc = caps.dir if caps else None
 
         # New resolution logic:
         # Priority: Selected (max_height) -> 720p -> 480p -> 360p -> best
@@ -148,21 +487,28 @@ class DownloadWorker(QThread):
         
         video_format_pref = "/".join(formats)
 
-        # Archive file to record finished video IDs
-        archive_path = os.path.join(self.root_dir, ".download-archive.txt")
+        # Archive file to record finished video IDs (each root keeps its own, see placement.use_root)
+        archive_file = archive_path(self.root_dir)
 
         ydl_opts: Dict[str, Any] = {
             "outtmpl": outtmpl,
             "noplaylist": False,
-            "ignoreerrors": True,
+            # Errors are raised to the retry engine, which decides per entry (see _download_entry)
+            "ignoreerrors": False,
             "continuedl": True,
             "overwrites": False, # Changed to False to allow resuming partial downloads
             "merge_output_format": "mp4",
             "progress_hooks": [self._hook],
+            "postprocessor_hooks": [self._pp_hook],
             "logger": self._logger,
             "concurrent_fragment_downloads": 5, # Increased for better speed
-            "retries": 30, # Increased retries
-            "fragment_retries": 20,
+            # Few, spaced-out request-level retries (see retry.INNER_RETRIES)
+            "retries": INNER_RETRIES,
+            "fragment_retries": INNER_FRAGMENT_RETRIES,
+            "retry_sleep_functions": {
+                "http": functools.partial(backoff_delay, base=1.0, cap=30.0),
+                "fragment": functools.partial(backoff_delay, base=0.5, cap=10.0),
+            },
             "quiet": True,
             "no_warnings": True,
             "extractor_args": {
@@ -188,7 +534,7 @@ class DownloadWorker(QThread):
         }
         
         if not self.ignore_archive:
-            ydl_opts["download_archive"] = archive_path
+            ydl_opts["download_archive"] = archive_file
         if ffmpeg_loc:
             ydl_opts["ffmpeg_location"] = ffmpeg_loc
         if self.cookies_path and os.path.exists(self.cookies_path):
@@ -198,52 +544,50 @@ class DownloadWorker(QThread):
             
         ydl_opts["autonumber_start"] = 1
 
-        if self.mode == "mp4":
-            ydl_opts["format"] = video_format_pref
+        if self.mode in ("mp4", MULTI_MODE):
+            if caps:
+                ydl_opts["format"] = video_format_pref
+            else:
+                # Nothing can merge separate video/audio streams: single-file formats only
+                self._logger.warning("ffmpeg not found; downloading single-file formats up to %sp", mh)
+                ydl_opts["format"] = f"best[height<={mh}][ext=mp4]/best[height<={mh}]/best"
         else:  # mp3
             ydl_opts["format"] = "bestaudio/best"
-            ydl_opts["postprocessors"] = [
-                {
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "320",
-                }
-            ]
+            if caps and caps.can_mp3:
+                ydl_opts["postprocessors"] = [
+                    {
+                        "key": "FFmpegExtractAudio",
+                        "preferredcodec": "mp3",
+                        "preferredquality": "320",
+                    }
+                ]
+            elif caps:
+                # No MP3 encoder in this build: m4a is stream-copied when the source is AAC
+                self._logger.warning("ffmpeg has no libmp3lame; saving audio as m4a")
+                ydl_opts["format"] = "bestaudio[ext=m4a]/bestaudio/best"
+                ydl_opts["postprocessors"] = [{"key": "FFmpegExtractAudio", "preferredcodec": "m4a"}]
+            else:
+                self._logger.warning("ffmpeg not found; saving the original audio stream without conversion")
+                ydl_opts["format"] = "bestaudio[ext=m4a]/bestaudio/best"
         return ydl_opts
 
-    def _attach_temp_log_handler(self):
-        if self._temp_handler:
-            return
-        worker = self
-        class _TempHandler(logging.Handler):
-            def emit(self, record: logging.LogRecord):
-                try:
-                    msg = record.getMessage()
-                    if record.levelno >= logging.ERROR and (
-                        "[youtube]" in msg or "This video" in msg or "Private" in msg or "No video formats" in msg or "Members only" in msg or "HTTP Error 403" in msg or "Sign in" in msg
-                    ):
-                        worker.skipped.emit(msg)
-                except Exception:
-                    pass
-        self._temp_handler = _TempHandler()
-        self._temp_handler.setLevel(logging.ERROR)
-        self._logger.addHandler(self._temp_handler)
-
-    def _detach_temp_log_handler(self):
-        if self._temp_handler:
-            try:
-                self._logger.removeHandler(self._temp_handler)
-            except Exception:
-                pass
-            self._temp_handler = None
+    def _pp_hook(self, d: Dict[str, Any]) -> None:
+        if d.get("status") == "started":
+            self._prof.switch("merge" if d.get("postprocessor") == "Merger" else "postprocess")
 
     def _hook(self, d: Dict[str, Any]) -> None:
+        with self._prof.phase("progress_hook"):
+            self._progress(d)
+
+    def _progress(self, d: Dict[str, Any]) -> None:
         if self._stop:
             raise KeyboardInterrupt("Cancelled by user")
         status = d.get("status")
         title = d.get("info_dict", {}).get("title") or d.get("filename") or ""
         if status == "downloading":
             self._saw_download = True
+            # Pause (block this thread) before the disk fills up mid-download
+            self._space.check(on_pause=self.paused.emit, should_stop=lambda: self._stop)
             percent = d.get("_percent_str") or "0%"
             try:
                 percent = float(percent.strip().strip('%'))
@@ -255,29 +599,616 @@ class DownloadWorker(QThread):
             self._logger.info("downloading: %s %.1f%% %s ETA %s", title, percent, speed, eta)
         elif status == "finished":
             self._saw_download = True
+            if d.get("elapsed") is not None:  # not reported for files that were already there
+                self._entry_bytes += int(d.get("total_bytes") or d.get("downloaded_bytes") or 0)
             self.progress.emit(100.0, "", "", title)
             self._logger.info("finished download stage: %s", title)
             try:
                 fn = d.get("filename")
-                if fn:
+                # With a work dir, file_done is emitted after the move to root_dir
+                if fn and not self.work_dir:
                     self.file_done.emit(fn)
             except Exception:
                 pass
 
+    def _preflight_space(self, resolved: List[Dict[str, Any]], pending: List[Dict[str, Any]]) -> None:
+        """Compare the job's estimated size (pending stubs extrapolated) with the free space of the output roots."""
+        required, counted, guessed = extrapolate_total(resolved, pending, self.mode)
+        roots = "; ".join(self.roots)
+        checks = [(roots, required, total_free_bytes(self.roots))]
+        if self.work_dir:
+            # The work dir holds one entry (plus merge copy) at a time; root only gets finished files
+            sizes = [estimate_entry(e, self.mode) for e in resolved]
+            max_extra = max((extra for _, extra, _ in sizes), default=0)
+            peak = max((final + extra for final, extra, _ in sizes), default=0)
+            checks = [(roots, required - max_extra, checks[0][2]), (self.work_dir, peak, free_bytes(self.work_dir))]
+        for path, need, free in checks:
+            self._logger.info(
+                "space pre-check: %s: %d entries, ~%s required (%d guessed), %s free",
+                path, counted, human_size(need), guessed, human_size(free),
+            )
+            if free is None or not counted or guessed == counted:
+                continue  # nothing reliable to compare; the per-entry monitor still applies
+            needed = need + self._space.min_free_bytes
+            if needed > free:
+                raise Exception(
+                    f"Not enough disk space: about {human_size(needed)} needed "
+                    f"(incl. {human_size(self._space.min_free_bytes)} reserve), "
+                    f"{human_size(free)} free on {path}"
+                )
+
+    def _prefetch_ydl(self) -> "yt_dlp.YoutubeDL":
+        # yt-dlp is not thread-safe: one extraction-only instance per prefetch thread
+        ydl = getattr(self._tls, "ydl", None)
+        if ydl is None:
+            ydl = _new_ydl(dict(self._prefetch_opts))
+            ydl.archive.update(self._other_archive_ids)
+            install_pool(ydl)
+            if self._audio_fmt:
+                _require_audio_copy(ydl, self._audio_fmt)
+            if self._routes is not None:
+                install_routes(ydl)
+            self._tls.ydl = ydl
+            with self._prefetch_lock:
+                self._prefetch_ydls.append(ydl)
+        return ydl
+
+    def _close_prefetch_ydls(self) -> None:
+        with self._prefetch_lock:
+            ydls, self._prefetch_ydls = self._prefetch_ydls, []
+        for ydl in ydls:
+            try:
+                ydl.close()
+            except Exception:
+                pass
+
+    def _resolve_entry(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Prefetch thread: extract one playlist entry with retries; a final failure is reported as skipped."""
+        with self._prof.attach("prefetch:extraction"):
+            if self._stop or self._prefetch_ydl().in_download_archive(job["stub"]):
+                return None
+            try:
+                return self._retry.call(lambda _attempt: self._routed(job, lambda: self._extract_entry(job)), job_label(job))
+            except RetryGaveUp as e:
+                self.skipped.emit(e.message)
+                job["gave_up"] = e
+                return None
+
+    def _extract_entry(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Extract one playlist entry and select its formats (no download)."""
+        ydl = self._prefetch_ydl()
+        use_route(ydl, job.get("route"))
+        extra = None
+        if job["extra"] is not None:
+            extra = dict(job["extra"], playlist_index=job["index"], playlist_autonumber=job["index"])
+        return ydl.process_ie_result(dict(job["stub"]), download=False, extra_info=extra)
+
+    def _download_entry(
+        self, ydl: "yt_dlp.YoutubeDL", job: Dict[str, Any], info: Optional[Dict[str, Any]]
+    ) -> Optional[RetryGaveUp]:
+        """Download a resolved entry, re-extracting it before a retry; returns the failure if it was given up."""
+        if info is None:
+            self._placer.done(job.get("root"))
+            return job.get("gave_up")  # None: archived (or filtered out), nothing to download
+        state = {"info": info, "start": 0.0}
+        if job.get("root"):
+            use_root(ydl, self, job["root"])
+
+        def attempt(n: int) -> None:
+            if n > 1:
+                state["info"] = self._extract_entry(job)
+            use_route(ydl, job.get("route"))
+            state["start"] = time.monotonic()
+            self._entry_bytes = 0
+            self._download_resolved(ydl, state["info"])
+
+        try:
+            self._retry.call(lambda n: self._routed(job, lambda: attempt(n)), job_label(job))
+        except RetryGaveUp as e:
+            self.skipped.emit(e.message)
+            return e
+        finally:
+            self._placer.done(job.get("root"), self._entry_bytes)
+        if self._routes is not None:
+            self._routes.report(job.get("route"), True, self._entry_bytes, time.monotonic() - state["start"])
+        return None
+
+    def _routed(self, job: Dict[str, Any], fn: Callable[[], T]) -> T:
+        """fn() on the job's route; a failure of the connection identity counts against it and moves the job to another member."""
+        if self._routes is None:
+            return fn()
+        try:
+            return fn()
+        except Exception as e:
+            if classify(e) in ROUTE_FAILURES:
+                self._routes.report(job.get("route"), False)
+                job["route"] = self._routes.acquire()
+            raise
+
+    def _with_routes(self, jobs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for job in jobs:
+            yield dict(job, route=self._routes.acquire())
+
+    def _with_fallback_routes(self, jobs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Pool jobs carry the other healthy members: a process cannot acquire() from this thread's pool."""
+        for job in jobs:
+            yield dict(job, fallback_routes=self._routes.alternatives(job["route"]))
+
+    def _with_roots(self, jobs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Place each job on an output root as it is taken (ahead of its download by the prefetch/pool depth)."""
+        for job in jobs:
+            yield dict(job, root=self._placer.place((job["extra"] or {}).get("playlist_id")))
+
+    def _placed(self, record: Dict[str, Any]) -> None:
+        self._index.add(record)
+
+    def _download_resolved(self, ydl: "yt_dlp.YoutubeDL", info: Optional[Dict[str, Any]]) -> None:
+        for entry in iter_video_entries(info):
+            if self._stop:
+                raise KeyboardInterrupt("Cancelled by user")
+            self._prof.switch("format_selection")
+            self._report_format(entry)
+            if not _keep_existing(ydl, self, entry):
+                ydl.process_ie_result(ydl.sanitize_info(entry, True), download=True)
+
+    def _report_format(self, entry: Dict[str, Any]) -> None:
+        """Cache the entry's format list and tell which height the format chain picked."""
+        formats = compact_formats(entry)
+        self._format_cache.put(entry.get("id"), formats)
+        if self.mode == "mp3":
+            return
+        chosen = chosen_height(entry) or 0
+        best = best_height(formats) or 0
+        title = entry.get("title") or entry.get("id") or ""
+        if chosen and chosen < min(int(self.max_height or 1080), best or chosen):
+            self._logger.warning("format: %s: %dp selected (requested %sp, best available %dp)", title, chosen, self.max_height, best)
+        self.format_chosen.emit(title, chosen, best)
+
+    @staticmethod
+    def _playlist_extra(listing: Dict[str, Any], count: int) -> Dict[str, Any]:
+        # The fields yt-dlp adds to entries when it walks a playlist itself
+        return {
+            "playlist": listing.get("title") or listing.get("id"),
+            "playlist_title": listing.get("title"),
+            "playlist_id": listing.get("id"),
+            "playlist_uploader": listing.get("uploader"),
+            "playlist_uploader_id": listing.get("uploader_id"),
+            "playlist_channel": listing.get("channel"),
+            "playlist_channel_id": listing.get("channel_id"),
+            "playlist_webpage_url": listing.get("webpage_url"),
+            "playlist_count": count,
+            "n_entries": count,
+        }
+
+    def enqueue(self, url: str) -> bool:
+        """Add another URL to this running job as its own scheduler source; False once the job has finished listing."""
+        with self._incoming_lock:
+            if not self._accepting or self._stop:
+                return False
+            self._urls.append(url.strip())
+            self._incoming.append(url.strip())
+            return True
+
+    def _list_source(self, ydl: "yt_dlp.YoutubeDL", url: str) -> Iterable[Dict[str, Any]]:
+        """Flat-list one URL into scheduler jobs; in streaming mode a lazy iterator past the first page."""
+        try:
+            return self._retry.call(lambda _attempt: self._list_source_once(ydl, url), url)
+        except RetryGaveUp as e:
+            self.skipped.emit(e.message)
+            return []
+
+    def _list_source_once(self, ydl: "yt_dlp.YoutubeDL", url: str) -> Iterable[Dict[str, Any]]:
+        self._prof.switch("extraction")
+        listing = ydl.extract_info(url, download=False, process=False)
+        for _ in range(5):  # follow redirects (e.g. youtu.be/watch?list= -> playlist)
+            if not listing or listing.get("_type") not in ("url", "url_transparent"):
+                break
+            listing = ydl.extract_info(listing["url"], download=False, process=False, ie_key=listing.get("ie_key"))
+        if not listing:
+            return []
+        if listing.get("_type") not in ("playlist", "multi_video"):
+            if self.sync:
+                self._sync_new += 1
+            return [{"stub": listing, "index": 1, "extra": None, "url": url}]
+
+        entries = listing.get("entries") or []
+        if self.sync:
+            # Entries are pulled lazily, so a newest-first channel only costs its first page(s)
+            known = self._sync_store.known(url)
+            self._sync_titles[url] = listing.get("title")
+            new = iter_new_entries(entries, known, is_newest_first(url), archived=self._seen_in_archive(ydl, url))
+            if self.streaming:
+                return self._stream_jobs(url, new, self._playlist_extra(listing, listing.get("playlist_count")))
+            stubs = list(new)
+            self._sync_new += len(stubs)
+            self._logger.info("sync: %d new entries (%d known) in %s", len(stubs), len(known), url)
+            count = listing.get("playlist_count") or (max(i for i, _ in stubs) if stubs else 0)
+        elif self.streaming:
+            stubs_iter = ((i, e) for i, e in enumerate(entries, 1) if e)
+            return self._stream_jobs(url, stubs_iter, self._playlist_extra(listing, listing.get("playlist_count")))
+        else:
+            stubs = [(i, e) for i, e in enumerate(entries, 1) if e]
+            count = len(stubs)
+        extra = self._playlist_extra(listing, count)
+        jobs = [{"stub": stub, "index": i, "extra": extra, "url": url} for i, stub in stubs]
+        self._logger.info("playlist: %d entries in %s", len(jobs), url)
+        return jobs
+
+    def _seen_in_archive(self, ydl: "yt_dlp.YoutubeDL", url: str) -> Callable[[Dict[str, Any]], bool]:
+        """Sync listing: entries downloaded before sync tracked url are marked seen, not listed as new."""
+
+        def check(stub: Dict[str, Any]) -> bool:
+            if not ydl.in_download_archive(stub):
+                return False
+            self._sync_store.mark_seen(url, [str(stub.get("id") or stub.get("url") or "")])
+            return True
+
+        return check
+
+    def _stream_jobs(self, url: str, stubs: Iterable[Tuple[int, Dict[str, Any]]], extra: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Jobs of one listing, pulled as the scheduler needs them (later pages are fetched on demand)."""
+        n = 0
+        try:
+            for i, stub in stubs:
+                n += 1
+                if self.sync:
+                    self._sync_new += 1
+                yield {"stub": stub, "index": i, "extra": extra, "url": url}
+        except Exception as e:
+            # A page that fails mid-listing ends this source; entries already listed still download
+            self._logger.error("listing stopped after %d entries in %s: %s", n, url, e)
+            self.skipped.emit(f"{url}: {e}")
+            return
+        self._logger.info("playlist: %d entries streamed from %s", n, url)
+
+    def _scheduled_jobs(self, ydl: "yt_dlp.YoutubeDL") -> Iterator[Dict[str, Any]]:
+        """Entries in scheduler order; URLs enqueued meanwhile are listed as they arrive."""
+        while not self._stop:
+            with self._incoming_lock:
+                urls, self._incoming = self._incoming, []
+            for url in urls:
+                jobs = self._list_source(ydl, url)
+                if isinstance(jobs, list):
+                    self.scheduler.add_source(jobs)
+                else:
+                    self.scheduler.add_stream(jobs)
+            job = self.scheduler.pop()
+            if job is None:
+                with self._incoming_lock:
+                    if self._incoming:
+                        continue
+                    self._accepting = False
+                return
+            yield job
+
+    def _download(self, ydl: "yt_dlp.YoutubeDL") -> None:
+        """List the job's URLs, extract the next few entries ahead on a thread pool, download in scheduler order."""
+        prof = self._prof
+        install_pool(ydl)
+        ydl.add_post_processor(_PhasePP(self, "format_selection"), when="pre_process")
+        ydl.add_post_processor(_DiskSpacePP(self), when="before_dl")
+        ydl.add_post_processor(_PhasePP(self, "download"), when="before_dl")
+        if self.work_dir:
+            ydl.add_post_processor(_MoveToRootPP(self), when="after_move")
+        if self.sync:
+            ydl.add_post_processor(_SyncSeenPP(self), when="after_move")
+        ydl.add_post_processor(_PlacedPP(self), when="after_move")
+        if len(self.roots) > 1 and ydl.params.get("download_archive"):
+            # yt-dlp preloads only root_dir's archive; an entry in any root counts as downloaded
+            self._other_archive_ids = load_archive_ids(archive_path(r) for r in self.roots[1:])
+            ydl.archive.update(self._other_archive_ids)
+        if self.segmented:
+            install_segmented(ydl)
+        if self.parallel_streams:
+            install_parallel_streams(ydl)
+        if self._routes is not None:
+            install_routes(ydl)
+        if self.shared_queue and self._queue is None:
+            self._queue = open_queue(self.shared_queue)
+        if self._queue is not None and not self.ignore_archive:
+            _install_shared_archive(ydl, self._queue)
+        self._audio_fmt = self._audio_target()
+        if self._audio_fmt:
+            _install_audio_copy(ydl, self, self._ffmpeg_caps(), self._audio_fmt)
+        if prof is not NULL_PROFILER:
+            # After a finished entry this thread waits for the next one from the prefetch threads
+            ydl.add_post_hook(lambda _fn: prof.switch("prefetch_wait"))
+            record = ydl.record_download_archive
+
+            def _timed_record(info):
+                with prof.phase("archive_write"):
+                    record(info)
+
+            ydl.record_download_archive = _timed_record
+
+        # A fallback attempt starts over with every URL of the job
+        self.scheduler = EntryScheduler(self.scheduler.policy)
+        with self._incoming_lock:
+            self._incoming = list(self._urls)
+            self._accepting = True
+        self._sync_new = 0
+        self._sync_titles = {}
+        if self.probe_only:
+            self._probe(ydl, self._scheduled_jobs(ydl))
+        elif self._queue is not None:
+            self._download_from_queue(ydl)
+        elif self.processes:
+            self._download_in_processes(ydl, self._scheduled_jobs(ydl))
+        else:
+            self._download_pipeline(ydl, self._scheduled_jobs(ydl))
+
+    def _download_pipeline(self, ydl: "yt_dlp.YoutubeDL", jobs: Iterable[Dict[str, Any]]) -> None:
+        """Download entries on this thread while the next few are extracted ahead."""
+        if len(self.roots) > 1:
+            jobs = self._with_roots(jobs)
+        if self._routes is not None:
+            jobs = self._with_routes(jobs)
+        self._prefetch_opts = dict(ydl.params)
+        self._pipeline = PrefetchPipeline(self._resolve_entry, jobs, depth=self.prefetch, logger=self._logger)
+        first = True
+        try:
+            for job, info in self._pipeline:
+                if self._stop:
+                    raise KeyboardInterrupt("Cancelled by user")
+                if first and self.space_check:
+                    # Entries resolved so far give exact sizes; the rest is extrapolated
+                    ready = [info] + self._pipeline.ready()
+                    resolved = [v for r in ready for v in iter_video_entries(r)]
+                    waiting = self._pipeline.pending() + self.scheduler.pending()
+                    self._preflight_space(resolved, [j["stub"] for j in waiting])
+                first = False
+                gave_up = self._download_entry(ydl, job, info)
+                if self._queue is not None:
+                    if gave_up is None:
+                        self._complete_queued(job)
+                    else:
+                        self._complete_queued(job, gave_up.message, gave_up.error_class)
+                if self.sync:
+                    self._mark_synced(ydl, job, info)
+            self._finish_sync()
+        finally:
+            self._pipeline = None
+            self._close_prefetch_ydls()
+            if self.sync:
+                self._sync_store.save()
+
+    def _probe_entry(self, job: Dict[str, Any]) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """Prefetch thread: (compact formats, from_cache) for one entry, extracting only on a cache miss."""
+        with self._prof.attach("prefetch:probe"):
+            return self._probe_formats(job)
+
+    def _probe_formats(self, job: Dict[str, Any]) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        stub = job["stub"]
+        key = stub.get("id") or stub.get("url")
+        cached = self._format_cache.get(key)
+        if cached is not None:
+            return cached, True
+        if self._stop:
+            return None, False
+        info = stub
+        if not stub.get("formats"):
+            ydl = self._prefetch_ydl()
+            try:
+                info = self._retry.call(
+                    lambda _attempt: ydl.extract_info(stub.get("url") or stub.get("webpage_url"), download=False, process=False, ie_key=stub.get("ie_key")),
+                    job_label(job),
+                )
+            except RetryGaveUp:
+                return None, False
+        formats = compact_formats(info or {})
+        self._format_cache.put(key, formats)
+        return formats, False
+
+    def _probe(self, ydl: "yt_dlp.YoutubeDL", jobs: Iterable[Dict[str, Any]]) -> None:
+        """Collect available heights/codecs for every entry without downloading."""
+        report = ProbeReport(max(144, min(int(self.max_height or 1080), 2160)), ydl)
+        self._prefetch_opts = dict(ydl.params)
+        # Extraction is network bound; probe a few more entries at a time than downloads do
+        self._pipeline = PrefetchPipeline(self._probe_entry, jobs, depth=max(4, self.prefetch * 2), logger=self._logger)
+        done = 0
+        try:
+            for job, result in self._pipeline:
+                if self._stop:
+                    raise KeyboardInterrupt("Cancelled by user")
+                formats, cached = result or (None, False)
+                title = job["stub"].get("title") or job["stub"].get("id") or ""
+                report.add(title, formats, cached)
+                done += 1
+                total = done + len(self._pipeline.pending()) + len(self.scheduler)
+                self.progress.emit(100.0 * done / max(1, total), "", "", title)
+        finally:
+            self._pipeline = None
+            self._close_prefetch_ydls()
+        self._logger.info(
+            "probe: %d entries (%d cached, %d failed), best heights %s",
+            report.entries, report.cached, report.failed, dict(report.best),
+        )
+        self.probed.emit(report.as_dict())
+
+    def _finish_sync(self) -> None:
+        if self.sync and not self._stop:
+            for url, title in self._sync_titles.items():
+                self._sync_store.finish(url, title)
+
+    def _download_in_processes(self, ydl: "yt_dlp.YoutubeDL", jobs: Iterable[Dict[str, Any]]) -> None:
+        """Extract and download entries on a process pool; this thread only relays events."""
+        settings = {
+            "mode": self.mode,
+            "root_dir": self.root_dir,
+            "work_dir": self.work_dir,
+            "min_free_bytes": self._space.min_free_bytes,
+            "segmented": self.segmented,
+            "parallel_streams": self.parallel_streams,
+            "audio_target": self._audio_fmt,
+            "shared_queue": None if self.ignore_archive else self.shared_queue,
+            "routes": self._routes is not None,
+            "other_roots": self.roots[1:],
+        }
+        if len(self.roots) > 1:
+            jobs = self._with_roots(jobs)
+        if self._routes is not None:
+            jobs = self._with_fallback_routes(self._with_routes(jobs))
+        self._logger.info("entries run on %d processes", self.processes)
+        self._prof.switch("process_pool")
+        self._proc_pool = EntryProcessPool(ydl.params, settings, self.processes, logger=self._logger)
+        try:
+            for job, result in self._proc_pool.run(jobs, self._on_pool_event):
+                self._retry.merge(result.get("retry"))
+                self._prof.add("pool:entry", result.get("wall", 0.0), result.get("cpu", 0.0))
+                self._placer.done(job.get("root"), result.get("bytes", 0))
+                for record in result.get("placed") or []:
+                    self._placed(record)
+                if self._stop or result.get("cancelled"):
+                    raise KeyboardInterrupt("Cancelled by user")
+                if result.get("error"):
+                    self.skipped.emit(result["error"])
+                if self._queue is not None:
+                    self._complete_queued(job, result.get("error"), result.get("error_class"))
+                if self._routes is not None:
+                    for spec in result.get("failed_routes") or []:
+                        self._routes.report(spec, False)
+                    if not result.get("error"):
+                        route = result.get("route", job["route"])
+                        self._routes.report(route, True, result.get("bytes", 0), result.get("seconds", 0.0))
+                if self.sync and result.get("seen") and job["extra"] is not None:
+                    stub = job["stub"]
+                    self._sync_store.mark_seen(job["url"], [str(stub.get("id") or stub.get("url") or "")])
+            self._finish_sync()
+        finally:
+            self._proc_pool = None
+            if self.sync:
+                self._sync_store.save()
+
+    def _queued_jobs(self, ydl: "yt_dlp.YoutubeDL") -> Iterator[Dict[str, Any]]:
+        """Claim entries from the shared queue (listing this job's URLs into it first) until no lease is left to wait for."""
+        shared = self._queue
+        claimed = 0
+        while not self._stop:
+            with self._incoming_lock:
+                urls, self._incoming = self._incoming, []
+            for url in urls:
+                added = shared.publish(self._list_source(ydl, url), self.mode)
+                self._logger.info("queue: %d new entries from %s", added, url)
+            job = shared.claim(self._node, self.mode)
+            if job is not None:
+                claimed += 1
+                yield job
+                continue
+            if claimed or not shared.active(self._node, self.mode):
+                return
+            deadline = time.monotonic() + QUEUE_POLL
+            while not self._stop and time.monotonic() < deadline:
+                time.sleep(0.2)
+
+    def _download_from_queue(self, ydl: "yt_dlp.YoutubeDL") -> None:
+        """Download claimed entries in rounds until the shared queue is drained, renewing leases meanwhile."""
+        shared = self._queue
+        self._logger.info("queue: node %s on %s", self._node, self.shared_queue)
+        keeper = LeaseKeeper(shared, self._node, logger=self._logger).start()
+        try:
+            while not self._stop:
+                jobs = self._queued_jobs(ydl)
+                if self.processes:
+                    self._download_in_processes(ydl, jobs)
+                else:
+                    self._download_pipeline(ydl, jobs)
+                with self._incoming_lock:
+                    if not self._incoming and not shared.active(self._node, self.mode):
+                        self._accepting = False
+                        break
+        finally:
+            keeper.stop()
+            try:
+                shared.release(self._node)
+                self._logger.info("queue: %s", shared.counts(self.mode))
+            except Exception as e:
+                self._logger.error("queue: could not release leases: %s", e)
+
+    def _complete_queued(self, job: Dict[str, Any], error: Optional[str] = None, error_class: Optional[str] = None) -> None:
+        try:
+            if not self._queue.complete(self._node, self.mode, job["key"], error is None, error, error_class=error_class):
+                self._logger.warning("queue: lease on %s expired; another node took the entry over", job_label(job))
+        except Exception as e:
+            self._logger.error("queue: could not complete %s: %s", job_label(job), e)
+
+    def _on_pool_event(self, ev) -> None:
+        kind = ev[0]
+        if kind == "progress":
+            self._saw_download = True
+            self.progress.emit(*ev[1:])
+        elif kind == "file_done":
+            self._saw_download = True
+            self.file_done.emit(ev[1])
+        elif kind == "paused":
+            self.paused.emit(ev[1])
+        elif kind == "format_chosen":
+            self.format_chosen.emit(*ev[1:])
+        elif kind == "log":
+            # Final per-entry failures come back in the result and become skipped signals
+            self._logger.log(ev[1], ev[2])
+
+    def _mark_synced(self, ydl: "yt_dlp.YoutubeDL", job: Dict[str, Any], info: Optional[Dict[str, Any]]) -> None:
+        """Remember a playlist entry once all its videos are downloaded or archived; failed ones are retried next sync."""
+        stub = job["stub"]
+        if job["extra"] is None:
+            return
+        # An entry archived before sync tracked this URL comes back from prefetch as None
+        if not ydl.in_download_archive(stub):
+            videos = list(iter_video_entries(info))
+            if not videos or any(str(v.get("id")) not in self._sync_done and not ydl.in_download_archive(v) for v in videos):
+                return
+        self._sync_store.mark_seen(job["url"], [str(stub.get("id") or stub.get("url") or "")])
+
     def run(self) -> None:
+        self._prof.start()
+        conns = POOL.stats.snapshot()
+        try:
+            self._run()
+        finally:
+            self._prof.stop()
+            # Keep-alive pool is shared across jobs; log what this job cost in handshakes
+            self._logger.info("connections: %s", format_stats(stats_delta(conns, POOL.stats.snapshot())))
+            self._logger.info("retries: %s", format_retry_stats(self._retry.stats))
+            if self._routes is not None:
+                self._logger.info("routes: %s", format_route_stats(self._routes.stats()))
+            if len(self.roots) > 1:
+                self._logger.info("placement (%s): %s", self._placer.policy, format_placement_stats(self._placer.placed))
+            self._format_cache.save()
+            if self._queue is not None:
+                self._queue.close()
+                self._queue = None
+            report = self._prof.write_report(
+                os.path.dirname(self.get_log_path()), title=f"{self.mode} {self.url}"
+            )
+            if report:
+                self._logger.info("profile report: %s", report)
+
+    def _run(self) -> None:
         self._logger.info("Starting download: %s", self.url)
-        self._attach_temp_log_handler()
-        
+
         # Main attempt with all clients
         try:
             opts = self._build_opts()
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                ydl.download([self.url])
+            with _new_ydl(opts) as ydl:
+                self._download(ydl)
             
+            if self.probe_only and not self._stop:
+                self.finished.emit(True, self.root_dir)
+                return
+
+            if self.sync and not self._sync_new and not self._stop:
+                self._logger.info("sync: no new entries")
+                self.finished.emit(True, self.root_dir)
+                return
+
+            if not self._saw_download and not self._stop and self._queue is not None:
+                self._logger.info("queue drained; other nodes downloaded the remaining entries")
+                self.finished.emit(True, self.root_dir)
+                return
+
             if not self._saw_download and not self._stop:
-                # Check if it was just already downloaded (archive)
-                archive_path = os.path.join(self.root_dir, ".download-archive.txt")
-                if os.path.exists(archive_path) and not self.ignore_archive:
+                # Check if it was just already downloaded (archive of any root)
+                if any(os.path.exists(archive_path(r)) for r in self.roots) and not self.ignore_archive:
                     self._logger.info("No new downloads, but archive exists. Likely already downloaded.")
                     self.finished.emit(True, self.root_dir)
                     return
@@ -300,16 +1231,17 @@ class DownloadWorker(QThread):
                 self.finished.emit(False, "Cancelled by user")
                 return
 
-            # Fallback for 403/Sign-in: Try iOS client specifically as it often bypasses some restrictions
-            if "403" in msg or "Forbidden" in msg or "Sign in" in msg or "confirm your age" in msg:
+            # Fallback for 403/sign-in: the iOS client often bypasses those restrictions.
+            # Throttling, network and permanent failures would fail the same way again.
+            if classify(e) in (FORBIDDEN, AUTH) or self._retry.gave_up(FORBIDDEN, AUTH):
                 try:
                     self._logger.info("Attempting fallback with iOS client...")
                     opts = self._build_opts()
                     opts["extractor_args"]["youtube"]["player_client"] = ["ios"]
                     opts["http_chunk_size"] = 0 # Disable chunking for fallback
                     
-                    with yt_dlp.YoutubeDL(opts) as ydl:
-                        ydl.download([self.url])
+                    with _new_ydl(opts) as ydl:
+                        self._download(ydl)
                     
                     if self._saw_download:
                         self.finished.emit(True, self.root_dir)
@@ -318,5 +1250,3 @@ class DownloadWorker(QThread):
                     self._logger.error("Fallback error: %s", fe)
             
             self.finished.emit(False, msg)
-        finally:
-            self._detach_temp_log_handler()
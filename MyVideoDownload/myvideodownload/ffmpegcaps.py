@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import os
+import re
+import sys
+import json
+import shutil
+import logging
+import threading
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+# Bump when the probed fields change so old cache files are re-probed
+CAPS_FORMAT = 1
+PROBE_TIMEOUT = 15
+
+_logger = logging.getLogger("myvideodownload")
+_lock = threading.Lock()
+_memo: Optional["FFmpegCaps"] = None
+
+
+def _exe(name: str) -> str:
+    return name + ".exe" if os.name == "nt" else name
+
+
+def candidate_dirs() -> List[str]:
+    """Bundled ffmpeg locations, checked after PATH."""
+    candidates = []
+    here = os.path.dirname(os.path.abspath(__file__))
+    # 1) Next to executable (installed/portable)
+    try:
+        exe_dir = os.path.dirname(sys.executable)
+        candidates.append(os.path.join(exe_dir, "ffmpeg", "bin"))
+    except Exception:
+        pass
+    # 2) PyInstaller temporary dir (MEIPASS)
+    meipass = getattr(sys, "_MEIPASS", None)
+    if meipass:
+        candidates.append(os.path.join(meipass, "ffmpeg", "bin"))
+    # 3) Package-relative (dev/portable)
+    candidates.append(os.path.join(here, "..", "ffmpeg", "bin"))
+    candidates.append(os.path.join(here, "..", "..", "ffmpeg", "bin"))
+    return candidates
+
+
+def locate() -> Optional[str]:
+    """Directory of the ffmpeg to use: PATH first, then the bundled copies."""
+    path_ffmpeg = shutil.which("ffmpeg")
+    if path_ffmpeg:
+        return os.path.dirname(path_ffmpeg)
+    for c in candidate_dirs():
+        if os.path.exists(os.path.join(c, "ffmpeg.exe")) or os.path.exists(os.path.join(c, "ffmpeg")):
+            return os.path.abspath(c)
+    return None
+
+
+def _stat_key(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+
+def _run(binary: str, *args: str) -> str:
+    kwargs: Dict[str, Any] = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+    out = subprocess.run(
+        [binary, "-hide_banner", *args],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=PROBE_TIMEOUT, **kwargs,
+    )
+    return out.stdout.decode("utf-8", "replace")
+
+
+def _parse_version(text: str) -> Tuple[str, Optional[List[int]]]:
+    first = text.splitlines()[0] if text else ""
+    m = re.search(r"version\s+(\S+)", first)
+    raw = m.group(1) if m else ""
+    num = re.match(r"n?(\d+)\.(\d+)", raw)
+    return raw, [int(num.group(1)), int(num.group(2))] if num else None
+
+
+def _parse_audio_encoders(text: str) -> List[str]:
+    # Lines look like " A....D libmp3lame   libmp3lame MP3 (MPEG audio layer 3)"
+    out = []
+    for line in text.splitlines():
+        m = re.match(r"\s*A[.A-Z]{5}\s+(\S+)", line)
+        if m and m.group(1) != "=":
+            out.append(m.group(1))
+    return sorted(out)
+
+
+class FFmpegCaps:
+    """The located ffmpeg and what it can do, as far as download/convert decisions go."""
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self.data = data
+        self.dir: str = data["dir"]
+        self.path: str = data["path"]
+        self.version: str = data.get("version") or ""
+        self.version_tuple: Optional[Tuple[int, int]] = tuple(data["version_tuple"]) if data.get("version_tuple") else None
+        self.encoders = set(data.get("audio_encoders") or [])
+        self.ffprobe: bool = bool(data.get("ffprobe"))
+        # False when probing failed; the common encoders are then assumed present
+        self.probed = "audio_encoders" in data
+
+    @property
+    def can_mp3(self) -> bool:
+        return not self.probed or "libmp3lame" in self.encoders
+
+    @property
+    def aac_encoder(self) -> Optional[str]:
+        # libfdk_aac is faster and better where a build has it
+        for name in ("libfdk_aac", "aac"):
+            if name in self.encoders:
+                return name
+        return None if self.probed else "aac"
+
+    def describe(self) -> str:
+        return (
+            f"ffmpeg {self.version or '?'} at {self.dir} (mp3: {'yes' if self.can_mp3 else 'no'}, "
+            f"aac: {self.aac_encoder or 'no'}, ffprobe: {'yes' if self.ffprobe else 'no'})"
+        )
+
+
+def probe(ffmpeg_dir: str) -> Dict[str, Any]:
+    """Run ffmpeg once to read its version and audio encoders (about 0.1 s)."""
+    binary = os.path.join(ffmpeg_dir, _exe("ffmpeg"))
+    version, version_tuple = _parse_version(_run(binary, "-version"))
+    encoders = _parse_audio_encoders(_run(binary, "-encoders"))
+    return {
+        "format": CAPS_FORMAT,
+        "env_path": os.environ.get("PATH", ""),
+        "dir": ffmpeg_dir,
+        "path": binary,
+        "stat": _stat_key(binary),
+        "version": version,
+        "version_tuple": version_tuple,
+        "audio_encoders": encoders,
+        "ffprobe": os.path.exists(os.path.join(ffmpeg_dir, _exe("ffprobe"))),
+    }
+
+
+def _load(cache_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    # Stale when the binary changed (update/replace) or PATH changed (another ffmpeg may win)
+    if (
+        not isinstance(data, dict)
+        or data.get("format") != CAPS_FORMAT
+        or data.get("env_path") != os.environ.get("PATH", "")
+        or not data.get("path")
+        or data.get("stat") != _stat_key(data["path"])
+    ):
+        return None
+    return data
+
+
+def _save(cache_path: str, data: Dict[str, Any]) -> None:
+    try:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        tmp = cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, cache_path)
+    except Exception:
+        pass
+
+
+def ffmpeg_caps(cache_path: str, refresh: bool = False) -> Optional[FFmpegCaps]:
+    """Located ffmpeg and its capabilities (None without ffmpeg), cached per process and on disk while the binary is unchanged."""
+    global _memo
+    with _lock:
+        if _memo is not None and not refresh:
+            return _memo
+        data = None if refresh else _load(cache_path)
+        if data is None:
+            ffmpeg_dir = locate()
+            if ffmpeg_dir is None:
+                return None
+            try:
+                data = probe(ffmpeg_dir)
+            except (OSError, subprocess.SubprocessError) as e:
+                _logger.warning("ffmpeg probe failed for %s: %s", ffmpeg_dir, e)
+                # Still usable for yt-dlp; capabilities unknown
+                data = {"dir": ffmpeg_dir, "path": os.path.join(ffmpeg_dir, _exe("ffmpeg"))}
+                _memo = FFmpegCaps(data)
+                return _memo
+            _save(cache_path, data)
+            _memo = FFmpegCaps(data)
+            _logger.info("probed %s", _memo.describe())
+        else:
+            _memo = FFmpegCaps(data)
+        return _memo
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+from typing import Optional, Dict, Any, List
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QObject, Qt, QTimer
+from PySide6.QtGui import QBrush, QColor, QFont
+
+
+_PREFIX = {"success": "✓ ", "error": "✗ ", "active": "▶ "}
+_COLOR = {"success": "#1a7f37", "error": "#b3261e", "skipped": "#b3261e"}
+
+
+class EventLog:
+    """Append-only JSON-lines log of history events; its tail is read back on startup."""
+
+    def __init__(self, path: str, max_bytes: int = 5 * 1024 * 1024) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._rotate_if_needed()
+            with open(self.path, "a", encoding="utf-8") as f:
+                for ev in events:
+                    f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+        except Exception:
+            pass
+
+    def _rotate_if_needed(self) -> None:
+        try:
+            if os.path.getsize(self.path) > self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+        except OSError:
+            pass
+
+    def load_tail(self, max_entries: int) -> List[Dict[str, Any]]:
+        """Rebuild the last max_entries entries (oldest first) from the log tail."""
+        lines = self._read_tail_lines(max_entries * 4)
+        entries: Dict[int, Dict[str, Any]] = {}
+        for line in lines:
+            try:
+                ev = json.loads(line)
+                if ev.get("event") == "clear":
+                    entries.clear()
+                    continue
+                eid = int(ev["id"])
+            except Exception:
+                continue
+            if ev.get("event") == "add":
+                entries[eid] = {"id": eid, "text": ev.get("text", ""), "status": ev.get("status", "pending")}
+            elif ev.get("event") == "move" and eid in entries:
+                entries[eid] = entries.pop(eid)  # re-order: entry went to the top
+            if ev.get("event") != "add" and eid in entries:
+                if "text" in ev:
+                    entries[eid]["text"] = ev["text"]
+                if "status" in ev:
+                    entries[eid]["status"] = ev["status"]
+        # dicts keep insertion order, which is display order (oldest first)
+        rows = list(entries.values())[-max_entries:]
+        # Anything still marked active belongs to a session that did not finish cleanly
+        for r in rows:
+            if r["status"] == "active":
+                r["status"] = "error"
+        return rows
+
+    def _read_tail_lines(self, max_lines: int, block: int = 64 * 1024) -> List[str]:
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                pos = f.tell()
+                data = b""
+                while pos > 0 and data.count(b"\n") <= max_lines:
+                    step = min(block, pos)
+                    pos -= step
+                    f.seek(pos)
+                    data = f.read(step) + data
+        except OSError:
+            return []
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        if pos > 0 and lines:
+            lines = lines[1:]  # first line is probably partial
+        return lines[-max_lines:]
+
+
+class HistoryModel(QAbstractListModel):
+    """Newest-first list model addressed by entry ID, with batched inserts, a pinned row 0 and a row limit."""
+
+    def __init__(
+        self,
+        max_rows: int = 500,
+        event_log: Optional[EventLog] = None,
+        flush_interval_ms: int = 50,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.max_rows = max(1, int(max_rows))
+        self._log = event_log
+        # Flushed rows, oldest first. Each row gets a contiguous sequence
+        # number when flushed, so ID -> row lookup is O(1) via _by_id.
+        self._rows: List[Dict[str, Any]] = []
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._next_seq = 0
+        self._next_id = 1
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_events: List[Dict[str, Any]] = []
+        self._pinned: Optional[Dict[str, Any]] = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(flush_interval_ms)
+        self._timer.timeout.connect(self.flush)
+        if self._log is not None:
+            self._restore()
+
+    def _restore(self) -> None:
+        rows = self._log.load_tail(self.max_rows)
+        if not rows:
+            return
+        for r in rows:
+            r["_seq"] = self._next_seq
+            self._next_seq += 1
+            self._by_id[r["id"]] = r
+        self._rows = rows
+        self._next_id = max(r["id"] for r in rows) + 1
+
+    # --- public API ---
+    def add(self, text: str, status: str = "pending", pinned: bool = False) -> int:
+        entry = {"id": self._next_id, "text": text, "status": status}
+        self._next_id += 1
+        self._by_id[entry["id"]] = entry
+        self._record({"event": "add", "id": entry["id"], "text": text, "status": status})
+        if pinned:
+            self.unpin()
+            self._set_pinned(entry)
+        else:
+            self._pending.append(entry)
+            self._schedule_flush()
+        return entry["id"]
+
+    def update(self, entry_id: int, text: Optional[str] = None, status: Optional[str] = None, log: bool = True) -> None:
+        entry = self.get(entry_id)
+        if entry is None:
+            return
+        ev: Dict[str, Any] = {"event": "update", "id": entry_id}
+        if text is not None:
+            entry["text"] = text
+            ev["text"] = text
+        if status is not None:
+            entry["status"] = status
+            ev["status"] = status
+        if log:
+            self._record(ev)
+        row = self._row_of(entry_id)
+        if row is not None:
+            idx = self.index(row, 0)
+            self.dataChanged.emit(idx, idx)
+
+    def unpin(self) -> Optional[int]:
+        """Move the pinned entry into the regular history (top row)."""
+        entry = self._pinned
+        if entry is None:
+            return None
+        self._set_pinned(None)
+        self.flush()
+        self._append_flushed([entry])
+        self._record({"event": "move", "id": entry["id"]})
+        return entry["id"]
+
+    def pinned_id(self) -> Optional[int]:
+        return self._pinned["id"] if self._pinned else None
+
+    def get(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(entry_id)
+
+    def clear(self) -> None:
+        self._timer.stop()
+        self.beginResetModel()
+        self._rows = []
+        self._by_id = {}
+        self._pending = []
+        self._pinned = None
+        self.endResetModel()
+        if self._log is not None:
+            # Unwritten events are dropped; the marker hides everything logged before it
+            self._pending_events = []
+            self._log.write([{"event": "clear", "ts": round(time.time(), 3)}])
+
+    def flush(self) -> None:
+        if self._timer.isActive():
+            self._timer.stop()
+        if self._pending:
+            batch, self._pending = self._pending, []
+            self._append_flushed(batch)
+        if self._log is not None and self._pending_events:
+            events, self._pending_events = self._pending_events, []
+            self._log.write(events)
+
+    # --- Qt model interface ---
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._rows) + (1 if self._pinned else 0)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._entry_at(index.row())
+        if entry is None:
+            return None
+        status = entry.get("status", "pending")
+        if role == Qt.DisplayRole:
+            return _PREFIX.get(status, "") + entry.get("text", "")
+        if role == Qt.ForegroundRole and status in _COLOR:
+            return QBrush(QColor(_COLOR[status]))
+        if role == Qt.FontRole and status == "active":
+            font = QFont()
+            font.setBold(True)
+            return font
+        if role == Qt.UserRole:
+            return entry["id"]
+        return None
+
+    # --- internals ---
+    def _record(self, ev: Dict[str, Any]) -> None:
+        if self._log is None:
+            return
+        ev["ts"] = round(time.time(), 3)
+        self._pending_events.append(ev)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _offset(self) -> int:
+        return 1 if self._pinned else 0
+
+    def _entry_at(self, row: int) -> Optional[Dict[str, Any]]:
+        if self._pinned is not None:
+            if row == 0:
+                return self._pinned
+            row -= 1
+        i = len(self._rows) - 1 - row
+        if 0 <= i < len(self._rows):
+            return self._rows[i]
+        return None
+
+    def _row_of(self, entry_id: int) -> Optional[int]:
+        entry = self._by_id.get(entry_id)
+        if entry is None:
+            return None
+        if entry is self._pinned:
+            return 0
+        seq = entry.get("_seq")
+        if seq is None:
+            return None  # still pending
+        return self._offset() + self._next_seq - 1 - seq
+
+    def _set_pinned(self, entry: Optional[Dict[str, Any]]) -> None:
+        if self._pinned is not None:
+            self.beginRemoveRows(QModelIndex(), 0, 0)
+            self._pinned = None
+            self.endRemoveRows()
+        if entry is not None:
+            self.beginInsertRows(QModelIndex(), 0, 0)
+            self._pinned = entry
+            self.endInsertRows()
+
+    def _append_flushed(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        off = self._offset()
+        self.beginInsertRows(QModelIndex(), off, off + len(batch) - 1)
+        for e in batch:
+            e["_seq"] = self._next_seq
+            self._next_seq += 1
+        self._rows.extend(batch)
+        self.endInsertRows()
+        self._trim()
+
+    def _trim(self) -> None:
+        excess = len(self._rows) - self.max_rows
+        if excess <= 0:
+            return
+        total = self.rowCount()
+        self.beginRemoveRows(QModelIndex(), total - excess, total - 1)
+        for e in self._rows[:excess]:
+            self._by_id.pop(e["id"], None)
+        del self._rows[:excess]
+        self.endRemoveRows()
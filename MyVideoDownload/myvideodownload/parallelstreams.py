@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from yt_dlp.downloader.common import FileDownloader
+from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.utils import prepend_extension
+
+
+class _StreamGroupPP(PostProcessor):
+    """before_dl: remembers the entry whose formats are about to be downloaded one by one."""
+
+    def __init__(self, state: Dict[str, Any]) -> None:
+        super().__init__(None)
+        self._state = state
+
+    def run(self, info):
+        formats = info.get("requested_formats")
+        self._state["group"] = info if formats and len(formats) > 1 else None
+        return [], info
+
+
+class _GroupProgress:
+    """Progress hook that reports the streams of an entry downloading together as one status, summed."""
+
+    def __init__(self, hooks: Iterable[Callable[[Dict[str, Any]], None]]) -> None:
+        self._hooks = list(hooks)
+        self._lock = threading.Lock()
+        self._streams: Optional[Dict[str, Optional[Dict[str, Any]]]] = None  # file name -> last status
+
+    def start(self, names: List[str]) -> None:
+        with self._lock:
+            self._streams = dict.fromkeys(names)
+
+    def stop(self) -> None:
+        with self._lock:
+            self._streams = None
+
+    def __call__(self, d: Dict[str, Any]) -> None:
+        with self._lock:
+            streams = self._streams
+            if streams is not None and d.get("status") == "downloading" and d.get("filename") in streams:
+                streams[d["filename"]] = d
+                d = self._combined(d, [s for s in streams.values() if s])
+            for hook in self._hooks:
+                hook(d)
+
+    @staticmethod
+    def _combined(d: Dict[str, Any], parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        done = sum(p.get("downloaded_bytes") or 0 for p in parts)
+        sizes = [p.get("total_bytes") or p.get("total_bytes_estimate") for p in parts]
+        total = sum(sizes) if all(sizes) else None
+        speed = sum(p.get("speed") or 0 for p in parts) or None
+        etas = [p["eta"] for p in parts if p.get("eta") is not None]
+        eta = max(etas) if etas else None
+        return dict(
+            d,
+            downloaded_bytes=done,
+            total_bytes=total,
+            speed=speed,
+            eta=eta,
+            _percent_str=FileDownloader.format_percent(FileDownloader.calc_percent(done, total)),
+            _speed_str=FileDownloader.format_speed(speed),
+            _eta_str=FileDownloader.format_eta(eta),
+        )
+
+
+def _start(fn, *args) -> Future:
+    fut: Future = Future()
+
+    def target():
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:  # KeyboardInterrupt from a cancelled hook included
+            fut.set_exception(e)
+
+    threading.Thread(target=target, name="mvd-stream", daemon=True).start()
+    return fut
+
+
+def _settle(pending: Dict[str, Future]) -> None:
+    """Wait for downloads nobody will collect (the entry failed); their errors do not matter."""
+    for fut in pending.values():
+        try:
+            fut.result()
+        except BaseException:
+            pass
+    pending.clear()
+
+
+def install(ydl) -> None:
+    """Fetch the streams of a merged format at once; later dl() calls for them just collect the result."""
+    state: Dict[str, Any] = {"group": None}
+    pending: Dict[str, Future] = {}
+    original = ydl.dl
+    progress = _GroupProgress(ydl._progress_hooks)
+    ydl._progress_hooks[:] = [progress]
+    ydl.add_post_processor(_StreamGroupPP(state), when="before_dl")
+
+    def stream_name(group, f):
+        # Same name as yt-dlp's own per-format loop: the temp name with the format's ext and ID
+        sib = dict(group, ext=f["ext"])
+        return prepend_extension(ydl.prepare_filename(sib, "temp"), f"f{f['format_id']}", f["ext"])
+
+    def settle():
+        _settle(pending)
+        progress.stop()
+
+    def dl(name, info, subtitle=False, test=False):
+        fut: Optional[Future] = pending.pop(name, None)
+        if fut is not None:
+            try:
+                return fut.result()
+            finally:
+                if not pending:
+                    progress.stop()
+        group, state["group"] = state["group"], None
+        if group is None or subtitle or test or name == "-":
+            return original(name, info, subtitle, test)
+        settle()  # leftovers of an entry that never got this far
+        first, *rest = group["requested_formats"]
+        names = [stream_name(group, f) for f in group["requested_formats"]]
+        if info.get("format_id") != first["format_id"] or name != names[0]:
+            return original(name, info, subtitle, test)
+        progress.start(names)
+        # Same info dicts as yt-dlp's own per-format loop
+        for f, sib_name in zip(rest, names[1:]):
+            sib = dict(group)
+            del sib["requested_formats"]
+            sib.update(f)
+            pending[sib_name] = _start(original, sib_name, sib)
+        try:
+            return original(name, info, subtitle, test)
+        except BaseException:
+            settle()
+            raise
+
+    ydl.dl = dl
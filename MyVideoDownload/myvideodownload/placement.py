@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from .diskspace import DiskSpaceMonitor, free_bytes
+
+ROUND_ROBIN = "roundrobin"
+MOST_FREE = "freespace"
+PER_PLAYLIST = "playlist"
+POLICIES = (ROUND_ROBIN, MOST_FREE, PER_PLAYLIST)
+
+ARCHIVE_NAME = ".download-archive.txt"
+# Weight of the newest entry in the average entry size (reserved per entry in flight)
+ALPHA = 0.3
+
+
+def parse_roots(text: str) -> List[str]:
+    """Output roots separated by ';' or newlines, as typed in the UI (paths may contain spaces and commas)."""
+    roots: List[str] = []
+    for part in text.replace("\n", ";").split(";"):
+        part = part.strip()
+        if part and part not in roots:
+            roots.append(part)
+    return roots
+
+
+def archive_path(root: str) -> str:
+    return os.path.join(root, ARCHIVE_NAME)
+
+
+def load_archive_ids(paths: Iterable[str]) -> Set[str]:
+    """IDs listed in these archive files (the same format yt-dlp preloads)."""
+    ids: Set[str] = set()
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                ids.update(line.strip() for line in f if line.strip())
+        except OSError:
+            continue
+    return ids
+
+
+def output_template(base: str) -> str:
+    # Output template: use autonumber to avoid missing playlist_index on single videos
+    return os.path.join(
+        base,
+        "%(playlist_title|Video)s",
+        "%(playlist_index|autonumber)03d - %(playlist_title|Video)s - %(title)s.%(ext)s",
+    )
+
+
+def use_root(ydl, worker, root: str) -> None:
+    """Point the next entry's output, archive file and disk space check at one of the output roots."""
+    worker._entry_root = root
+    if not worker.work_dir:
+        ydl.params["outtmpl"]["default"] = output_template(root)
+    if ydl.params.get("download_archive"):
+        ydl.params["download_archive"] = archive_path(root)
+    monitor = worker._root_space.get(root)
+    if monitor is None:
+        monitor = worker._root_space[root] = DiskSpaceMonitor(root, worker._space.min_free_bytes)
+    if worker.work_dir:
+        worker._dest_space = monitor
+    else:
+        worker._space = monitor
+
+
+def _volume(path: str) -> Any:
+    """Identity of the volume holding path (walks up to an existing parent)."""
+    p = os.path.abspath(path)
+    while not os.path.exists(p) and os.path.dirname(p) != p:
+        p = os.path.dirname(p)
+    try:
+        return os.stat(p).st_dev
+    except OSError:
+        return p
+
+
+def total_free_bytes(roots: Iterable[str]) -> Optional[int]:
+    """Free bytes over the distinct volumes holding roots (two roots on one disk count once)."""
+    seen = set()
+    total = None
+    for root in roots:
+        vol = _volume(root)
+        if vol in seen:
+            continue
+        seen.add(vol)
+        free = free_bytes(root)
+        if free is not None:
+            total = (total or 0) + free
+    return total
+
+
+class PlacementIndex:
+    """Append-only JSON lines of where each entry landed ({"id", "root", "files", "playlist", "time"}); the last line per ID wins."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._where: Optional[Dict[str, Dict[str, Any]]] = None
+        self._pins: Dict[str, str] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._where is not None:
+            return self._where
+        where: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line of an interrupted write
+                    if isinstance(rec, dict) and rec.get("id"):
+                        self._remember(where, rec)
+        except OSError:
+            pass
+        self._where = where
+        return where
+
+    def _remember(self, where: Dict[str, Dict[str, Any]], rec: Dict[str, Any]) -> None:
+        where[str(rec["id"])] = rec
+        if rec.get("playlist") and rec.get("root"):
+            self._pins[str(rec["playlist"])] = rec["root"]
+
+    def add(self, record: Dict[str, Any]) -> None:
+        if not record.get("id"):
+            return
+        record = dict(record, time=int(record.get("time") or time.time()))
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError:
+                pass
+            if self._where is not None:
+                self._remember(self._where, record)
+
+    def where(self, archive_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load().get(str(archive_id))
+
+    def pinned(self, playlist: str) -> Optional[str]:
+        """Root the playlist's newest recorded entry went to."""
+        with self._lock:
+            self._load()
+            return self._pins.get(str(playlist))
+
+
+class RootPlacer:
+    """Picks each entry's output root by policy; entries placed but unfinished reserve space on their root."""
+
+    def __init__(
+        self,
+        roots: Iterable[str],
+        policy: str = ROUND_ROBIN,
+        index: Optional[PlacementIndex] = None,
+        reserve_bytes: int = 0,
+        logger: Optional[logging.Logger] = None,
+        free: Callable[[str], Optional[int]] = free_bytes,
+    ) -> None:
+        self.roots = list(dict.fromkeys(roots))
+        if not self.roots:
+            raise ValueError("at least one output root is required")
+        self.policy = policy if policy in POLICIES else ROUND_ROBIN
+        self._index = index
+        self.reserve_bytes = int(reserve_bytes)
+        self._logger = logger or logging.getLogger("myvideodownload")
+        self._free = free
+        self._lock = threading.Lock()
+        self._next = 0
+        self._pins: Dict[str, str] = {}
+        self._inflight: Dict[str, int] = {r: 0 for r in self.roots}
+        self._avg_bytes = 0.0
+        self.placed: Dict[str, int] = {r: 0 for r in self.roots}
+
+    def _headroom(self, root: str) -> Optional[float]:
+        free = self._free(root)
+        if free is None:
+            return None
+        return free - self._inflight[root] * self._avg_bytes - self.reserve_bytes
+
+    def _has_room(self, root: str) -> bool:
+        room = self._headroom(root)
+        return room is None or room > 0
+
+    def _most_free(self) -> str:
+        # Unknown free space ranks last but still counts as usable
+        rooms = {r: self._headroom(r) for r in self.roots}
+        return max(self.roots, key=lambda r: rooms[r] if rooms[r] is not None else float("-inf"))
+
+    def _round_robin(self) -> str:
+        for i in range(len(self.roots)):
+            root = self.roots[(self._next + i) % len(self.roots)]
+            if self._has_room(root):
+                self._next = (self._next + i + 1) % len(self.roots)
+                return root
+        root = self.roots[self._next]
+        self._next = (self._next + 1) % len(self.roots)
+        return root
+
+    def _pinned(self, playlist: str) -> str:
+        root = self._pins.get(playlist)
+        if root is None and self._index is not None:
+            root = self._index.pinned(playlist)
+        if root not in self.roots or not self._has_room(root):
+            new = self._most_free()
+            if root in self.roots:
+                self._logger.warning("placement: %s is full; playlist %s continues on %s", root, playlist, new)
+            root = new
+        self._pins[playlist] = root
+        return root
+
+    def place(self, playlist: Optional[str] = None) -> str:
+        with self._lock:
+            if len(self.roots) == 1:
+                root = self.roots[0]
+            elif self.policy == PER_PLAYLIST and playlist:
+                root = self._pinned(str(playlist))
+            elif self.policy == ROUND_ROBIN:
+                root = self._round_robin()
+            else:
+                root = self._most_free()
+            self._inflight[root] += 1
+            self.placed[root] += 1
+            return root
+
+    def done(self, root: Optional[str], nbytes: int = 0) -> None:
+        """An entry placed on root finished (or failed); nbytes is what it wrote."""
+        with self._lock:
+            if root not in self._inflight:
+                return
+            self._inflight[root] = max(0, self._inflight[root] - 1)
+            if nbytes > 0:
+                self._avg_bytes = nbytes if self._avg_bytes <= 0 else self._avg_bytes + ALPHA * (nbytes - self._avg_bytes)
+
+
+def format_placement_stats(placed: Dict[str, int]) -> str:
+    return "; ".join(f"{root} {n} entries" for root, n in placed.items())
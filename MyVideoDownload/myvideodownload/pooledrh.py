@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import time
+import functools
+import http.client
+import urllib.error
+import urllib.request
+from typing import Callable, Optional
+
+from yt_dlp.networking._urllib import (
+    HTTPHandler,
+    ProxyHandler,
+    RedirectHandler,
+    UrllibRH,
+    _create_http_connection,
+)
+
+from .connpool import POOL, ConnectionPool
+
+# Built on yt-dlp's private urllib names above (pinned by tests/test_connpool.py);
+# connpool falls back to yt-dlp's own handlers when they are missing
+
+
+class _PooledResponse(http.client.HTTPResponse):
+    """Hands its connection back to the pool once the body was read completely."""
+
+    _mvd_release: Optional[Callable[[bool], None]] = None
+    _mvd_trailer_read = False
+
+    def _read_and_discard_trailer(self):
+        super()._read_and_discard_trailer()
+        self._mvd_trailer_read = True
+
+    def _close_conn(self):
+        super()._close_conn()
+        release, self._mvd_release = self._mvd_release, None
+        if release is not None:
+            complete = self._mvd_trailer_read if self.chunked else self.length == 0
+            release(complete and not self.will_close)
+
+
+class _TimedHTTPConnection(http.client.HTTPConnection):
+    response_class = _PooledResponse
+
+    def connect(self):
+        t0 = time.perf_counter()
+        super().connect()
+        POOL.stats.record_connect(self.host, time.perf_counter() - t0, None)
+
+
+class _TimedHTTPSConnection(http.client.HTTPSConnection):
+    response_class = _PooledResponse
+
+    def connect(self):
+        # Same steps as HTTPSConnection.connect, timed separately
+        t0 = time.perf_counter()
+        http.client.HTTPConnection.connect(self)
+        t1 = time.perf_counter()
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=self._tunnel_host or self.host)
+        POOL.stats.record_connect(self.host, t1 - t0, time.perf_counter() - t1)
+
+
+class PooledHTTPHandler(HTTPHandler):
+    """yt-dlp's urllib HTTP handler with keep-alive connections from POOL (proxied requests are not pooled)."""
+
+    def __init__(self, *args, pool: ConnectionPool = POOL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = pool
+
+    @staticmethod
+    def _poolable(req) -> bool:
+        return "Ytdl-socks-proxy" not in req.headers and not req._tunnel_host and not req.has_proxy()
+
+    def http_open(self, req):
+        if not self._poolable(req):
+            return super().http_open(req)
+        return self._pooled_open(_TimedHTTPConnection, req)
+
+    def https_open(self, req):
+        if not self._poolable(req):
+            return super().https_open(req)
+        return self._pooled_open(_TimedHTTPSConnection, req, context=self._context)
+
+    def _pooled_open(self, conn_class, req, **conn_args):
+        host = req.host
+        if not host:
+            raise urllib.error.URLError("no host given")
+        ctx = conn_args.get("context")
+        # TLS connections are shared between YoutubeDL instances with the same verification settings
+        key = (req.type, host, self._source_address, ctx and (ctx.verify_mode, ctx.check_hostname, ctx.options))
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers["Connection"] = "keep-alive"
+        headers = {name.title(): val for name, val in headers.items()}
+        create = functools.partial(_create_http_connection, conn_class, self._source_address)
+        idempotent = req.get_method() in ("GET", "HEAD") and req.data is None
+
+        conn = self._pool.acquire(key)
+        while True:
+            reused = conn is not None
+            if conn is None:
+                conn = create(host, timeout=req.timeout, **conn_args)
+                conn.set_debuglevel(self._debuglevel)
+            elif conn.sock is not None:
+                conn.sock.settimeout(req.timeout)
+            try:
+                try:
+                    conn.request(req.get_method(), req.selector, req.data, headers,
+                                 encode_chunked=req.has_header("Transfer-encoding"))
+                    r = conn.getresponse()
+                except (ConnectionError, http.client.BadStatusLine) as err:
+                    if reused and idempotent:
+                        # Server dropped an idle keep-alive connection just now; retry on a fresh one
+                        conn.close()
+                        self._pool.stats.record_stale()
+                        conn = None
+                        continue
+                    raise urllib.error.URLError(err)
+                except OSError as err:
+                    raise urllib.error.URLError(err)
+            except BaseException:
+                conn.close()
+                raise
+            break
+
+        self._pool.stats.record_request(conn.host, reused)
+        pool = self._pool
+
+        def _release(ok: bool, conn=conn) -> None:
+            if ok and conn.sock is not None:
+                pool.release(key, conn)
+            else:
+                conn.close()
+
+        if r.isclosed():
+            # Nothing to read (e.g. already consumed); the connection is free right away
+            _release(not r.will_close)
+        else:
+            r._mvd_release = _release
+        r.url = req.get_full_url()
+        r.msg = r.reason
+        return r
+
+
+class PooledRH(UrllibRH):
+    """UrllibRH whose HTTP(S) connections come from the shared keep-alive pool."""
+
+    RH_NAME = "pooled"
+
+    def _create_instance(self, proxies, cookiejar, legacy_ssl_support=None):
+        # Same handler chain as UrllibRH, with the pooled HTTP handler
+        opener = urllib.request.OpenerDirector()
+        handlers = [
+            ProxyHandler(proxies),
+            PooledHTTPHandler(
+                debuglevel=int(bool(self.verbose)),
+                context=self._make_sslcontext(legacy_ssl_support=legacy_ssl_support),
+                source_address=self.source_address),
+            urllib.request.HTTPCookieProcessor(cookiejar),
+            urllib.request.DataHandler(),
+            urllib.request.UnknownHandler(),
+            urllib.request.HTTPDefaultErrorHandler(),
+            urllib.request.FTPHandler(),
+            urllib.request.HTTPErrorProcessor(),
+            RedirectHandler(),
+        ]
+        if self.enable_file_urls:
+            handlers.append(urllib.request.FileHandler())
+        for handler in handlers:
+            opener.add_handler(handler)
+        opener.addheaders = []
+        return opener
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_END = object()
+
+Resolver = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+class PrefetchPipeline:
+    """Yields (stub, info) in order while the next depth entries resolve on a thread pool; failures yield None."""
+
+    def __init__(
+        self,
+        resolve: Resolver,
+        entries: Iterable[Dict[str, Any]],
+        depth: int = 3,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.resolve = resolve
+        self.entries = entries
+        self.depth = max(0, int(depth))
+        self._logger = logger or logging.getLogger("myvideodownload")
+        self._cancelled = threading.Event()
+        self._window: Deque[Tuple[Dict[str, Any], Future]] = deque()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        for _, fut in self._window:
+            fut.cancel()
+
+    def ready(self) -> List[Dict[str, Any]]:
+        """Info dicts already resolved inside the look-ahead window (non-blocking)."""
+        out = []
+        for _, fut in list(self._window):
+            if fut.done() and not fut.cancelled() and fut.exception() is None and fut.result():
+                out.append(fut.result())
+        return out
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Entry stubs in the window whose resolution has not finished yet."""
+        return [stub for stub, fut in list(self._window) if not fut.done()]
+
+    def __iter__(self) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        it = iter(self.entries)
+        ex = ThreadPoolExecutor(max_workers=max(1, self.depth), thread_name_prefix="mvd-prefetch")
+
+        def fill(n: int) -> None:
+            while len(self._window) < n and not self._cancelled.is_set():
+                stub = next(it, _END)
+                if stub is _END:
+                    return
+                if not stub:
+                    continue  # entry that failed during listing
+                self._window.append((stub, ex.submit(self.resolve, stub)))
+
+        try:
+            while not self._cancelled.is_set():
+                if not self._window:
+                    fill(1)
+                    if not self._window:
+                        break
+                stub, fut = self._window.popleft()
+                fill(self.depth)  # keep depth entries resolving while the caller works on this one
+                try:
+                    info = fut.result()
+                except Exception as e:
+                    self._logger.error("prefetch failed for %s: %s", stub.get("url") or stub.get("id"), e)
+                    info = None
+                yield stub, info
+        finally:
+            self.cancel()
+            ex.shutdown(wait=False, cancel_futures=True)
+            self._window.clear()
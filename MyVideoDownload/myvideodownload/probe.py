@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Format lists change rarely; re-extract after a week
+CACHE_TTL = 7 * 24 * 3600
+CACHE_MAX_ENTRIES = 20000
+# Bumped when compact_formats keeps different fields; older cache entries are re-extracted
+CACHE_VERSION = 2
+
+Formats = List[Dict[str, Any]]
+
+
+def _codec(name: Optional[str]) -> Optional[str]:
+    if not name or name == "none":
+        return None
+    return name.split(".")[0]
+
+
+def _short(name: Optional[str]) -> Optional[str]:
+    # "none" stays: format selectors tell video-only/audio-only formats by it
+    return name if not name or name == "none" else name.split(".")[0]
+
+
+def compact_formats(info: Dict[str, Any]) -> Formats:
+    """Formats reduced to what the probe needs, audio-only included and without URLs (they expire)."""
+    out = []
+    for f in info.get("formats") or [info]:
+        if f.get("vcodec") == "none" and f.get("acodec") in (None, "none"):
+            continue  # storyboards and other formats without media
+        out.append({
+            "format_id": f.get("format_id"),
+            "height": int(f["height"]) if f.get("height") else None,
+            "vcodec": _short(f.get("vcodec")),
+            "acodec": _short(f.get("acodec")),
+            "ext": f.get("ext"),
+            "protocol": f.get("protocol") or "https",
+            "tbr": f.get("tbr"),
+            "fps": f.get("fps"),
+        })
+    return out
+
+
+def best_height(formats: Formats) -> Optional[int]:
+    return max((f["height"] for f in formats if f.get("height") and f.get("vcodec") != "none"), default=None)
+
+
+def expected_height(ydl, selector, formats: Formats) -> Optional[int]:
+    """Height the download would get: formats sorted and run through selector the way yt-dlp does before a download."""
+    info = {"formats": [dict(f) for f in formats]}  # sorting fills in fields
+    ydl.sort_formats(info)
+    fmts = info["formats"]
+    chosen = list(selector({
+        "formats": fmts,
+        "has_merged_format": any("none" not in (f.get("acodec"), f.get("vcodec")) for f in fmts),
+        "incomplete_formats": all(f.get("vcodec") == "none" for f in fmts) or all(f.get("acodec") == "none" for f in fmts),
+    }))
+    return chosen_height(chosen[-1]) if chosen else None
+
+
+def chosen_height(info: Dict[str, Any]) -> Optional[int]:
+    """Height actually selected for a processed entry (merged video+audio or single file)."""
+    parts = info.get("requested_formats") or [info]
+    return max((int(f["height"]) for f in parts if f.get("height")), default=None)
+
+
+class FormatCache:
+    """Compact format lists per video ID, persisted as one JSON file."""
+
+    def __init__(self, path: str, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._data: Dict[str, Dict[str, Any]] = json.load(f)
+        except Exception:
+            self._data = {}
+
+    def get(self, vid: Optional[str]) -> Optional[Formats]:
+        if not vid:
+            return None
+        with self._lock:
+            entry = self._data.get(str(vid))
+        if not entry or entry.get("v") != CACHE_VERSION or time.time() - entry.get("ts", 0) > self.ttl:
+            return None
+        return entry["formats"]
+
+    def put(self, vid: Optional[str], formats: Formats) -> None:
+        if not vid or not formats:
+            return
+        with self._lock:
+            self._data[str(vid)] = {"ts": time.time(), "v": CACHE_VERSION, "formats": formats}
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            if len(self._data) > self.max_entries:
+                keep = sorted(self._data.items(), key=lambda kv: kv[1].get("ts", 0))[-self.max_entries:]
+                self._data = dict(keep)
+            data = dict(self._data)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+
+
+class ProbeReport:
+    """Distribution of available heights/codecs across probed entries; expected heights follow ydl's format spec."""
+
+    def __init__(self, max_height: int, ydl) -> None:
+        self.max_height = max_height
+        self._ydl = ydl
+        self._selector = ydl.build_format_selector(ydl.params.get("format") or "bestvideo*+bestaudio/best")
+        self.entries = 0
+        self.cached = 0
+        self.failed = 0
+        self.best: Counter = Counter()  # best available height -> entries
+        self.expected: Counter = Counter()  # height the download would get -> entries
+        self.codecs: Counter = Counter()  # video codec -> entries offering it
+        self.below: List[Tuple[str, Optional[int]]] = []  # (title, expected height) under max_height
+
+    def add(self, title: str, formats: Optional[Formats], cached: bool = False) -> None:
+        if not formats or best_height(formats) is None:  # no video height to report
+            self.failed += 1
+            return
+        self.entries += 1
+        self.cached += int(cached)
+        self.best[best_height(formats)] += 1
+        exp = expected_height(self._ydl, self._selector, formats)
+        self.expected[exp] += 1
+        for c in {_codec(f.get("vcodec")) for f in formats} - {None}:
+            self.codecs[c] += 1
+        if exp is not None and exp < self.max_height:
+            self.below.append((title, exp))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "max_height": self.max_height,
+            "entries": self.entries,
+            "cached": self.cached,
+            "failed": self.failed,
+            "best": dict(self.best),
+            "expected": dict(self.expected),
+            "codecs": dict(self.codecs),
+            "below": list(self.below),
+        }
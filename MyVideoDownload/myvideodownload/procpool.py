@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import logging
+import queue
+import time
+import multiprocessing as mp
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .connpool import install as install_pool
+from .diskspace import DiskSpaceMonitor, iter_video_entries
+from .probe import best_height, chosen_height, compact_formats
+from .placement import use_root
+from .profiling import NULL_PROFILER
+from .retry import RetryEngine, RetryGaveUp, classify
+from .routes import ROUTE_FAILURES, install as install_routes, use_route
+from .scheduler import job_label
+
+# Progress events per pool process are rate limited to this interval (seconds)
+PROGRESS_INTERVAL = 0.25
+
+Event = Tuple[Any, ...]
+
+
+def picklable(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy without callables (hooks, logger, post-extractors) that cannot cross a process boundary."""
+    out = {}
+    for k, v in params.items():
+        if k == "logger" or callable(v):
+            continue
+        if isinstance(v, (list, tuple)) and any(callable(x) for x in v):
+            continue
+        out[k] = v
+    return out
+
+
+class _Emitter:
+    """Signal look-alike: emit() puts (kind, *args) on the event queue."""
+
+    def __init__(self, events, kind: str) -> None:
+        self._events = events
+        self._kind = kind
+
+    def emit(self, *args) -> None:
+        self._events.put((self._kind,) + args)
+
+
+class _QueueLogger:
+    """yt-dlp logger for pool processes; records are re-logged by the parent."""
+
+    def __init__(self, events) -> None:
+        self._events = events
+
+    def debug(self, msg: str) -> None:
+        # yt-dlp routes normal output through debug(); keep only non-debug lines
+        if not msg.startswith("[debug] "):
+            self.info(msg)
+
+    def info(self, msg: str, *args) -> None:
+        self._events.put(("log", logging.INFO, msg % args if args else msg))
+
+    def warning(self, msg: str, *args) -> None:
+        self._events.put(("log", logging.WARNING, msg % args if args else msg))
+
+    def error(self, msg: str, *args) -> None:
+        self._events.put(("log", logging.ERROR, msg % args if args else msg))
+
+
+class _EntryContext:
+    """Stands in for DownloadWorker inside a pool process; signals become events on the shared queue."""
+
+    def __init__(self, settings: Dict[str, Any], events, stop) -> None:
+        self.mode = settings["mode"]
+        self.root_dir = settings["root_dir"]
+        self.work_dir = settings.get("work_dir")
+        min_free = settings["min_free_bytes"]
+        self._space = DiskSpaceMonitor(self.work_dir or self.root_dir, min_free)
+        self._dest_space = DiskSpaceMonitor(self.root_dir, min_free) if self.work_dir else None
+        self._root_space = {self.root_dir: self._dest_space or self._space}
+        self._entry_root = self.root_dir
+        self.placed: list = []
+        self._prof = NULL_PROFILER
+        self._logger = _QueueLogger(events)
+        self.progress = _Emitter(events, "progress")
+        self.file_done = _Emitter(events, "file_done")
+        self.paused = _Emitter(events, "paused")
+        self.format_chosen = _Emitter(events, "format_chosen")
+        self._sync_done: set = set()
+        self._audio_done: set = set()
+        self._stop_event = stop
+        self._retry = RetryEngine(lambda: self._stop, self._logger)
+        self._last_progress = 0.0
+        self._entry_bytes = 0
+        self.ydl = None
+
+    @property
+    def _stop(self) -> bool:
+        return self._stop_event.is_set()
+
+    def _placed(self, record: Dict[str, Any]) -> None:
+        # The parent owns the placement index; records go back in the result
+        self.placed.append(record)
+
+    def hook(self, d: Dict[str, Any]) -> None:
+        if self._stop:
+            raise KeyboardInterrupt("Cancelled by user")
+        status = d.get("status")
+        title = d.get("info_dict", {}).get("title") or d.get("filename") or ""
+        if status == "downloading":
+            self._space.check(on_pause=self.paused.emit, should_stop=lambda: self._stop)
+            now = time.monotonic()
+            if now - self._last_progress < PROGRESS_INTERVAL:
+                return
+            self._last_progress = now
+            try:
+                percent = float((d.get("_percent_str") or "0%").strip().strip("%"))
+            except Exception:
+                percent = 0.0
+            self.progress.emit(percent, d.get("_speed_str") or "", d.get("_eta_str") or "", title)
+        elif status == "finished":
+            if d.get("elapsed") is not None:
+                self._entry_bytes += int(d.get("total_bytes") or d.get("downloaded_bytes") or 0)
+            self.progress.emit(100.0, "", "", title)
+            fn = d.get("filename")
+            # With a work dir, file_done is emitted after the move to root_dir
+            if fn and not self.work_dir:
+                self.file_done.emit(fn)
+
+
+_ctx: Optional[_EntryContext] = None
+
+
+def _init(opts: Dict[str, Any], settings: Dict[str, Any], events, stop) -> None:
+    """Pool process initializer: one YoutubeDL per process, reused for every entry."""
+    global _ctx
+    from .downloader import (
+        DownloadWorker, _DiskSpacePP, _MoveToRootPP, _PlacedPP, _SyncSeenPP, _install_audio_copy, _install_shared_archive,
+        _new_ydl,
+    )
+    from .placement import archive_path, load_archive_ids
+    from .distqueue import open_queue
+    from .segmented import install as install_segmented
+    from .parallelstreams import install as install_parallel_streams
+
+    ctx = _EntryContext(settings, events, stop)
+    opts = dict(opts, progress_hooks=[ctx.hook], logger=ctx._logger)
+    ydl = _new_ydl(opts)
+    install_pool(ydl)
+    ydl.add_post_processor(_DiskSpacePP(ctx), when="before_dl")
+    if ctx.work_dir:
+        ydl.add_post_processor(_MoveToRootPP(ctx), when="after_move")
+    # Collects IDs that went through every postprocessor, i.e. were fully downloaded
+    ydl.add_post_processor(_SyncSeenPP(ctx), when="after_move")
+    ydl.add_post_processor(_PlacedPP(ctx), when="after_move")
+    if settings.get("other_roots") and ydl.params.get("download_archive"):
+        ydl.archive.update(load_archive_ids(archive_path(r) for r in settings["other_roots"]))
+    if settings.get("segmented"):
+        install_segmented(ydl)
+    if settings.get("parallel_streams"):
+        install_parallel_streams(ydl)
+    if settings.get("routes"):
+        install_routes(ydl)
+    if settings.get("shared_queue"):
+        # Own connection per process; claims and completions stay with the parent
+        _install_shared_archive(ydl, open_queue(settings["shared_queue"]))
+    if settings.get("audio_target"):
+        _install_audio_copy(ydl, ctx, DownloadWorker._ffmpeg_caps(), settings["audio_target"])
+    ctx.ydl = ydl
+    _ctx = ctx
+
+
+def run_entry(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract and download one playlist entry inside a pool process."""
+    ctx = _ctx
+    ydl = ctx.ydl
+    result = {"index": job["index"], "seen": False, "cancelled": False, "error": None, "failed_routes": []}
+    wall, cpu = time.perf_counter(), time.process_time()
+    if ctx._stop:
+        result["cancelled"] = True
+        return result
+    ctx._sync_done.clear()
+    ctx._audio_done.clear()
+    ctx.placed = []
+    if job.get("root"):
+        use_root(ydl, ctx, job["root"])
+    extra = None
+    if job["extra"] is not None:
+        extra = dict(job["extra"], playlist_index=job["index"], playlist_autonumber=job["index"])
+    videos: list = []
+    # Route health stays with the parent; failed and finishing routes go back in the result
+    routes = [job.get("route")] + list(job.get("fallback_routes") or [])
+    result["route"] = routes[0]
+    use_route(ydl, routes[0])
+    if ydl.in_download_archive(job["stub"]):
+        result["seen"] = True  # downloaded before (maybe before sync tracked the URL); nothing to extract
+        return result
+
+    def attempt(_n: int) -> None:
+        ctx._entry_bytes = 0
+        result["start"] = time.monotonic()
+        try:
+            run_attempt()
+        except Exception as e:
+            if classify(e) in ROUTE_FAILURES:
+                # Like the in-thread path: the next attempt goes out on another member
+                result["failed_routes"].append(result["route"])
+                result["route"] = routes[(routes.index(result["route"]) + 1) % len(routes)]
+                use_route(ydl, result["route"])
+            raise
+
+    def run_attempt() -> None:
+        from .downloader import _keep_existing
+        # Every attempt extracts again, so a retry gets fresh media URLs
+        info = ydl.process_ie_result(dict(job["stub"]), download=False, extra_info=extra)
+        videos[:] = iter_video_entries(info)
+        for entry in videos:
+            if ctx._stop:
+                raise KeyboardInterrupt("Cancelled by user")
+            if ctx.mode != "mp3":
+                title = entry.get("title") or entry.get("id") or ""
+                ctx.format_chosen.emit(title, chosen_height(entry) or 0, best_height(compact_formats(entry)) or 0)
+            if not _keep_existing(ydl, ctx, entry):
+                ydl.process_ie_result(ydl.sanitize_info(entry, True), download=True)
+
+    try:
+        ctx._retry.call(attempt, job_label(job))
+    except KeyboardInterrupt:
+        result["cancelled"] = True
+        return result
+    except RetryGaveUp as e:
+        result["error"] = e.message
+        result["error_class"] = e.error_class
+    finally:
+        result["retry"] = ctx._retry.take_stats()
+        result["bytes"] = ctx._entry_bytes
+        result["seconds"] = time.monotonic() - result.pop("start", time.monotonic())
+        result["placed"] = ctx.placed
+        # Whole entry, all threads; the parent's profiler shows it as pool:entry
+        result["wall"] = time.perf_counter() - wall
+        result["cpu"] = time.process_time() - cpu
+    result["seen"] = bool(videos) and all(
+        str(v.get("id")) in ctx._sync_done or ydl.in_download_archive(v) for v in videos
+    )
+    return result
+
+
+class EntryProcessPool:
+    """Runs entries on a process pool, relaying their events to on_event; results come in completion order."""
+
+    def __init__(
+        self,
+        opts: Dict[str, Any],
+        settings: Dict[str, Any],
+        processes: int = 2,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.opts = picklable(opts)
+        self.settings = settings
+        self.processes = max(1, int(processes))
+        self._logger = logger or logging.getLogger("myvideodownload")
+        # spawn everywhere: forking a process that runs Qt threads is unsafe
+        self._mp = mp.get_context("spawn")
+        self._events = self._mp.Queue()
+        self._stop = self._mp.Event()
+
+    def cancel(self) -> None:
+        self._stop.set()
+
+    def _drain(self, on_event: Callable[[Event], None]) -> None:
+        try:
+            while True:
+                on_event(self._events.get_nowait())
+        except queue.Empty:
+            pass
+
+    def _executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=self._mp,
+            initializer=_init,
+            initargs=(self.opts, self.settings, self._events, self._stop),
+        )
+
+    def run(
+        self, jobs: Iterable[Dict[str, Any]], on_event: Callable[[Event], None]
+    ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Yield (job, result) per entry; an entry whose process crashed comes back with an error."""
+        it = iter(jobs)
+        ex = self._executor()
+        running: Dict[Future, Dict[str, Any]] = {}
+        try:
+            while True:
+                # Keep one queued entry per process so none idles between entries
+                while len(running) < 2 * self.processes and not self._stop.is_set():
+                    job = next(it, None)
+                    if job is None:
+                        break
+                    job_arg = dict(job, stub=picklable(job["stub"]))
+                    try:
+                        fut = ex.submit(run_entry, job_arg)
+                    except BrokenProcessPool:
+                        # A crashed process breaks the whole executor; entries in it fail, the rest get a new one
+                        ex.shutdown(wait=False, cancel_futures=True)
+                        ex = self._executor()
+                        fut = ex.submit(run_entry, job_arg)
+                    running[fut] = job
+                if not running:
+                    break
+                done, _ = wait(list(running), timeout=0.1, return_when=FIRST_COMPLETED)
+                self._drain(on_event)
+                for fut in done:
+                    job = running.pop(fut)
+                    try:
+                        result = fut.result()
+                    except Exception as e:
+                        # Not a download failure the retry engine saw: the process crashed or the job did not pickle
+                        label = job_label(job)
+                        self._logger.error("pool entry failed for %s: %s", label, e)
+                        result = {
+                            "index": job["index"], "seen": False, "cancelled": False,
+                            "error": f"{label}: {e or type(e).__name__}", "failed_routes": [],
+                        }
+                    yield job, result
+        finally:
+            self._stop.set()
+            ex.shutdown(wait=True, cancel_futures=True)
+            self._drain(on_event)
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import os
+import sys
+import glob
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional, Dict, List
+
+PROFILE_ENV = "MYVIDEODOWNLOAD_PROFILE"
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _short_path(filename: str) -> str:
+    # Last two path components keep stacks readable but unambiguous (logging/__init__.py)
+    head, tail = os.path.split(filename)
+    return f"{os.path.basename(head)}/{tail}" if head else tail
+
+
+class PipelineProfiler:
+    """Per-phase wall/CPU accounting and a stack sampler for the owner thread and attached helper threads."""
+
+    def __init__(self, sample_interval: float = 0.05, max_depth: int = 40, max_stacks: int = 5000) -> None:
+        self.sample_interval = sample_interval
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self.wall: Dict[str, float] = {}
+        self.cpu: Dict[str, float] = {}
+        self.count: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._owner: Optional[int] = None
+        self._current: Optional[str] = None
+        self._t_wall = 0.0
+        self._t_cpu = 0.0
+        self._started = 0.0
+        self._elapsed = 0.0
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_evt = threading.Event()
+        self._lock = threading.Lock()
+        self._helpers: Dict[int, str] = {}  # thread id -> phase while attached
+
+    # --- lifecycle ---
+    def start(self, phase: str = "other") -> None:
+        self._owner = threading.get_ident()
+        self._started = time.perf_counter()
+        self._current = None
+        self.switch(phase)
+        self._stop_evt.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="mvd-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        if self._owner is None:
+            return
+        self._charge()
+        self._current = None
+        self._elapsed = time.perf_counter() - self._started
+        self._stop_evt.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1.0)
+        self._owner = None
+
+    # --- phases ---
+    def switch(self, phase: str) -> None:
+        if threading.get_ident() != self._owner or phase == self._current:
+            return
+        self._charge()
+        self._current = phase
+        self.count[phase] += 1
+
+    @contextmanager
+    def phase(self, name: str):
+        prev = self._current
+        self.switch(name)
+        try:
+            yield
+        finally:
+            if prev is not None:
+                self.switch(prev)
+
+    @contextmanager
+    def attach(self, phase: str):
+        """Charge the calling helper thread's time inside the block to phase."""
+        tid = threading.get_ident()
+        if self._owner is None or tid == self._owner:
+            yield
+            return
+        with self._lock:
+            self._helpers[tid] = phase
+        w0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            with self._lock:
+                del self._helpers[tid]
+            self.add(phase, time.perf_counter() - w0, time.thread_time() - c0)
+
+    def add(self, phase: str, wall: float, cpu: float = 0.0) -> None:
+        with self._lock:
+            self.wall[phase] = self.wall.get(phase, 0.0) + wall
+            self.cpu[phase] = self.cpu.get(phase, 0.0) + cpu
+            self.count[phase] += 1
+
+    def _charge(self) -> None:
+        now_wall = time.perf_counter()
+        now_cpu = time.thread_time()
+        if self._current is not None:
+            with self._lock:
+                self.wall[self._current] = self.wall.get(self._current, 0.0) + (now_wall - self._t_wall)
+                self.cpu[self._current] = self.cpu.get(self._current, 0.0) + (now_cpu - self._t_cpu)
+        self._t_wall = now_wall
+        self._t_cpu = now_cpu
+
+    # --- sampling ---
+    def _sample_loop(self) -> None:
+        owner = self._owner
+        while not self._stop_evt.wait(self.sample_interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = [(owner, self._current or "other")] + list(self._helpers.items())
+            for tid, phase in threads:
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+                parts: List[str] = []
+                while frame is not None and len(parts) < self.max_depth:
+                    code = frame.f_code
+                    parts.append(f"{_short_path(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                key = ";".join([f"[{phase}]"] + parts[::-1])
+                if key not in self.stacks and len(self.stacks) >= self.max_stacks:
+                    key = "[overflow]"
+                self.stacks[key] += 1
+                self.samples += 1
+
+    def _self_counts(self) -> Counter:
+        own: Counter = Counter()
+        for key, n in self.stacks.items():
+            own[key.rsplit(";", 1)[-1]] += n
+        return own
+
+    def _share(self, needle: str) -> float:
+        if not self.samples:
+            return 0.0
+        hit = sum(n for k, n in self.stacks.items() if needle in k)
+        return 100.0 * hit / self.samples
+
+    # --- reporting ---
+    def summary_lines(self, title: str = "") -> List[str]:
+        # Helper rows overlap the owner's, so shares are of elapsed time and may add up past 100%
+        total = self._elapsed or sum(self.wall.values()) or 1e-9
+        lines = []
+        if title:
+            lines.append(title)
+        lines.append(f"Elapsed: {self._elapsed:.2f}s, samples: {self.samples} @ {self.sample_interval * 1000:.0f} ms")
+        lines.append("")
+        lines.append(f"{'phase':<18}{'wall s':>10}{'wall %':>8}{'cpu s':>10}{'switches':>10}")
+        for name, w in sorted(self.wall.items(), key=lambda kv: -kv[1]):
+            lines.append(
+                f"{name:<18}{w:>10.3f}{100.0 * w / total:>8.1f}{self.cpu.get(name, 0.0):>10.3f}{self.count[name]:>10}"
+            )
+        lines.append("")
+        lines.append(f"Samples inside logging: {self._share('logging/__init__.py'):.1f}%")
+        lines.append(f"Samples inside progress hook: {self._share(':_hook'):.1f}%")
+        lines.append("")
+        lines.append("Top functions (self samples):")
+        for fn, n in self._self_counts().most_common(25):
+            lines.append(f"  {n:>7}  {100.0 * n / max(1, self.samples):5.1f}%  {fn}")
+        return lines
+
+    def write_report(self, report_dir: str, title: str = "", keep: int = 20) -> Optional[str]:
+        """Write profile-<timestamp>.txt (+ .folded for flame graphs); prune old reports."""
+        try:
+            os.makedirs(report_dir, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            base = os.path.join(report_dir, f"profile-{stamp}")
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write("\n".join(self.summary_lines(title)) + "\n")
+            with open(base + ".folded", "w", encoding="utf-8") as f:
+                for key, n in self.stacks.most_common():
+                    f.write(f"{key} {n}\n")
+            old = sorted(glob.glob(os.path.join(report_dir, "profile-*.txt")))[:-keep]
+            for p in old:
+                for ext in (".txt", ".folded"):
+                    try:
+                        os.remove(p[: -len(".txt")] + ext)
+                    except OSError:
+                        pass
+            return base + ".txt"
+        except Exception:
+            return None
+
+
+class _NullProfiler:
+    """Stand-in used when profiling is off; every call is a no-op."""
+
+    def start(self, phase: str = "other") -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def switch(self, phase: str) -> None:
+        pass
+
+    @contextmanager
+    def phase(self, name: str):
+        yield
+
+    @contextmanager
+    def attach(self, phase: str):
+        yield
+
+    def add(self, phase: str, wall: float, cpu: float = 0.0) -> None:
+        pass
+
+    def write_report(self, report_dir: str, title: str = "", keep: int = 20) -> Optional[str]:
+        return None
+
+
+NULL_PROFILER = _NullProfiler()
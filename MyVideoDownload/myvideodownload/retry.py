@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import time
+import random
+import socket
+import logging
+import threading
+import http.client
+import urllib.error
+from typing import Callable, Dict, Iterator, Optional, TypeVar
+
+from yt_dlp.utils import ContentTooShortError, GeoRestrictedError, UnsupportedError
+from yt_dlp.networking.exceptions import HTTPError, TransportError
+
+T = TypeVar("T")
+
+# Failure classes
+THROTTLED = "throttled"  # 429 / rate limited: back off long
+FORBIDDEN = "forbidden"  # 403: expired media URL or blocked client; re-extract, then try another client
+NETWORK = "network"  # timeouts, resets, 5xx: transient
+GEO = "geo"
+AUTH = "auth"  # sign-in, age gate, members only: needs cookies, not time
+UNAVAILABLE = "unavailable"  # private, removed, no formats: permanent
+OTHER = "other"
+
+
+# Classes no other node or later attempt can fix (GEO and AUTH may work from another address or cookie jar)
+PERMANENT = (UNAVAILABLE,)
+
+
+class RetryPolicy:
+    def __init__(self, attempts: int, base: float = 0.0, cap: float = 0.0) -> None:
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+
+
+# Only throttling, 403 and network errors are retried; the rest fail on the first attempt
+POLICIES: Dict[str, RetryPolicy] = {
+    THROTTLED: RetryPolicy(5, base=10.0, cap=180.0),
+    FORBIDDEN: RetryPolicy(3, base=2.0, cap=20.0),
+    NETWORK: RetryPolicy(5, base=2.0, cap=60.0),
+    GEO: RetryPolicy(1),
+    AUTH: RetryPolicy(1),
+    UNAVAILABLE: RetryPolicy(1),
+    OTHER: RetryPolicy(1),
+}
+
+# yt-dlp's own request-level retries while the engine wraps every entry: enough for a
+# dropped connection, short enough that the engine's per-class backoff decides the rest
+INNER_RETRIES = 2
+INNER_FRAGMENT_RETRIES = 3
+
+# Exception types that settle the class, checked after the HTTP status and before any text
+_TYPES = (
+    (UNAVAILABLE, (UnsupportedError,)),
+    (NETWORK, (TransportError, ContentTooShortError, ConnectionError, TimeoutError, socket.timeout,
+               http.client.IncompleteRead, urllib.error.URLError)),
+)
+
+# Last resort for errors that only carry a message (extractor errors)
+_PATTERNS = (
+    (GEO, ("in your country", "geo restrict", "geo-restrict")),
+    # Before AUTH: "Private video. Sign in if you've been granted access" is permanent for us
+    (UNAVAILABLE, ("private video", "video unavailable", "has been removed", "no longer available",
+                   "does not exist", "is not available", "account associated with this video has been terminated",
+                   "copyright", "no video formats", "requested format is not available", "unsupported url",
+                   "http error 404", "http error 410")),
+    (AUTH, ("sign in", "login required", "log in", "cookies", "members-only", "members only",
+            "join this channel", "confirm your age", "age-restricted", "premium")),
+    (THROTTLED, ("http error 429", "too many requests", "rate limit", "rate-limit", "try again later")),
+    (FORBIDDEN, ("http error 403", "forbidden")),
+    (NETWORK, ("http error 50", "timed out", "timeout", "connection reset", "connection aborted",
+               "connection refused", "temporary failure", "network is unreachable", "unable to download",
+               "incomplete", "remote end closed", "eof occurred", "ssl")),
+)
+
+
+def _chain(err: BaseException) -> Iterator[BaseException]:
+    """The exception and whatever it wraps (yt-dlp exc_info/cause, __cause__, __context__)."""
+    seen = set()
+    stack = [err]
+    while stack:
+        e = stack.pop(0)
+        if e is None or id(e) in seen:
+            continue
+        seen.add(id(e))
+        yield e
+        exc_info = getattr(e, "exc_info", None)
+        if isinstance(exc_info, tuple) and len(exc_info) > 1:
+            stack.append(exc_info[1])
+        cause = getattr(e, "cause", None)
+        if isinstance(cause, BaseException):
+            stack.append(cause)
+        stack.extend([e.__cause__, e.__context__])
+
+
+def _status(e: BaseException) -> Optional[int]:
+    if isinstance(e, HTTPError):
+        return e.status
+    if isinstance(e, urllib.error.HTTPError):
+        return e.code
+    return None
+
+
+def classify(err: BaseException) -> str:
+    """Failure class of a yt-dlp error: exception types and HTTP status first, message text last."""
+    chain = list(_chain(err))
+    for e in chain:
+        if isinstance(e, GeoRestrictedError):
+            return GEO
+    for e in chain:
+        status = _status(e)
+        if status == 429:
+            return THROTTLED
+        if status == 403:
+            return FORBIDDEN
+        if status == 401:
+            return AUTH
+        if status in (404, 410):
+            return UNAVAILABLE
+        if status is not None and status >= 500:
+            return NETWORK
+    for cls, types in _TYPES:
+        if any(isinstance(e, types) for e in chain):
+            return cls
+    # Messages can quote URLs and titles ("403", "timed out"), so text only decides untyped errors
+    text = " ".join(str(e) for e in chain).lower()
+    for cls, needles in _PATTERNS:
+        if any(n in text for n in needles):
+            return cls
+    return OTHER
+
+
+def retry_after(err: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header on a 429/503 response, if the server sent one."""
+    for e in _chain(err):
+        headers = getattr(getattr(e, "response", None), "headers", None) or getattr(e, "headers", None)
+        if not headers:
+            continue
+        try:
+            value = headers.get("Retry-After")
+            return float(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def backoff_delay(n: int, base: float, cap: float, rng: Callable[[], float] = random.random) -> float:
+    """Exponential backoff with jitter: between half and all of min(cap, base * 2**n)."""
+    ceiling = min(cap, base * (2 ** max(0, n)))
+    return ceiling * (0.5 + rng() / 2)
+
+
+class RetryGaveUp(Exception):
+    """Raised by RetryEngine.call when an error is permanent or retries ran out."""
+
+    def __init__(self, error_class: str, label: str, error: BaseException, attempts: int) -> None:
+        super().__init__(str(error))
+        self.error_class = error_class
+        self.label = label
+        self.error = error
+        self.attempts = attempts
+
+    @property
+    def message(self) -> str:
+        msg = str(self.error)
+        return msg[len("ERROR: "):] if msg.startswith("ERROR: ") else msg
+
+
+class RetryEngine:
+    """Retries an operation only for failure classes worth another try, with backoff and per-class counters (one per job)."""
+
+    def __init__(
+        self,
+        should_stop: Callable[[], bool] = lambda: False,
+        logger: Optional[logging.Logger] = None,
+        policies: Optional[Dict[str, RetryPolicy]] = None,
+    ) -> None:
+        self.should_stop = should_stop
+        self.policies = policies or POLICIES
+        self._logger = logger or logging.getLogger("myvideodownload")
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, cls: str, key: str, n: int = 1) -> None:
+        with self._lock:
+            c = self.stats.setdefault(cls, {"failed": 0, "retried": 0, "recovered": 0, "gave_up": 0})
+            c[key] += n
+
+    def merge(self, stats: Dict[str, Dict[str, int]]) -> None:
+        for cls, counts in (stats or {}).items():
+            for key, n in counts.items():
+                self._count(cls, key, n)
+
+    def take_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+    def gave_up(self, *classes: str) -> int:
+        with self._lock:
+            return sum(self.stats.get(c, {}).get("gave_up", 0) for c in classes)
+
+    def _sleep(self, seconds: float) -> None:
+        end = time.monotonic() + seconds
+        while True:
+            if self.should_stop():
+                raise KeyboardInterrupt("Cancelled by user")
+            left = end - time.monotonic()
+            if left <= 0:
+                return
+            time.sleep(min(0.2, left))
+
+    def call(self, fn: Callable[[int], T], label: str = "") -> T:
+        """fn(attempt) with attempt starting at 1; raises RetryGaveUp on a final failure."""
+        attempt = 1
+        last_cls = None
+        while True:
+            try:
+                result = fn(attempt)
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                cls = classify(e)
+                self._count(cls, "failed")
+                policy = self.policies.get(cls, self.policies[OTHER])
+                if attempt >= policy.attempts or self.should_stop():
+                    self._count(cls, "gave_up")
+                    self._logger.warning("%s: giving up after %d attempt(s) [%s]: %s", label, attempt, cls, e)
+                    raise RetryGaveUp(cls, label, e, attempt) from e
+                delay = retry_after(e) if cls == THROTTLED else None
+                if delay is None:
+                    delay = backoff_delay(attempt - 1, policy.base, policy.cap)
+                delay = min(delay, policy.cap)
+                self._count(cls, "retried")
+                self._logger.info("%s: %s error, retry %d/%d in %.1f s: %s", label, cls, attempt, policy.attempts - 1, delay, e)
+                self._sleep(delay)
+                attempt += 1
+                last_cls = cls
+                continue
+            if last_cls is not None:
+                self._count(last_cls, "recovered")
+                self._logger.info("%s: recovered after %d attempts", label, attempt)
+            return result
+
+
+def format_retry_stats(stats: Dict[str, Dict[str, int]]) -> str:
+    if not stats:
+        return "no failures"
+    return "; ".join(
+        f"{cls} {c['failed']} failed/{c['retried']} retried/{c['recovered']} recovered/{c['gave_up']} gave up"
+        for cls, c in sorted(stats.items())
+    )
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import time
+import logging
+import ipaddress
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from yt_dlp.utils.networking import clean_proxies
+
+from .connpool import build_director
+from .retry import FORBIDDEN, NETWORK, THROTTLED
+
+# Failure classes that say something about the connection identity (not about the video)
+ROUTE_FAILURES = (THROTTLED, FORBIDDEN, NETWORK)
+# Pool member that uses the machine's default address and no proxy
+DIRECT = "direct"
+# Weight of the newest outcome in the moving averages
+ALPHA = 0.3
+# Outcomes a member needs before its health is judged
+MIN_SAMPLES = 3
+# Quarantine above this (moving average) share of failed entries...
+MAX_ERROR_RATE = 0.5
+# ...or below this fraction of the best member's throughput (a throttled identity)
+SLOW_FRACTION = 0.25
+# First quarantine; it doubles each time the same member is quarantined again
+QUARANTINE_SECONDS = 120.0
+MAX_QUARANTINE_SECONDS = 30 * 60.0
+# Downloads smaller than this say little about throughput
+MIN_SAMPLE_BYTES = 1024 * 1024
+
+
+class Route:
+    """One connection identity: a proxy URL, a local source address or DIRECT."""
+
+    def __init__(self, spec: str) -> None:
+        self.spec = spec
+        self.proxy: Optional[str] = None
+        self.source: Optional[str] = None
+        if "://" in spec:
+            self.proxy = spec
+        elif spec != DIRECT:
+            self.source = str(ipaddress.ip_address(spec))  # ValueError for anything else
+        self.entries = 0
+        self.failures = 0
+        self.samples = 0
+        self.error_rate = 0.0
+        self.throughput = 0.0  # bytes/s, moving average over downloads of MIN_SAMPLE_BYTES or more
+        self.quarantined_until = 0.0
+        self.strikes = 0  # consecutive quarantines
+        self.current = 0.0  # smooth weighted round-robin state
+
+
+def parse_routes(text: str) -> List[str]:
+    """Comma/whitespace separated pool members as typed in the UI or on the command line."""
+    return [s for s in text.replace(",", " ").split() if s]
+
+
+def invalid_route(specs: Iterable[str]) -> Optional[str]:
+    """First member that is neither a proxy URL, an IP address nor DIRECT."""
+    for spec in specs:
+        try:
+            Route(spec)
+        except ValueError:
+            return spec
+    return None
+
+
+class RoutePool:
+    """Weighted round-robin over proxies / source addresses by health (throughput x success rate), quarantining bad ones."""
+
+    def __init__(
+        self,
+        specs: Iterable[str],
+        logger: Optional[logging.Logger] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.routes: Dict[str, Route] = {}
+        for spec in specs:
+            if spec not in self.routes:
+                self.routes[spec] = Route(spec)
+        if not self.routes:
+            self.routes[DIRECT] = Route(DIRECT)
+        self._logger = logger or logging.getLogger("myvideodownload")
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def _weights(self, members: List[Route]) -> Dict[str, float]:
+        scores = {r.spec: r.throughput * (1.0 - r.error_rate) for r in members if r.throughput > 0}
+        best = max(scores.values(), default=0.0)
+        if best <= 0:
+            return {r.spec: 1.0 for r in members}
+        avg = sum(scores.values()) / len(scores)
+        return {r.spec: max(0.05, scores.get(r.spec, avg) / best) for r in members}
+
+    def acquire(self) -> str:
+        with self._lock:
+            now = self._clock()
+            members = [r for r in self.routes.values() if r.quarantined_until <= now]
+            if not members:
+                return min(self.routes.values(), key=lambda r: r.quarantined_until).spec
+            weights = self._weights(members)
+            total = sum(weights.values())
+            for r in members:
+                r.current += weights[r.spec]
+            chosen = max(members, key=lambda r: r.current)
+            chosen.current -= total
+            return chosen.spec
+
+    def alternatives(self, spec: Optional[str]) -> List[str]:
+        """Members other than spec that are not quarantined, healthiest first (fallbacks for a job away from this pool)."""
+        with self._lock:
+            now = self._clock()
+            members = [r for r in self.routes.values() if r.quarantined_until <= now and r.spec != spec]
+            weights = self._weights(members) if members else {}
+            return [r.spec for r in sorted(members, key=lambda r: -weights[r.spec])]
+
+    def report(self, spec: Optional[str], ok: bool, nbytes: int = 0, seconds: float = 0.0) -> None:
+        """Outcome of one entry (or failed attempt) on a member; may quarantine it."""
+        with self._lock:
+            r = self.routes.get(spec or "")
+            if r is None:
+                return
+            r.entries += 1
+            r.samples += 1
+            if not ok:
+                r.failures += 1
+            r.error_rate += ALPHA * ((0.0 if ok else 1.0) - r.error_rate)
+            if ok and nbytes >= MIN_SAMPLE_BYTES and seconds > 0:
+                rate = nbytes / seconds
+                r.throughput = rate if r.throughput <= 0 else r.throughput + ALPHA * (rate - r.throughput)
+            if ok and r.error_rate < MAX_ERROR_RATE:
+                r.strikes = 0
+            self._judge(r)
+
+    def _judge(self, r: Route) -> None:
+        if r.samples < MIN_SAMPLES or r.quarantined_until > self._clock() or len(self.routes) < 2:
+            return
+        reason = None
+        if r.error_rate > MAX_ERROR_RATE:
+            reason = f"{r.error_rate:.0%} of entries failing"
+        else:
+            best = max(o.throughput for o in self.routes.values())
+            if r.throughput > 0 and r.throughput < SLOW_FRACTION * best:
+                reason = f"{r.throughput / 1e6:.2f} MB/s vs {best / 1e6:.2f} MB/s best"
+        if reason is None:
+            return
+        seconds = min(MAX_QUARANTINE_SECONDS, QUARANTINE_SECONDS * 2 ** r.strikes)
+        r.strikes += 1
+        r.quarantined_until = self._clock() + seconds
+        # Judged afresh after the quarantine
+        r.samples = 0
+        r.error_rate = 0.0
+        r.throughput = 0.0
+        r.current = 0.0
+        self._logger.warning("route %s quarantined for %d s: %s", r.spec, seconds, reason)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            now = self._clock()
+            return [
+                {
+                    "route": r.spec,
+                    "entries": r.entries,
+                    "failures": r.failures,
+                    "throughput": r.throughput,
+                    "quarantined": max(0.0, r.quarantined_until - now),
+                }
+                for r in self.routes.values()
+            ]
+
+
+def format_route_stats(stats: List[Dict[str, Any]]) -> str:
+    return "; ".join(
+        f"{s['route']} {s['entries']} entries/{s['failures']} failed/{s['throughput'] / 1e6:.2f} MB/s"
+        + (f"/quarantined {s['quarantined']:.0f} s" if s["quarantined"] else "")
+        for s in stats
+    )
+
+
+class _RoutedDirector:
+    """Stands in for YoutubeDL._request_director: requests go out through the current route's own director."""
+
+    def __init__(self, ydl) -> None:
+        self._ydl = ydl
+        self._default = ydl._request_director
+        self._directors: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.route: Optional[str] = None
+
+    def _director(self):
+        spec = self.route
+        if not spec or spec == DIRECT:
+            return self._default
+        with self._lock:
+            director = self._directors.get(spec)
+            if director is None:
+                route = Route(spec)
+                director = build_director(self._ydl)
+                proxies = {"all": route.proxy} if route.proxy else None
+                if proxies:
+                    clean_proxies(proxies, {})
+                for rh in director.handlers.values():
+                    # Handlers create their connections lazily, so these apply to all of them
+                    if proxies:
+                        rh.proxies = dict(proxies)
+                    if route.source:
+                        rh.source_address = route.source
+                self._directors[spec] = director
+            return director
+
+    def send(self, request):
+        return self._director().send(request)
+
+    def close(self) -> None:
+        with self._lock:
+            directors, self._directors = list(self._directors.values()), {}
+        for d in directors:
+            d.close()
+        self._default.close()
+
+    def __getattr__(self, name):
+        # handlers, preferences, ... of the default route (yt-dlp reads them for error messages)
+        return getattr(self._default, name)
+
+
+def install(ydl) -> None:
+    """Let use_route() switch this YoutubeDL's connection identity between entries."""
+    if not isinstance(ydl.__dict__.get("_request_director"), _RoutedDirector):
+        # _request_director is a cached_property: the instance attribute replaces it
+        ydl.__dict__["_request_director"] = _RoutedDirector(ydl)
+
+
+def use_route(ydl, spec: Optional[str]) -> None:
+    director = ydl.__dict__.get("_request_director")
+    if isinstance(director, _RoutedDirector):
+        director.route = spec
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Examples kept in memory for the summary dialog; everything else is only counted
+SAMPLES = 10
+
+
+class RunStats:
+    """One run's summary counts and first examples; every skip record is spilled to a JSON-lines file."""
+
+    def __init__(self, max_height: int = 0, spill_path: Optional[str] = None) -> None:
+        self.max_height = int(max_height or 0)
+        self.spill_path = spill_path
+        self.completed = 0
+        self.skipped = 0
+        self.skipped_samples: List[Dict[str, Any]] = []
+        self.heights: Counter = Counter()
+        self.lower = 0  # entries that got less than max_height
+        self.lower_samples: List[Tuple[str, int, int]] = []
+        self._spill = None
+        if spill_path:
+            try:
+                self._spill = open(spill_path, "w", encoding="utf-8")
+            except OSError:
+                self._spill = None
+
+    def add_completed(self) -> None:
+        self.completed += 1
+
+    def add_skipped(self, record: Dict[str, Any]) -> None:
+        self.skipped += 1
+        if len(self.skipped_samples) < SAMPLES:
+            self.skipped_samples.append(record)
+        if self._spill is not None:
+            try:
+                self._spill.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._spill.flush()
+            except (OSError, ValueError):
+                pass
+
+    def add_height(self, title: str, height: int, best: int) -> None:
+        self.heights[height] += 1
+        if height and height < self.max_height:
+            self.lower += 1
+            if len(self.lower_samples) < SAMPLES:
+                self.lower_samples.append((title, height, best))
+
+    def close(self) -> None:
+        if self._spill is not None:
+            try:
+                self._spill.close()
+            except OSError:
+                pass
+            self._spill = None
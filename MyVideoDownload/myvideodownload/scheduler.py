@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import itertools
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# playlist: listing order; shortest: most finished entries early; largest: biggest first (throughput)
+POLICIES = ("playlist", "shortest", "largest")
+
+# Entries held per streamed source; topped up when half of them are taken
+STREAM_BUFFER = 50
+
+
+def job_key(job: Dict[str, Any]) -> str:
+    return f"{job['source']}:{job['index']}"
+
+
+def job_label(job: Dict[str, Any]) -> str:
+    stub = job["stub"]
+    return stub.get("title") or stub.get("url") or stub.get("id") or job_key(job)
+
+
+def _size_hint(stub: Dict[str, Any]) -> Optional[float]:
+    # Flat stubs rarely carry sizes; duration is the best proxy for bytes
+    return stub.get("filesize") or stub.get("filesize_approx") or stub.get("duration")
+
+
+def _order_key(policy: str, job: Dict[str, Any]) -> Tuple:
+    stub = job["stub"]
+    if policy == "shortest":
+        d = stub.get("duration")
+        return (d is None, d or 0, job["index"])
+    if policy == "largest":
+        s = _size_hint(stub)
+        return (s is None, -(s or 0), job["index"])
+    return (job["index"],)
+
+
+class EntryScheduler:
+    """Picks the next pending entry (thread-safe): pinned first, then sources round-robin, each in policy order."""
+
+    def __init__(self, policy: str = "playlist") -> None:
+        self.policy = policy if policy in POLICIES else "playlist"
+        self._lock = threading.Lock()
+        self._sources: Dict[int, Deque[Dict[str, Any]]] = {}
+        self._turns: Deque[int] = deque()
+        self._pinned: Deque[str] = deque()
+        self._by_key: Dict[str, Dict[str, Any]] = {}
+        self._streams: Dict[int, Iterator[Dict[str, Any]]] = {}
+        self._next_source = 0
+        self.version = 0  # bumped on every change; lets the UI skip redundant refreshes
+
+    def add_source(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        with self._lock:
+            source = self._next_source
+            self._next_source += 1
+            jobs = sorted((dict(j, source=source) for j in jobs), key=lambda j: _order_key(self.policy, j))
+            self._sources[source] = deque(jobs)
+            self._turns.append(source)
+            for j in jobs:
+                self._by_key[job_key(j)] = j
+            self.version += 1
+            return source
+
+    def add_stream(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        """Like add_source, but entries are pulled from jobs only as pop() needs them."""
+        source = self.add_source([])
+        with self._lock:
+            self._streams[source] = iter(jobs)
+        return source
+
+    def _refill(self) -> None:
+        # Outside the lock: pulling may fetch the next playlist page. Only pop()'s thread gets here.
+        with self._lock:
+            low = [s for s, it in self._streams.items() if len(self._sources[s]) <= STREAM_BUFFER // 2]
+        for source in low:
+            with self._lock:
+                it = self._streams[source]
+                need = STREAM_BUFFER - len(self._sources[source])
+            batch = list(itertools.islice(it, need))
+            with self._lock:
+                jobs = sorted((dict(j, source=source) for j in batch), key=lambda j: _order_key(self.policy, j))
+                self._sources[source].extend(jobs)
+                for j in jobs:
+                    self._by_key[job_key(j)] = j
+                if len(batch) < need:
+                    del self._streams[source]  # listing exhausted
+                    self._drop_if_done(source)
+                if jobs:
+                    self.version += 1
+
+    @property
+    def streaming(self) -> bool:
+        """True while a streamed source may still yield entries beyond those pending."""
+        with self._lock:
+            return bool(self._streams)
+
+    def set_policy(self, policy: str) -> None:
+        if policy not in POLICIES:
+            return
+        with self._lock:
+            self.policy = policy
+            for source, jobs in self._sources.items():
+                self._sources[source] = deque(sorted(jobs, key=lambda j: _order_key(policy, j)))
+            self.version += 1
+
+    def pin(self, key: str) -> None:
+        with self._lock:
+            if key in self._by_key and key not in self._pinned:
+                self._pinned.append(key)
+                self.version += 1
+
+    def move(self, key: str, delta: int) -> None:
+        """Move a pending entry up (delta < 0) or down inside its source."""
+        with self._lock:
+            job = self._by_key.get(key)
+            if job is None:
+                return
+            if key in self._pinned:
+                lst: Deque[Any] = self._pinned
+                item: Any = key
+            else:
+                lst = self._sources[job["source"]]
+                item = job
+            i = lst.index(item)
+            j = max(0, min(len(lst) - 1, i + delta))
+            if i != j:
+                del lst[i]
+                lst.insert(j, item)
+                self.version += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._by_key)
+
+    def pop(self) -> Optional[Dict[str, Any]]:
+        if self._streams:
+            self._refill()
+        with self._lock:
+            job = self._take()
+            if job is not None:
+                self.version += 1
+            return job
+
+    def pending(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Pending entries in the order pop() would return them, walking only about limit steps."""
+        with self._lock:
+            out = [self._by_key[k] for k in itertools.islice(self._pinned, limit)]
+            pinned = set(self._pinned)  # still in their sources until taken
+            turns = deque((s, iter(self._sources[s])) for s in self._turns)
+            while turns and (limit is None or len(out) < limit):
+                source, it = turns.popleft()
+                job = next((j for j in it if job_key(j) not in pinned), None)
+                if job is not None:
+                    out.append(job)
+                    turns.append((source, it))
+            return out
+
+    def _take(self) -> Optional[Dict[str, Any]]:
+        if self._pinned:
+            job = self._by_key[self._pinned.popleft()]
+            self._sources[job["source"]].remove(job)
+        else:
+            job = None
+            for _ in range(len(self._turns)):
+                source = self._turns[0]
+                self._turns.rotate(-1)  # this source goes to the back of the line
+                if self._sources[source]:
+                    job = self._sources[source].popleft()
+                    break
+            if job is None:
+                return None
+        del self._by_key[job_key(job)]
+        self._drop_if_done(job["source"])
+        return job
+
+    def _drop_if_done(self, source: int) -> None:
+        # An empty source with nothing left to stream no longer takes turns
+        if not self._sources[source] and source not in self._streams:
+            del self._sources[source]
+            self._turns.remove(source)
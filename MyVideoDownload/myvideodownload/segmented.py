@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import os
+import re
+import math
+from typing import Any, Dict, List, Optional
+
+from yt_dlp.downloader import get_suitable_downloader
+from yt_dlp.downloader.fragment import FragmentFD
+from yt_dlp.downloader.http import HttpFD
+from yt_dlp.networking import Request
+from yt_dlp.utils import determine_protocol
+
+MiB = 1024 * 1024
+# Smaller files are not worth the probe request and the extra connections
+MIN_SEGMENTED_SIZE = 4 * MiB
+MIN_SEGMENT = 1 * MiB
+# Also the ceiling YouTube tolerates per request before throttling (its own http_chunk_size)
+MAX_SEGMENT = 10 * MiB
+
+
+def segment_size(total: int, connections: int, cap: int = MAX_SEGMENT) -> int:
+    """About two segments per connection, so a slow range does not leave the others idle at the end."""
+    return max(MIN_SEGMENT, min(cap, math.ceil(total / max(1, 2 * connections))))
+
+
+def byte_ranges(total: int, size: int) -> List[Dict[str, int]]:
+    return [{"start": s, "end": min(s + size, total)} for s in range(0, total, size)]
+
+
+class SegmentedHttpFD(FragmentFD):
+    """Progressive HTTP download fetched as byte ranges on several connections through yt-dlp's fragment machinery."""
+
+    FD_NAME = "segmented"
+
+    def _plain(self, filename: str, info_dict: Dict[str, Any]):
+        fd = HttpFD(self.ydl, self.params)
+        for ph in self._progress_hooks:
+            fd.add_progress_hook(ph)
+        return fd.real_download(filename, info_dict)
+
+    def _probe_length(self, info_dict: Dict[str, Any]) -> Optional[int]:
+        """Total size from a 1-byte range request; None when ranges are not honoured."""
+        headers = dict(info_dict.get("http_headers") or {}, Range="bytes=0-0")
+        try:
+            with self.ydl.urlopen(Request(info_dict["url"], headers=headers)) as r:
+                r.read()
+                content_range = r.headers.get("Content-Range") or ""
+                if r.status != 206:
+                    return None
+        except Exception as e:
+            self.write_debug(f"range probe failed: {e}")
+            return None
+        m = re.match(r"bytes 0-0/(\d+)", content_range)
+        return int(m.group(1)) if m else None
+
+    def real_download(self, filename, info_dict):
+        tmpfilename = self.temp_name(filename)
+        if os.path.exists(tmpfilename) and not os.path.exists(self.ytdl_filename(filename)):
+            # A .part from a single-stream download: HttpFD resumes it byte-exact
+            return self._plain(filename, info_dict)
+        total = self._probe_length(info_dict)
+        if not total or total < MIN_SEGMENTED_SIZE:
+            return self._plain(filename, info_dict)
+
+        connections = max(1, int(self.params.get("concurrent_fragment_downloads") or 1))
+        chunk = (info_dict.get("downloader_options") or {}).get("http_chunk_size") or self.params.get("http_chunk_size")
+        size = segment_size(total, connections, min(MAX_SEGMENT, chunk) if chunk else MAX_SEGMENT)
+        ranges = byte_ranges(total, size)
+        info_dict = dict(info_dict, filesize=total)
+        ctx = {"filename": filename, "total_frags": len(ranges)}
+        self._prepare_and_start_frag_download(ctx, info_dict)
+        # Segments are already no larger than http_chunk_size; HttpFD's chunking
+        # inside a Range request miscounts the range end and never finishes
+        ctx["dl"].params["http_chunk_size"] = 0
+        fragments = [
+            {"frag_index": i, "index": i - 1, "url": info_dict["url"], "byte_range": rng}
+            for i, rng in enumerate(ranges, 1)
+            if i > ctx["fragment_index"]  # ranges already appended in an earlier run
+        ]
+        # Every range is part of the file: none may be skipped
+        return self.download_and_append_fragments(ctx, fragments, info_dict, is_fatal=lambda _: True)
+
+
+def segmentable(info: Dict[str, Any], params: Dict[str, Any]) -> bool:
+    if (info.get("protocol") or determine_protocol(info)) not in ("http", "https") or info.get("is_live"):
+        return False
+    if int(params.get("concurrent_fragment_downloads") or 1) < 2 or params.get("ratelimit"):
+        return False
+    hint = info.get("filesize") or info.get("filesize_approx")
+    if hint and hint < MIN_SEGMENTED_SIZE:
+        return False
+    # Respect external downloaders and yt-dlp's own special cases (sections, stdout)
+    return get_suitable_downloader(info, params, to_stdout=False) is HttpFD
+
+
+def install(ydl) -> None:
+    """Route this YoutubeDL's progressive HTTP downloads through SegmentedHttpFD."""
+    original = ydl.dl
+
+    def dl(name, info, subtitle=False, test=False):
+        if test or subtitle or name == "-" or not segmentable(info, ydl.params):
+            return original(name, info, subtitle, test)
+        fd = SegmentedHttpFD(ydl, ydl.params)
+        for ph in ydl._progress_hooks:
+            fd.add_progress_hook(ph)
+        # Same preparation as YoutubeDL.dl
+        new_info = ydl._copy_infodict(info)
+        if new_info.get("http_headers") is None:
+            new_info["http_headers"] = ydl._calc_headers(new_info)
+        return fd.download(name, new_info, subtitle)
+
+    ydl.dl = dl
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import threading
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, List, Set, Tuple
+
+# Stop walking a newest-first listing after this many consecutive known IDs
+KNOWN_STREAK_STOP = 3
+
+
+def is_newest_first(url: str) -> bool:
+    """Channels/uploads tabs list newest first; explicit playlists (list=) append at the end."""
+    return "list=" not in (url or "")
+
+
+def iter_new_entries(
+    entries: Iterable[Optional[Dict[str, Any]]],
+    known: Set[str],
+    newest_first: bool = True,
+    stop_after: int = KNOWN_STREAK_STOP,
+    archived: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (position, stub) for entries not in known (or archived); a newest-first listing stops after stop_after known in a row."""
+    streak = 0
+    for i, e in enumerate(entries, 1):
+        if not e:
+            continue
+        vid = str(e.get("id") or e.get("url") or "")
+        if vid and (vid in known or (archived is not None and archived(e))):
+            streak += 1
+            if newest_first and streak >= stop_after:
+                return
+            continue
+        streak = 0
+        yield i, e
+
+
+class SyncStore:
+    """Per-URL sync state and subscriptions in one JSON file ({"playlists": {url: {"ids", "title", "last_sync", ...}}})."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                data.setdefault("playlists", {})
+                return data
+        except Exception:
+            pass
+        return {"playlists": {}}
+
+    def save(self) -> None:
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._data, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except Exception:
+                pass
+
+    def _entry(self, url: str) -> Dict[str, Any]:
+        return self._data["playlists"].setdefault(url, {"ids": []})
+
+    # --- seen IDs ---
+    def known(self, url: str) -> Set[str]:
+        with self._lock:
+            return set(self._data["playlists"].get(url, {}).get("ids", []))
+
+    def mark_seen(self, url: str, ids: Iterable[str]) -> None:
+        with self._lock:
+            entry = self._entry(url)
+            have = set(entry["ids"])
+            entry["ids"].extend(i for i in ids if i and i not in have and not have.add(i))
+
+    def finish(self, url: str, title: Optional[str] = None) -> None:
+        with self._lock:
+            entry = self._entry(url)
+            entry["last_sync"] = time.time()
+            if title:
+                entry["title"] = title
+        self.save()
+
+    # --- subscriptions ---
+    def subscribe(self, url: str, interval_min: int, mode: str, root: str, max_height: int) -> None:
+        with self._lock:
+            entry = self._entry(url)
+            entry.update(interval_min=int(interval_min), mode=mode, root=root, max_height=int(max_height))
+        self.save()
+
+    def unsubscribe(self, url: str) -> None:
+        with self._lock:
+            self._data["playlists"].get(url, {}).pop("interval_min", None)
+        self.save()
+
+    def subscriptions(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                dict(v, url=k, ids=None)
+                for k, v in self._data["playlists"].items()
+                if v.get("interval_min")
+            ]
+
+    def due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        now = time.time() if now is None else now
+        return [
+            s for s in self.subscriptions()
+            if now - float(s.get("last_sync") or 0) >= 60 * int(s["interval_min"])
+        ]
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import os
+import sys
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Tuple
+
+from PySide6.QtCore import QThread, Signal
+
+from .ffmpegcaps import FFmpegCaps
+
+VIDEO_EXTS = (".mp4", ".mkv", ".webm", ".mov")
+TARGETS = ("mp3", "m4a")
+
+TMP_SUFFIX = ".transcoding"
+
+
+def codec_steps(target: str, caps: FFmpegCaps) -> List[List[str]]:
+    """ffmpeg codec arguments to try in order, cheapest first; empty if the build cannot do it."""
+    if target == "mp3":
+        return [["-c:a", "libmp3lame", "-b:a", "320k", "-f", "mp3"]] if caps.can_mp3 else []
+    # Downloads here carry AAC audio, so a stream copy usually works and takes no CPU
+    steps = [["-c:a", "copy", "-f", "ipod"]]
+    if caps.aac_encoder:
+        steps.append(["-c:a", caps.aac_encoder, "-b:a", "256k", "-f", "ipod"])
+    return steps
+
+
+def iter_sources(root: str) -> Iterator[str]:
+    """Video files under root, skipping hidden names and unfinished downloads."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in sorted(filenames):
+            if name.startswith(".") or not name.lower().endswith(VIDEO_EXTS):
+                continue
+            yield os.path.join(dirpath, name)
+
+
+def output_path(src: str, src_root: str, out_root: str, target: str) -> str:
+    """Same relative location under out_root, with the target extension."""
+    rel = os.path.relpath(os.path.abspath(src), os.path.abspath(src_root))
+    return os.path.join(out_root, os.path.splitext(rel)[0] + "." + target)
+
+
+def is_up_to_date(src: str, dst: str) -> bool:
+    try:
+        d = os.stat(dst)
+        return d.st_size > 0 and d.st_mtime >= os.stat(src).st_mtime
+    except OSError:
+        return False
+
+
+class BatchTranscoder:
+    """Converts video files to audio, one single-threaded ffmpeg per core; up-to-date outputs are skipped."""
+
+    def __init__(
+        self,
+        caps: FFmpegCaps,
+        target: str = "mp3",
+        jobs: Optional[int] = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        if target not in TARGETS:
+            raise ValueError(f"unsupported target: {target}")
+        self.steps = codec_steps(target, caps)
+        if not self.steps:
+            raise ValueError(f"this ffmpeg build cannot encode {target}")
+        self.ffmpeg = caps.path
+        self.target = target
+        self.jobs = max(1, int(jobs or os.cpu_count() or 1))
+        self._logger = logger or logging.getLogger("myvideodownload")
+        self._cancelled = threading.Event()
+        self._procs_lock = threading.Lock()
+        self._procs: set = set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        with self._procs_lock:
+            for p in list(self._procs):
+                try:
+                    p.terminate()
+                except Exception:
+                    pass
+
+    def plan(self, src_root: str, out_root: Optional[str] = None) -> Tuple[List[Tuple[str, str]], int]:
+        """(src, dst) pairs still to convert, and the number already up to date."""
+        out_root = out_root or src_root
+        todo, fresh = [], 0
+        for src in iter_sources(src_root):
+            dst = output_path(src, src_root, out_root, self.target)
+            if is_up_to_date(src, dst):
+                fresh += 1
+            else:
+                todo.append((src, dst))
+        return todo, fresh
+
+    def _ffmpeg(self, src: str, tmp: str, codec_args: List[str]) -> Tuple[int, str]:
+        cmd = [
+            self.ffmpeg, "-hide_banner", "-nostdin", "-loglevel", "error", "-y",
+            "-i", src, "-map", "0:a:0", "-vn", "-map_metadata", "0", "-threads", "1",
+        ] + codec_args + [tmp]
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        p = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, **kwargs)
+        with self._procs_lock:
+            self._procs.add(p)
+        try:
+            _, err = p.communicate()
+        finally:
+            with self._procs_lock:
+                self._procs.discard(p)
+        return p.returncode, err.decode("utf-8", "replace").strip()
+
+    def convert(self, src: str, dst: str) -> Optional[str]:
+        """Convert one file; returns None on success, else the error text."""
+        if self._cancelled.is_set():
+            return "cancelled"
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        tmp = dst + TMP_SUFFIX
+        err = ""
+        try:
+            for args in self.steps:
+                rc, err = self._ffmpeg(src, tmp, args)
+                if self._cancelled.is_set():
+                    return "cancelled"
+                if rc == 0 and os.path.getsize(tmp) > 0:
+                    os.replace(tmp, dst)
+                    return None
+            return err or "ffmpeg failed"
+        except OSError as e:
+            return str(e)
+        finally:
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    def run(self, pairs: List[Tuple[str, str]]) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """Yields (src, dst, error) in completion order."""
+        with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="mvd-transcode") as ex:
+            futures = {ex.submit(self.convert, src, dst): (src, dst) for src, dst in pairs}
+            try:
+                for fut in as_completed(futures):
+                    src, dst = futures[fut]
+                    yield src, dst, fut.result()
+            finally:
+                self.cancel()
+
+
+class TranscodeWorker(QThread):
+    progress = Signal(int, int, str)  # done, total, file name
+    file_done = Signal(str)  # output path
+    failed = Signal(str)  # "name: error" for a file that could not be converted
+    finished = Signal(bool, str)  # success, summary or error message
+
+    def __init__(self, src_root: str, target: str = "mp3", out_root: Optional[str] = None,
+                 jobs: Optional[int] = None, parent=None) -> None:
+        super().__init__(parent)
+        self.src_root = src_root
+        self.out_root = out_root or src_root
+        self.target = target
+        self.jobs = jobs
+        self._logger = logging.getLogger("myvideodownload")
+        self._engine: Optional[BatchTranscoder] = None
+        self._stop = False
+
+    def stop(self) -> None:
+        self._stop = True
+        if self._engine is not None:
+            self._engine.cancel()
+
+    def run(self) -> None:
+        from .downloader import DownloadWorker
+
+        try:
+            caps = DownloadWorker._ffmpeg_caps()
+            if caps is None:
+                self.finished.emit(False, "ffmpeg bulunamadı")
+                return
+            self._engine = engine = BatchTranscoder(caps, self.target, self.jobs, self._logger)
+            if self._stop:
+                engine.cancel()
+            pairs, fresh = engine.plan(self.src_root, self.out_root)
+            self._logger.info(
+                "transcode %s -> %s (%s): %d to convert, %d up to date, %d jobs",
+                self.src_root, self.out_root, self.target, len(pairs), fresh, engine.jobs,
+            )
+            done = errors = 0
+            for src, dst, err in engine.run(pairs):
+                if err == "cancelled":
+                    continue
+                done += 1
+                if err:
+                    errors += 1
+                    self._logger.warning("transcode failed for %s: %s", src, err)
+                    self.failed.emit(f"{os.path.basename(src)}: {err.splitlines()[-1]}")
+                else:
+                    self.file_done.emit(dst)
+                self.progress.emit(done, len(pairs), os.path.basename(src))
+            if self._stop:
+                self.finished.emit(False, "Cancelled by user")
+                return
+            self.finished.emit(
+                errors == 0,
+                f"{done - errors} dönüştürüldü, {fresh} zaten güncel, {errors} hata",
+            )
+        except Exception as e:
+            self._logger.exception("transcode failed")
+            self.finished.emit(False, str(e))
@@ -4,8 +4,10 @@ import os
 from typing import Optional
 import sys
 
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QIcon, QBrush, QColor, QAction
+import time
+
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QIcon, QAction
 from PySide6.QtWidgets import (
     QApplication,
     QButtonGroup,
@@ -15,6 +17,7 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QListView,
     QListWidget,
     QListWidgetItem,
     QMainWindow,
@@ -23,12 +26,21 @@ from PySide6.QtWidgets import (
     QPushButton,
     QProgressBar,
     QRadioButton,
+    QSpinBox,
     QVBoxLayout,
     QWidget,
 )
 
 import tempfile
-from .downloader import DownloadWorker
+from .downloader import MULTI_MODE, DownloadWorker
+from .history import EventLog, HistoryModel
+from .cookies import BROWSERS, CookieManager
+from .sync import SyncStore
+from .scheduler import job_key, job_label
+from .transcode import TranscodeWorker
+from .runstats import RunStats
+from .routes import invalid_route, parse_routes
+from .placement import MOST_FREE, PER_PLAYLIST, ROUND_ROBIN, parse_roots
 from . import __app_name__, __version__
 
 
@@ -63,12 +75,16 @@ class MainWindow(QMainWindow):
         self.mode_group = QButtonGroup(self)
         rb_video = QRadioButton("Video (MP4)")
         rb_audio = QRadioButton("Ses (MP3)")
+        rb_both = QRadioButton("Video + Ses (MP4 + MP3)")
+        rb_both.setToolTip("Tek indirmeden hem MP4 hem de yanına MP3 kopyası üretir")
         rb_video.setChecked(True)
         self.mode_group.addButton(rb_video, 1)
         self.mode_group.addButton(rb_audio, 2)
+        self.mode_group.addButton(rb_both, 3)
         row = QHBoxLayout()
         row.addWidget(rb_video)
         row.addWidget(rb_audio)
+        row.addWidget(rb_both)
         row.addStretch(1)
         main.addLayout(row)
 
@@ -83,6 +99,13 @@ class MainWindow(QMainWindow):
         idx = max(0, self.maxres_combo.findData(1080))
         self.maxres_combo.setCurrentIndex(idx)
         res_row.addWidget(self.maxres_combo)
+        # Worker processes for playlists (extraction + download off the GUI process)
+        res_row.addWidget(QLabel("Paralel İşlem:"))
+        self.proc_spin = QSpinBox()
+        self.proc_spin.setRange(0, max(1, os.cpu_count() or 1))
+        self.proc_spin.setSpecialValueText("Kapalı")
+        self.proc_spin.setToolTip("Liste öğeleri bu kadar ayrı süreçte çözülür ve indirilir (çok çekirdekli makinelerde büyük listeler için)")
+        res_row.addWidget(self.proc_spin)
         res_row.addStretch(1)
         main.addLayout(res_row)
 
@@ -90,23 +113,97 @@ class MainWindow(QMainWindow):
         folder_row = QHBoxLayout()
         folder_row.addWidget(QLabel("Kayıt Klasörü:"))
         self.root_edit = QLineEdit(DEFAULT_ROOT)
+        self.root_edit.setToolTip("Birden fazla klasör ';' ile ayrılır (ör. ayrı diskler); öğeler yerleşim kuralına göre dağıtılır")
         btn_browse = QPushButton("Gözat")
+        btn_add_root = QPushButton("Ekle")
+        btn_add_root.setToolTip("Başka bir kayıt klasörü ekle")
+        self.placement_combo = QComboBox()
+        for label, policy in [("Sırayla", ROUND_ROBIN), ("En boş disk", MOST_FREE), ("Liste başına sabit", PER_PLAYLIST)]:
+            self.placement_combo.addItem(label, policy)
+        self.placement_combo.setToolTip("Birden fazla kayıt klasörü varken her öğenin hangisine yazılacağı")
         folder_row.addWidget(self.root_edit)
         folder_row.addWidget(btn_browse)
+        folder_row.addWidget(btn_add_root)
+        folder_row.addWidget(self.placement_combo)
         main.addLayout(folder_row)
 
+        # Work folder (optional): .part files and merges go here, finished files are moved to root
+        work_row = QHBoxLayout()
+        work_row.addWidget(QLabel("Çalışma Klasörü:"))
+        self.work_edit = QLineEdit()
+        self.work_edit.setPlaceholderText("İsteğe bağlı: hızlı yerel disk (boşsa doğrudan kayıt klasörü)")
+        btn_browse_work = QPushButton("Gözat")
+        work_row.addWidget(self.work_edit)
+        work_row.addWidget(btn_browse_work)
+        main.addLayout(work_row)
+
+        # Connection pool (optional): entries take turns on these proxies / local addresses
+        routes_row = QHBoxLayout()
+        routes_row.addWidget(QLabel("Bağlantı Havuzu:"))
+        self.routes_edit = QLineEdit()
+        self.routes_edit.setPlaceholderText("İsteğe bağlı: proxy veya yerel IP, virgülle (http://host:3128, socks5://host:1080, 192.168.1.20, direct)")
+        self.routes_edit.setToolTip("Öğeler sırayla bu bağlantılara dağıtılır; yavaşlayan veya hata veren üye bir süre devre dışı kalır")
+        routes_row.addWidget(self.routes_edit)
+        main.addLayout(routes_row)
+
+        # Sync: download only entries added since the last run of this URL, optionally on a schedule
+        sync_row = QHBoxLayout()
+        self.chk_sync = QCheckBox("Senkronize et (yalnızca yeni öğeler)")
+        self.chk_sync.setToolTip("Liste/kanal için daha önce görülen öğeler atlanır, yalnızca yeni eklenenler indirilir")
+        self.sync_interval_combo = QComboBox()
+        for label, minutes in [("Tek sefer", 0), ("Saatlik", 60), ("6 saatte bir", 360), ("Günlük", 1440), ("Haftalık", 10080)]:
+            self.sync_interval_combo.addItem(label, minutes)
+        self.sync_interval_combo.setToolTip("Zamanlanmış senkronizasyon uygulama açıkken çalışır")
+        sync_row.addWidget(self.chk_sync)
+        sync_row.addWidget(QLabel("Tekrar:"))
+        sync_row.addWidget(self.sync_interval_combo)
+        self.chk_streaming = QCheckBox("Akışlı liste")
+        self.chk_streaming.setToolTip("Çok büyük kanal/listeler sayfa sayfa okunur ve öğeler geldikçe indirilir; bellek kullanımı sabit kalır")
+        sync_row.addWidget(self.chk_streaming)
+        sync_row.addStretch(1)
+        main.addLayout(sync_row)
+
         # Recent list
         main.addWidget(QLabel("İşlemler:"))
-        self.recent_list = QListWidget()
+        # Model-backed so huge playlists stay cheap; older rows live only in history.jsonl
+        history_log = EventLog(os.path.join(os.path.dirname(DownloadWorker.get_log_path()), "history.jsonl"))
+        self.recent_model = HistoryModel(max_rows=500, event_log=history_log, parent=self)
+        self.recent_list = QListView()
+        self.recent_list.setModel(self.recent_model)
+        self.recent_list.setUniformItemSizes(True)
         self.recent_list.setAlternatingRowColors(True)
         main.addWidget(self.recent_list)
 
         # Skipped list
         main.addWidget(QLabel("Atlananlar:"))
-        self.skipped_list = QListWidget()
+        self.skipped_model = HistoryModel(max_rows=10, parent=self)
+        self.skipped_list = QListView()
+        self.skipped_list.setModel(self.skipped_model)
+        self.skipped_list.setUniformItemSizes(True)
         self.skipped_list.setAlternatingRowColors(True)
         main.addWidget(self.skipped_list)
 
+        # Pending entries of the running job (pinned first, then one per queued link in turn)
+        main.addWidget(QLabel("Bekleyenler:"))
+        self.pending_list = QListWidget()
+        self.pending_list.setMaximumHeight(120)
+        main.addWidget(self.pending_list)
+        queue_row = QHBoxLayout()
+        self.btn_pin = QPushButton("Öne Al")
+        self.btn_up = QPushButton("Yukarı")
+        self.btn_down = QPushButton("Aşağı")
+        for b in (self.btn_pin, self.btn_up, self.btn_down):
+            b.setObjectName("btnSecondary")
+            queue_row.addWidget(b)
+        queue_row.addWidget(QLabel("Sıralama:"))
+        self.order_combo = QComboBox()
+        for label, policy in [("Liste sırası", "playlist"), ("Önce kısa", "shortest"), ("Önce büyük", "largest")]:
+            self.order_combo.addItem(label, policy)
+        self.order_combo.setToolTip("Önce kısa: erken daha çok dosya biter; önce büyük: toplam hız için")
+        queue_row.addWidget(self.order_combo)
+        queue_row.addStretch(1)
+        main.addLayout(queue_row)
+
         # Progress
         self.progress = QProgressBar()
         self.progress.setRange(0, 100)
@@ -151,26 +248,63 @@ class MainWindow(QMainWindow):
         self.btn_cookies = QPushButton("cookies.txt Yükle")
         self.btn_cookies_auto = QPushButton("Tarayıcıdan Cookies Al")
         self.btn_open_log = QPushButton("Logu Aç")
+        self.btn_probe = QPushButton("Çözünürlükleri Tara")
+        self.btn_probe.setToolTip("İndirmeden önce listedeki videoların sunduğu çözünürlükleri ve kodekleri raporlar")
         # Style IDs for utility buttons
         self.btn_cookies.setObjectName("btnSecondary")
         self.btn_cookies_auto.setObjectName("btnSecondary")
         self.btn_open_log.setObjectName("btnSecondary")
+        self.btn_probe.setObjectName("btnSecondary")
+        self.btn_transcode = QPushButton("Kütüphaneyi Dönüştür")
+        self.btn_transcode.setToolTip("Klasördeki videoların ses kopyasını (MP3/M4A) tüm çekirdeklerde yerel olarak üretir")
+        self.btn_transcode.setObjectName("btnSecondary")
         cookies_row.addWidget(self.btn_cookies)
         cookies_row.addWidget(self.btn_cookies_auto)
         cookies_row.addWidget(self.btn_open_log)
+        cookies_row.addWidget(self.btn_probe)
+        cookies_row.addWidget(self.btn_transcode)
         cookies_row.addStretch(1)
         main.addLayout(cookies_row)
 
         # State
         self.worker: Optional[DownloadWorker] = None
-        self._run_stats = {"completed": 0, "skipped": []}  # list of dicts: {id, reason, raw}
+        self.transcoder: Optional[TranscodeWorker] = None  # library conversion, runs beside downloads
+        self._active_id: Optional[int] = None  # history entry of the running job
+        self._run_stats = RunStats()  # counts plus a few examples; all skip records go to a file
         self._last_params: Optional[dict] = None  # for resume
+        self._scheduled = False  # current job was started by the sync timer (no dialogs)
+        # Subscriptions: due ones are synced whenever no job is running
+        self.sync_store = SyncStore(DownloadWorker.get_sync_path())
+        self._sync_tried: dict = {}  # url -> monotonic time of the last scheduled attempt
+        self._sync_timer = QTimer(self)
+        self._sync_timer.setInterval(60 * 1000)
+        self._sync_timer.timeout.connect(self._run_due_syncs)
+        self._sync_timer.start()
+        # Links added while a job with another mode/folder runs; started one by one afterwards
+        self._url_queue: list = []
+        self._pending_version = None
+        self._pending_timer = QTimer(self)
+        self._pending_timer.setInterval(1000)
+        self._pending_timer.timeout.connect(self._refresh_pending)
+        self._pending_timer.start()
+        # Browser cookies: extracted once, cached as cookies.txt and refreshed in the background
+        app_dir = os.path.dirname(os.path.dirname(DownloadWorker.get_log_path()))
+        self.cookie_mgr = CookieManager(os.path.join(app_dir, "cookies"), parent=self)
+        self.cookie_mgr.refreshed.connect(self._on_cookies_refreshed)
+        cached = self.cookie_mgr.cookie_file()
+        if cached:
+            self.cookies_path = cached
+            self.cookies_browser = self.cookie_mgr.browser
+            self.cookie_mgr.refresh_if_stale()
         self.btn_stop.setEnabled(False)
         self.btn_resume.setEnabled(False)
 
         # Connects
         btn_browse.clicked.connect(self._choose_root)
+        btn_add_root.clicked.connect(self._add_root)
+        btn_browse_work.clicked.connect(self._choose_work_dir)
         self.btn_download.clicked.connect(self._start_download)
+        self.url_edit.returnPressed.connect(self._start_download)
         self.btn_stop.clicked.connect(self._stop_download)
         self.btn_resume.clicked.connect(self._resume_download)
         self.btn_clear.clicked.connect(self._clear)
@@ -178,15 +312,34 @@ class MainWindow(QMainWindow):
         self.btn_cookies.clicked.connect(self._choose_cookies)
         self.btn_cookies_auto.clicked.connect(self._import_cookies_from_browser)
         self.btn_open_log.clicked.connect(self._open_log)
+        self.btn_probe.clicked.connect(self._start_probe)
+        self.btn_transcode.clicked.connect(self._start_transcode)
+        self.btn_pin.clicked.connect(self._pin_pending)
+        self.btn_up.clicked.connect(lambda: self._move_pending(-1))
+        self.btn_down.clicked.connect(lambda: self._move_pending(1))
+        self.order_combo.currentIndexChanged.connect(self._on_order_changed)
 
         # Apply UI styles
         self._apply_styles()
 
+    def _roots(self) -> list:
+        return parse_roots(self.root_edit.text()) or [DEFAULT_ROOT]
+
     def _choose_root(self):
-        d = QFileDialog.getExistingDirectory(self, "Klasör Seç", self.root_edit.text() or DEFAULT_ROOT)
+        d = QFileDialog.getExistingDirectory(self, "Klasör Seç", self._roots()[0])
         if d:
             self.root_edit.setText(d)
 
+    def _add_root(self):
+        d = QFileDialog.getExistingDirectory(self, "Kayıt Klasörü Ekle", self._roots()[-1])
+        if d:
+            self.root_edit.setText("; ".join(parse_roots(self.root_edit.text()) + [d]))
+
+    def _choose_work_dir(self):
+        d = QFileDialog.getExistingDirectory(self, "Çalışma Klasörü Seç", self.work_edit.text() or tempfile.gettempdir())
+        if d:
+            self.work_edit.setText(d)
+
     def _choose_cookies(self):
         path, _ = QFileDialog.getOpenFileName(self, "cookies.txt seç", "", "Text Files (*.txt);;All Files (*)")
         if path:
@@ -195,75 +348,89 @@ class MainWindow(QMainWindow):
 
     def _import_cookies_from_browser(self):
         # Let user choose the browser
-        options = ["brave", "firefox", "chrome", "edge"]
+        options = list(BROWSERS)
         choice, ok = QInputDialog.getItem(self, "Tarayıcı Seç", "Cookies alınacak tarayıcı:", options, 0, False)
         if not ok or not choice:
             return
         self.cookies_browser = choice
-        # Try to fetch cookies into a temp file using browser_cookie3 as primary method
-        try:
-            import browser_cookie3 as bc3
-            getter = {
-                "brave": bc3.brave,
-                "chrome": bc3.chrome,
-                "edge": bc3.edge,
-                "firefox": bc3.firefox,
-            }.get(choice)
-            cj = getter() if getter else None  # get all cookies to avoid domain filtering issues
-            # If empty, try specific domains
-            if (not cj) or len(cj) == 0:
-                for domain in ("youtube.com", "google.com"):  # consent checks may hit google
-                    try:
-                        cj = getter(domain_name=domain)
-                        if cj and len(cj) > 0:
-                            break
-                    except Exception:
-                        continue
-            if cj and len(cj) > 0:
-                tmp = tempfile.NamedTemporaryFile(prefix="cookies_", suffix=".txt", delete=False)
-                cj.save(tmp.name)
-                tmp.close()
-                self.cookies_path = tmp.name
-                self.statusBar().showMessage(f"Cookies alındı: {choice}", 4000)
-            else:
-                self.cookies_path = None
-                self.statusBar().showMessage(f"{choice} için cookie bulunamadı, yine de deneyebilirsiniz", 5000)
-        except Exception as e:
-            # Fall back to yt-dlp cookiesfrombrowser only
-            self.cookies_path = None
-            self.statusBar().showMessage(f"Cookies okunamadı ({choice}): {e}", 6000)
+        # Never keep the previous browser's jar: until the refresh ends this browser's own (older)
+        # jar is used, or yt-dlp reads the browser itself when there is none
+        cached = self.cookie_mgr.cookie_file(choice)
+        self.cookies_path = cached
+        if cached and not self.cookie_mgr.is_stale(choice):
+            self.statusBar().showMessage(f"Cookies hazır (önbellek): {choice}", 4000)
+            return
+        # Decrypting the browser store is slow; do it off the UI thread
+        if self.cookie_mgr.refresh_async(choice):
+            self.statusBar().showMessage(f"Cookies alınıyor: {choice}...", 4000)
+        else:
+            self.statusBar().showMessage(f"Cookies sıraya alındı: {choice} (önceki okuma bitince alınacak)", 4000)
+
+    def _start_transcode(self):
+        if self.transcoder and self.transcoder.isRunning():
+            self.transcoder.stop()
+            self.statusBar().showMessage("Dönüştürme durduruluyor...", 3000)
+            return
+        start = self._roots()[0]
+        src = QFileDialog.getExistingDirectory(self, "Dönüştürülecek Klasör", start)
+        if not src:
+            return
+        target, ok = QInputDialog.getItem(self, "Hedef Biçim", "Ses biçimi:", ["MP3", "M4A"], 0, False)
+        if not ok or not target:
+            return
+        self.transcoder = TranscodeWorker(src, target.lower(), parent=self)
+        self.transcoder.progress.connect(self._on_transcode_progress)
+        self.transcoder.file_done.connect(lambda path: self.recent_model.add(os.path.basename(path), status="success"))
+        self.transcoder.failed.connect(lambda msg: self.skipped_model.add(msg, status="skipped"))
+        self.transcoder.finished.connect(self._on_transcode_finished)
+        self.btn_transcode.setText("Dönüştürmeyi Durdur")
+        self.statusBar().showMessage(f"Dönüştürme başladı: {src} -> {target}", 4000)
+        self.transcoder.start()
+
+    def _on_transcode_progress(self, done: int, total: int, name: str):
+        self.statusBar().showMessage(f"Dönüştürülüyor {done}/{total}: {name}")
+
+    def _on_transcode_finished(self, success: bool, message: str):
+        self.transcoder = None
+        self.btn_transcode.setText("Kütüphaneyi Dönüştür")
+        if (message or "").lower().startswith("cancelled by user"):
+            self.statusBar().showMessage("Dönüştürme durduruldu", 4000)
+            return
+        self.statusBar().showMessage(f"Dönüştürme bitti: {message}", 7000)
+        if not success:
+            QMessageBox.warning(self, "Dönüştürme", message or "Dönüştürme başarısız")
+
+    def _on_cookies_refreshed(self, ok: bool, browser: str, message: str):
+        if browser != self.cookies_browser:
+            return
+        # Keep an older cached jar if the refresh failed; else fall back to yt-dlp cookiesfrombrowser
+        self.cookies_path = self.cookie_mgr.cookie_file(browser)
+        if ok:
+            self.statusBar().showMessage(f"Cookies alındı: {browser}", 4000)
+        elif message == "no cookies found":
+            self.statusBar().showMessage(f"{browser} için cookie bulunamadı, yine de deneyebilirsiniz", 5000)
+        else:
+            self.statusBar().showMessage(f"Cookies okunamadı ({browser}): {message}", 6000)
 
     def _clear(self):
         self.url_edit.clear()
         self.progress.setValue(0)
 
-    def _append_recent(self, text: str, status: str = "pending"):
-        # status: pending/success/error/active
-        item = QListWidgetItem(text)
-        if status == "success":
-            item.setForeground(QBrush(QColor("#1a7f37")))
-            item.setText("✓ " + text)
-        elif status == "error":
-            item.setForeground(QBrush(QColor("#b3261e")))
-            item.setText("✗ " + text)
-        elif status == "active":
-            font = item.font()
-            font.setBold(True)
-            item.setFont(font)
-            item.setText("▶ " + text)
-        self.recent_list.insertItem(0, item)
-        # remove cap: keep all items, enable scrolling
+    def _append_recent(self, text: str, status: str = "pending") -> int:
+        # status: pending/success/error/active; the active entry stays pinned on top
+        return self.recent_model.add(text, status, pinned=(status == "active"))
 
     def _update_active_item(self, title: str, percent: float):
-        if self.recent_list.count() == 0:
+        if self._active_id is None:
+            return
+        entry = self.recent_model.get(self._active_id)
+        if entry is None:
             return
-        item = self.recent_list.item(0)
-        base = title or item.text().lstrip("▶ ✓ ✗ ")
-        item.setText(f"▶ {base} ({percent:.0f}%)")
+        base = title or entry["text"]
+        # Progress ticks are not written to the event log
+        self.recent_model.update(self._active_id, text=f"{base} ({percent:.0f}%)", log=False)
 
     def _start_download(self):
-        if self.worker and self.worker.isRunning():
-            return
         url = self.url_edit.text().strip()
         # Basic validation to avoid accidentally pasting error text
         if not (url.startswith("http://") or url.startswith("https://")):
@@ -277,17 +444,44 @@ class MainWindow(QMainWindow):
         if not any(p in url.lower() for p in allowed):
             self.statusBar().showMessage("YouTube bağlantısı bekleniyor", 4000)
             return
+        bad = invalid_route(parse_routes(self.routes_edit.text()))
+        if bad:
+            self.statusBar().showMessage(f"Bağlantı havuzunda geçersiz üye: {bad}", 5000)
+            return
         if not url:
             self.statusBar().showMessage("Lütfen bir bağlantı girin", 3000)
             return
-        mode = "mp4" if self.mode_group.checkedId() == 1 else "mp3"
-        root = self.root_edit.text().strip() or DEFAULT_ROOT
+        mode = {1: "mp4", 2: "mp3", 3: MULTI_MODE}.get(self.mode_group.checkedId(), "mp4")
+        root = "; ".join(self._roots())
         title_for_list = url
+        if self.worker and self.worker.isRunning():
+            # Same mode/folder: the running job takes the link and gives it its own turn
+            same = (
+                not self.worker.probe_only
+                and self._last_params
+                and (self._last_params["mode"], self._last_params["root"]) == (mode, root)
+            )
+            if same and self.worker.enqueue(url):
+                self.statusBar().showMessage("Bağlantı çalışan işe eklendi", 4000)
+            else:
+                self._url_queue.append((url, mode, root))
+                self.statusBar().showMessage("Sıraya alındı, mevcut iş bitince başlayacak", 4000)
+            self.url_edit.clear()
+            self._pending_version = None
+            return
+        if self.chk_sync.isChecked():
+            interval = int(self.sync_interval_combo.currentData() or 0)
+            if interval:
+                selected_max = int(self.maxres_combo.currentData() or 1080)
+                self.sync_store.subscribe(url, interval, mode, root, selected_max)
+            else:
+                self.sync_store.unsubscribe(url)
         self._begin_download(url, mode, root)
 
-    def _begin_download(self, url: str, mode: str, root: str):
+    def _begin_download(self, url: str, mode: str, root: str, subscription: Optional[dict] = None):
         # Save params for resume
         selected_max = int(self.maxres_combo.currentData()) if self.maxres_combo.currentData() is not None else 1080
+        self._scheduled = subscription is not None
         self._last_params = {
             "url": url,
             "mode": mode,
@@ -296,28 +490,202 @@ class MainWindow(QMainWindow):
             "cookies_path": self.cookies_path,
             "cookies_browser": self.cookies_browser,
             "ignore_archive": self.chk_ignore_archive.isChecked(),
+            "work_dir": self.work_edit.text().strip() or None,
+            "sync": self.chk_sync.isChecked(),
+            "processes": self.proc_spin.value(),
+            "streaming": self.chk_streaming.isChecked(),
+            "routes": parse_routes(self.routes_edit.text()),
+            "placement": self.placement_combo.currentData() or ROUND_ROBIN,
         }
-        self._append_recent(url, status="active")
+        if subscription is not None:
+            self._last_params.update(max_height=int(subscription.get("max_height") or 1080), ignore_archive=False, sync=True)
+        self._active_id = self._append_recent(url, status="active")
         self.progress.setValue(0)
-        self._run_stats = {"completed": 0, "skipped": []}
+        self._reset_run_stats(self._last_params["max_height"])
+        roots = parse_roots(root) or [DEFAULT_ROOT]
         self.worker = DownloadWorker(
             url,
             mode,
-            root,
+            roots[0],
             self._last_params["max_height"],
             self._last_params["cookies_path"],
             self._last_params["cookies_browser"],
             ignore_archive=self._last_params["ignore_archive"],
+            work_dir=self._last_params["work_dir"],
+            sync=self._last_params["sync"],
+            sync_store=self.sync_store,
+            processes=self._last_params["processes"],
+            order=self.order_combo.currentData() or "playlist",
+            streaming=self._last_params.get("streaming", False),
+            routes=self._last_params.get("routes") or None,
+            roots=roots,
+            placement=self._last_params["placement"],
         )
         self.worker.progress.connect(self._on_progress)
         self.worker.file_done.connect(self._on_file_done)
         self.worker.finished.connect(self._on_finished)
         self.worker.skipped.connect(self._on_skipped)
-        self.btn_download.setEnabled(False)
+        self.worker.paused.connect(self._on_paused)
+        self.worker.format_chosen.connect(self._on_format_chosen)
+        self._set_running(True)
+        self.btn_stop.setEnabled(True)
+        self.btn_resume.setEnabled(False)
+        self.worker.start()
+
+    def _start_probe(self):
+        url = self.url_edit.text().strip()
+        if not (url.startswith("http://") or url.startswith("https://")):
+            self.statusBar().showMessage("Geçerli bir bağlantı girin (http/https)", 4000)
+            return
+        if self.worker and self.worker.isRunning():
+            self.statusBar().showMessage("Tarama için önce mevcut işin bitmesini bekleyin", 4000)
+            return
+        selected_max = int(self.maxres_combo.currentData() or 1080)
+        self._scheduled = False
+        self._active_id = self._append_recent(f"Tarama: {url}", status="active")
+        self.progress.setValue(0)
+        self._reset_run_stats(selected_max)
+        # Metadata only: nothing is downloaded, archive and sync state stay untouched
+        self.worker = DownloadWorker(
+            url,
+            "mp4",
+            self._roots()[0],
+            selected_max,
+            self.cookies_path,
+            self.cookies_browser,
+            ignore_archive=True,
+            order=self.order_combo.currentData() or "playlist",
+            probe_only=True,
+            streaming=self.chk_streaming.isChecked(),
+        )
+        self.worker.progress.connect(self._on_progress)
+        self.worker.finished.connect(self._on_finished)
+        self.worker.skipped.connect(self._on_skipped)
+        self.worker.probed.connect(self._on_probed)
+        self._set_running(True)
         self.btn_stop.setEnabled(True)
         self.btn_resume.setEnabled(False)
         self.worker.start()
 
+    def _on_probed(self, report: dict):
+        max_h = int(report.get("max_height") or 0)
+        entries = int(report.get("entries") or 0)
+        lines = [f"Taranan: {entries} (önbellekten {report.get('cached', 0)}), alınamayan: {report.get('failed', 0)}"]
+        expected = report.get("expected") or {}
+        at_max = sum(n for h, n in expected.items() if h is not None and int(h) >= max_h)
+        lines.append(f"{max_h}p ile inecek: {at_max} / {entries}")
+        lines.append("")
+        lines.append("En yüksek çözünürlük dağılımı:")
+        for h, n in sorted((report.get("best") or {}).items(), key=lambda kv: -(kv[0] or 0)):
+            lines.append(f"- {h}p: {n}")
+        codecs = report.get("codecs") or {}
+        if codecs:
+            lines.append("")
+            lines.append("Kodekler: " + ", ".join(f"{c} ({n})" for c, n in sorted(codecs.items(), key=lambda kv: -kv[1])))
+        below = report.get("below") or []
+        if below:
+            lines.append("")
+            lines.append(f"{max_h}p altında kalacaklar ({len(below)}):")
+            for title, h in below[:50]:
+                lines.append(f"- {title}: {h}p")
+        mb = QMessageBox(self)
+        mb.setWindowTitle("Çözünürlük Taraması")
+        mb.setIcon(QMessageBox.Information)
+        mb.setText(f"{at_max} / {entries} video {max_h}p olarak inecek.")
+        mb.setInformativeText("Ayrıntılar aşağıda.")
+        mb.setDetailedText("\n".join(lines))
+        mb.addButton("Tamam", QMessageBox.AcceptRole)
+        mb.exec()
+
+    def _on_format_chosen(self, title: str, height: int, best: int):
+        self._run_stats.add_height(title, height, best)
+
+    def _set_running(self, running: bool):
+        # The download button stays usable during a run: new links join the job or wait in line
+        self.btn_download.setEnabled(True)
+        self.btn_download.setText("Sıraya Ekle" if running else "İndir")
+        self.btn_download.setToolTip("Bağlantıyı çalışan işe ekler veya iş bitince başlatır" if running else "")
+
+    def _start_next_queued(self):
+        if (self.worker and self.worker.isRunning()) or not self._url_queue:
+            return
+        url, mode, root = self._url_queue.pop(0)
+        self._begin_download(url, mode, root)
+
+    def _refresh_pending(self):
+        sched = self.worker.scheduler if self.worker else None
+        version = (id(sched), sched.version if sched else None, len(self._url_queue))
+        if version == self._pending_version:
+            return
+        self._pending_version = version
+        # Only the head of a long queue is shown; the scheduler holds the rest
+        rows = [(job_key(job), job_label(job)) for job in (sched.pending(200) if sched else [])]
+        rows += [(None, f"[sırada] {url}") for url, _, _ in self._url_queue]
+        lst = self.pending_list
+        selected = lst.currentItem()
+        selected_key = selected.data(Qt.UserRole) if selected else None
+        scroll = lst.verticalScrollBar().value()
+        # Items are updated in place (no clear()), so the view keeps its selection and scroll position
+        lst.setUpdatesEnabled(False)
+        try:
+            while lst.count() > len(rows):
+                lst.takeItem(lst.count() - 1)
+            current = -1
+            for row, (key, text) in enumerate(rows):
+                item = lst.item(row)
+                if item is None:
+                    item = QListWidgetItem()
+                    lst.addItem(item)
+                if item.text() != text:
+                    item.setText(text)
+                item.setData(Qt.UserRole, key)
+                flags = (item.flags() | Qt.ItemIsSelectable) if key else (item.flags() & ~Qt.ItemIsSelectable)
+                if item.flags() != flags:
+                    item.setFlags(flags)
+                if key is not None and key == selected_key:
+                    current = row
+            if current != lst.currentRow():
+                lst.setCurrentRow(current)
+            lst.verticalScrollBar().setValue(scroll)
+        finally:
+            lst.setUpdatesEnabled(True)
+
+    def _selected_pending_key(self) -> Optional[str]:
+        item = self.pending_list.currentItem()
+        if item is None or not self.worker:
+            return None
+        return item.data(Qt.UserRole)
+
+    def _pin_pending(self):
+        key = self._selected_pending_key()
+        if key:
+            self.worker.scheduler.pin(key)
+            self._refresh_pending()
+
+    def _move_pending(self, delta: int):
+        key = self._selected_pending_key()
+        if key:
+            self.worker.scheduler.move(key, delta)
+            self._refresh_pending()
+
+    def _on_order_changed(self):
+        if self.worker:
+            self.worker.scheduler.set_policy(self.order_combo.currentData() or "playlist")
+            self._refresh_pending()
+
+    def _run_due_syncs(self):
+        if self.worker and self.worker.isRunning():
+            return
+        now = time.monotonic()
+        for sub in self.sync_store.due():
+            # A failed sync is not marked done; wait a while before trying that URL again
+            if now - self._sync_tried.get(sub["url"], -1e9) < 15 * 60:
+                continue
+            self._sync_tried[sub["url"]] = now
+            self.statusBar().showMessage(f"Zamanlanmış senkronizasyon: {sub.get('title') or sub['url']}", 5000)
+            self._begin_download(sub["url"], sub.get("mode") or "mp4", sub.get("root") or DEFAULT_ROOT, subscription=sub)
+            return
+
     def _stop_download(self):
         if self.worker and self.worker.isRunning():
             try:
@@ -340,9 +708,13 @@ class MainWindow(QMainWindow):
         self.statusBar().showMessage("Devam başlatılıyor... (bitmişler atlanacak)", 4000)
         # Force using archive (do NOT ignore) so bitenler atlanır, yarım kalan baştan başlar
         old_ignore = self.chk_ignore_archive.isChecked()
+        old_sync = self.chk_sync.isChecked()
+        old_streaming = self.chk_streaming.isChecked()
         try:
             if old_ignore:
                 self.chk_ignore_archive.setChecked(False)
+            self.chk_sync.setChecked(bool(self._last_params.get("sync")))
+            self.chk_streaming.setChecked(bool(self._last_params.get("streaming")))
             self._begin_download(
                 self._last_params["url"],
                 self._last_params["mode"],
@@ -352,83 +724,99 @@ class MainWindow(QMainWindow):
             # Restore user's checkbox preference in UI (worker already took a snapshot)
             if old_ignore:
                 self.chk_ignore_archive.setChecked(True)
+            self.chk_sync.setChecked(old_sync)
+            self.chk_streaming.setChecked(old_streaming)
 
     def _on_progress(self, percent: float, speed: str, eta: str, title: str):
         self.progress.setValue(int(percent))
         self._update_active_item(title or "İndiriliyor", percent)
         self.statusBar().showMessage(f"{speed} | ETA: {eta}")
 
+    def _on_paused(self, reason: str):
+        # Worker waits (queue paused) until disk space is available again
+        if reason:
+            self.statusBar().showMessage(f"Disk alanı az, bekleniyor: {reason}")
+        else:
+            self.statusBar().showMessage("Disk alanı yeterli, devam ediliyor", 4000)
+
     def _on_file_done(self, filename: str):
         # Insert the saved filename just under the active item
         base = os.path.basename(filename)
-        item = QListWidgetItem("✓ " + base)
-        item.setForeground(QBrush(QColor("#1a7f37")))
-        insert_at = 1 if self.recent_list.count() > 0 else 0
-        self.recent_list.insertItem(insert_at, item)
-        # remove cap: keep all items, enable scrolling
+        self.recent_model.add(base, status="success")
         # update stats
-        try:
-            self._run_stats["completed"] += 1
-        except Exception:
-            pass
+        self._run_stats.add_completed()
 
     def _on_finished(self, success: bool, message: str):
-        if self.recent_list.count() > 0:
-            item0 = self.recent_list.takeItem(0)
-            base = item0.text().lstrip("▶ ✓ ✗ ")
+        active_id, self._active_id = self._active_id, None
+        active = self.recent_model.get(active_id) if active_id is not None else None
+        if active is not None:
+            self.recent_model.unpin()
+            # Log the last progress text too (ticks were not persisted)
+            base = active["text"]
             if success:
-                self._append_recent(base, status="success")
+                self.recent_model.update(active_id, text=base, status="success")
                 self.statusBar().showMessage("Tamamlandı", 4000)
             else:
                 if (message or "").lower().startswith("cancelled by user"):
-                    self._append_recent(base, status="error")
+                    self.recent_model.update(active_id, text=base, status="error")
                     self.statusBar().showMessage("Durduruldu", 4000)
                 else:
-                    self._append_recent(base, status="error")
+                    self.recent_model.update(active_id, text=base, status="error")
                     self.statusBar().showMessage(f"Hata: {message}", 7000)
-                    # Show full copyable error dialog and copy to clipboard
-                    try:
-                        from PySide6.QtGui import QGuiApplication
-                        QGuiApplication.clipboard().setText(message or "")
-                    except Exception:
-                        pass
-                    mb = QMessageBox(self)
-                    mb.setWindowTitle("İndirme Hatası")
-                    mb.setIcon(QMessageBox.Critical)
-                    mb.setText("Bir hata oluştu.")
-                    # Read log tail and attach to details
-                    log_tail = self._read_log_tail(60)
-                    info_text = "Hata metni panoya kopyalandı. Son log satırları aşağıda."
-                    details = (message or "")
-                    if log_tail:
-                        details += "\n\n--- Log (son 60 satır) ---\n" + log_tail
-                    mb.setInformativeText(info_text)
-                    mb.setDetailedText(details)
-                    mb.addButton("Tamam", QMessageBox.AcceptRole)
-                    mb.exec()
+                    # Scheduled syncs run unattended: no modal dialogs
+                    if not self._scheduled:
+                        # Show full copyable error dialog and copy to clipboard
+                        try:
+                            from PySide6.QtGui import QGuiApplication
+                            QGuiApplication.clipboard().setText(message or "")
+                        except Exception:
+                            pass
+                        mb = QMessageBox(self)
+                        mb.setWindowTitle("İndirme Hatası")
+                        mb.setIcon(QMessageBox.Critical)
+                        mb.setText("Bir hata oluştu.")
+                        # Read log tail and attach to details
+                        log_tail = self._read_log_tail(60)
+                        info_text = "Hata metni panoya kopyalandı. Son log satırları aşağıda."
+                        details = (message or "")
+                        if log_tail:
+                            details += "\n\n--- Log (son 60 satır) ---\n" + log_tail
+                        mb.setInformativeText(info_text)
+                        mb.setDetailedText(details)
+                        mb.addButton("Tamam", QMessageBox.AcceptRole)
+                        mb.exec()
         # Reset states
         self.progress.setValue(0)
         self.worker = None
         # buttons state after finish
-        self.btn_download.setEnabled(True)
+        self._set_running(False)
         self.btn_stop.setEnabled(False)
         self.btn_resume.setEnabled(self._last_params is not None)
+        self._pending_version = None
+        self._refresh_pending()
+        # Next queued link starts right away (the summary dialog below is modal)
+        if self._url_queue and not (message or "").lower().startswith("cancelled by user"):
+            QTimer.singleShot(0, self._start_next_queued)
         # Show summary dialog for this run
-        self._show_summary_dialog()
+        if not self._scheduled:
+            self._show_summary_dialog()
 
     def _on_skipped(self, msg: str):
-        # Show last 10 skipped reasons; color as error
+        # Show last 10 skipped reasons (model is capped); color as error
         text = msg.strip()
         if not text:
             return
-        item = QListWidgetItem(text)
-        item.setForeground(QBrush(QColor("#b3261e")))
-        self.skipped_list.insertItem(0, item)
-        while self.skipped_list.count() > 10:
-            self.skipped_list.takeItem(self.skipped_list.count() - 1)
+        self.skipped_model.add(text, status="skipped")
         # record to stats (parsed)
-        parsed = self._parse_skip_message(text)
-        self._run_stats["skipped"].append(parsed)
+        self._run_stats.add_skipped(self._parse_skip_message(text))
+
+    @staticmethod
+    def _skipped_log_path() -> str:
+        return os.path.join(os.path.dirname(DownloadWorker.get_log_path()), "last-run-skipped.jsonl")
+
+    def _reset_run_stats(self, max_height: int) -> None:
+        self._run_stats.close()
+        self._run_stats = RunStats(max_height, self._skipped_log_path())
 
     def _read_log_tail(self, max_lines: int = 60) -> str:
         """Read last max_lines from the persistent log file safely."""
@@ -450,7 +838,7 @@ class MainWindow(QMainWindow):
             import re
             vid = None
             reason = text
-            m = re.search(r"\[youtube\]\s+([A-Za-z0-9_-]{6,})[: ]\s*(.*)", text)
+            m = re.search(r"\[\w+\]\s+([A-Za-z0-9_-]{6,})[: ]\s*(.*)", text)
             if m:
                 vid = m.group(1)
                 if m.group(2):
@@ -473,9 +861,9 @@ class MainWindow(QMainWindow):
 
     def _show_summary_dialog(self):
         try:
-            total_completed = int(self._run_stats.get("completed", 0))
-            skipped_list = list(self._run_stats.get("skipped", []))
-            total_skipped = len(skipped_list)
+            stats = self._run_stats
+            total_completed = stats.completed
+            total_skipped = stats.skipped
             if total_completed == 0 and total_skipped == 0:
                 return
             # Build summary text
@@ -485,9 +873,20 @@ class MainWindow(QMainWindow):
             # show up to 10 skipped with id + reason
             if total_skipped:
                 summary.append("")
-                summary.append("Atlanan örnekleri (ilk 10):")
-                for s in skipped_list[:10]:
+                summary.append(f"Atlanan örnekleri (ilk {len(stats.skipped_samples)}):")
+                for s in stats.skipped_samples:
                     summary.append(f"- {s.get('id')} : {s.get('reason')}")
+                if stats.spill_path:
+                    summary.append(f"Tüm atlananlar: {stats.spill_path}")
+            # Selected heights; entries below the requested maximum are listed
+            if stats.heights:
+                max_h = stats.max_height
+                summary.append("")
+                summary.append("Seçilen çözünürlükler: " + ", ".join(f"{h}p ({n})" for h, n in sorted(stats.heights.items(), reverse=True)))
+                if stats.lower:
+                    summary.append(f"{max_h}p altında inenler (ilk {len(stats.lower_samples)} / {stats.lower}):")
+                    for t, h, b in stats.lower_samples:
+                        summary.append(f"- {t}: {h}p (en yüksek {b}p)" if b else f"- {t}: {h}p")
             # path to archive
             from .downloader import DownloadWorker
             arch_path = os.path.join(os.path.dirname(DownloadWorker.get_log_path()), "download_archive.txt")
@@ -505,6 +904,18 @@ class MainWindow(QMainWindow):
         except Exception:
             pass
 
+    def closeEvent(self, event):
+        if self.transcoder and self.transcoder.isRunning():
+            self.transcoder.stop()
+            self.transcoder.wait(5000)
+        # Write out batched history events before the window goes away
+        try:
+            self.recent_model.flush()
+        except Exception:
+            pass
+        self._run_stats.close()
+        super().closeEvent(event)
+
     def _open_log(self):
         import subprocess, sys
         log_path = DownloadWorker.get_log_path()
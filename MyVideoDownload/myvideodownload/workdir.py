@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+import errno
+import shutil
+
+
+def atomic_move(src: str, dst: str) -> str:
+    """Move src to dst so dst is never seen half-written (copy to a hidden name, then rename, across volumes)."""
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    try:
+        os.replace(src, dst)
+        return dst
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    tmp = os.path.join(os.path.dirname(dst), "." + os.path.basename(dst) + ".moving")
+    try:
+        with open(src, "rb") as fin, open(tmp, "wb") as fout:
+            shutil.copyfileobj(fin, fout, 4 * 1024 * 1024)
+            fout.flush()
+            os.fsync(fout.fileno())
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    os.remove(src)
+    return dst
+
+
+def is_inside(path: str, directory: str) -> bool:
+    """True when path lies under directory."""
+    try:
+        rel = os.path.relpath(os.path.abspath(path), os.path.abspath(directory))
+    except ValueError:  # another drive (Windows)
+        return False
+    return not rel.startswith(os.pardir)
+
+
+def dest_path_for(path: str, work_dir: str, root_dir: str) -> str:
+    """Map a file under work_dir to the same relative location under root_dir."""
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(work_dir))
+    if rel.startswith(os.pardir):
+        # Not inside the work dir (should not happen); keep only the name
+        rel = os.path.basename(path)
+    return os.path.join(root_dir, rel)
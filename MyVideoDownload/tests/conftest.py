@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the package from the source tree (MyVideoDownload/myvideodownload)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
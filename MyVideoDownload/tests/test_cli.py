@@ -0,0 +1,11 @@
+import subprocess
+import sys
+
+from myvideodownload.cli import build_parser
+
+
+def test_headless_only_on_a_subcommand():
+    args = build_parser().parse_args(["serve", "q.db", "--listen", "0.0.0.0:8765"])
+    assert (args.command, args.db, args.listen) == ("serve", "q.db", "0.0.0.0:8765")
+    run = subprocess.run([sys.executable, "-m", "myvideodownload", "worker"], capture_output=True, text=True, timeout=60)
+    assert run.returncode == 2 and "--queue" in run.stderr
@@ -0,0 +1,72 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import yt_dlp
+
+from myvideodownload.connpool import POOL, install, stats_delta
+from myvideodownload.routes import install as install_routes, use_route
+
+
+class _Echo(BaseHTTPRequestHandler):
+    # Keep-alive server that also answers absolute-form requests, i.e. acts as an HTTP proxy
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Echo)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def _fetch_twice(ydl, url):
+    before = POOL.stats.snapshot()
+    bodies = [ydl.urlopen(url).read() for _ in range(2)]
+    delta = stats_delta(before, POOL.stats.snapshot())
+    return bodies, (delta["requests"], delta["connections"], delta["reused"])
+
+
+def test_pooled_urllib_handler_reuses_connections(server):
+    # Fails when the yt-dlp internals pooledrh builds on move (see its header)
+    from myvideodownload.pooledrh import PooledRH
+
+    ydl = yt_dlp.YoutubeDL({"quiet": True})
+    ydl.__dict__["_request_director"] = ydl.build_request_director([PooledRH])
+    bodies, counts = _fetch_twice(ydl, server + "/a")
+    assert bodies == [b"/a", b"/a"]
+    assert counts == (2, 1, 1)
+
+
+def test_requests_handler_keeps_priority_and_is_counted(server):
+    pytest.importorskip("requests")
+    ydl = yt_dlp.YoutubeDL({"quiet": True})
+    install(ydl)
+    assert {"Requests", "Pooled"} <= set(ydl._request_director.handlers)
+    first = ydl.urlopen(server + "/b")
+    assert type(first).__name__ == "RequestsResponseAdapter"
+    first.read()
+    assert _fetch_twice(ydl, server + "/b")[1] == (2, 0, 2)
+
+
+def test_proxied_route_reuses_its_proxy_connection(server):
+    pytest.importorskip("requests")
+    ydl = yt_dlp.YoutubeDL({"quiet": True})
+    install(ydl)
+    install_routes(ydl)
+    use_route(ydl, server)  # the echo server is the proxy
+    bodies, counts = _fetch_twice(ydl, "http://media.invalid/c")
+    assert bodies == [b"http://media.invalid/c"] * 2
+    assert counts == (2, 1, 1)
@@ -0,0 +1,26 @@
+from http.cookiejar import Cookie
+from types import SimpleNamespace
+
+from myvideodownload.downloader import DownloadWorker, _new_ydl
+
+JAR = "# Netscape HTTP Cookie File\n.youtube.com\tTRUE\t/\tTRUE\t2000000000\tSID\tfresh\n"
+
+
+def _cookie(value):
+    return Cookie(0, "SID", value, None, False, ".youtube.com", True, True, "/", True, True, 2000000000, False, None, None, {})
+
+
+def test_jobs_read_the_cached_jar_but_never_write_it_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(DownloadWorker, "_ffmpeg_caps", classmethod(lambda cls: SimpleNamespace(dir=None, can_mp3=True)))
+    cache = tmp_path / "cookies-firefox.txt"
+    cache.write_text(JAR, encoding="utf-8")
+    worker = DownloadWorker("", "mp4", str(tmp_path), space_check=False, cookies_path=str(cache))
+    worker._prefetch_opts = worker._build_opts()
+    worker._other_archive_ids = set()
+    main, prefetch = _new_ydl(worker._build_opts()), worker._prefetch_ydl()
+    for ydl in (main, prefetch):
+        assert [c.value for c in ydl.cookiejar] == ["fresh"]
+        ydl.cookiejar.set_cookie(_cookie("stale"))
+    main.close()
+    worker._close_prefetch_ydls()
+    assert cache.read_text(encoding="utf-8") == JAR
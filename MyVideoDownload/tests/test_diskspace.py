@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+import yt_dlp
+
+from myvideodownload.diskspace import DiskSpaceMonitor
+from myvideodownload.downloader import _DiskSpacePP
+from myvideodownload.retry import OTHER, RetryEngine, RetryGaveUp
+
+
+def test_entry_larger_than_the_volume_is_given_up_instead_of_waited_for(tmp_path):
+    # A floor above any disk size: the entry can never fit, however long the worker waits
+    space = DiskSpaceMonitor(str(tmp_path), 10 ** 18, poll=60.0)
+    worker = SimpleNamespace(mode="mp4", _space=space, _dest_space=None, paused=None, _stop=False)
+    ydl = yt_dlp.YoutubeDL({"quiet": True, "ignoreerrors": False, "outtmpl": str(tmp_path / "%(title)s.%(ext)s")})
+    ydl.add_post_processor(_DiskSpacePP(worker), when="before_dl")
+    info = {
+        "id": "v1", "title": "Clip", "extractor": "generic", "extractor_key": "Generic", "webpage_url": "http://x/",
+        "formats": [{"format_id": "v", "url": "http://127.0.0.1:9/v.mp4", "ext": "mp4", "filesize": 1000}],
+    }
+    try:
+        RetryEngine().call(lambda _n: ydl.process_ie_result(dict(info), download=True), "Clip")
+    except RetryGaveUp as e:
+        assert (e.error_class, e.attempts) == (OTHER, 1)
+        assert e.message.startswith("Clip: needs 1000 B plus ")
+    else:
+        raise AssertionError("the entry was downloaded")
+    assert not list(tmp_path.iterdir())
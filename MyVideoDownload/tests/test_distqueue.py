@@ -0,0 +1,60 @@
+import socket
+import threading
+
+from myvideodownload.distqueue import QueueServer, RemoteQueue, SqliteQueue, _serve_line
+
+
+def _jobs(n):
+    return [{"stub": {"id": f"v{i}", "ie_key": "Generic"}, "index": i, "extra": None, "url": "u"} for i in range(1, n + 1)]
+
+
+def test_repeated_claim_request_leases_one_job(tmp_path):
+    q = SqliteQueue(str(tmp_path / "q.db"))
+    q.publish(_jobs(3), "mp4")
+    first = q.claim("n1", "mp4", request="r1")
+    assert q.claim("n1", "mp4", request="r1") == first
+    assert q.counts("mp4") == {"leased": 1, "pending": 2}
+    assert q.complete("n1", "mp4", first["key"], True, request="c1")
+    assert q.complete("n1", "mp4", first["key"], True, request="c1")  # same answer when resent
+    assert not q.complete("n1", "mp4", first["key"], True, request="c2")
+
+
+class _DropFirstReply(QueueServer):
+    """Commits the first claim, then drops the connection instead of answering."""
+
+    dropped = False
+
+    def finish_request(self, request, client_address):
+        if not self.dropped:
+            self.dropped = True
+            line = request.makefile("rb").readline()
+            _serve_line(self.shared, line)  # committed; the reply is lost
+            request.shutdown(socket.SHUT_RDWR)
+            return
+        super().finish_request(request, client_address)
+
+
+def test_lost_claim_reply_is_not_claimed_twice(tmp_path):
+    shared = SqliteQueue(str(tmp_path / "q.db"))
+    shared.publish(_jobs(3), "mp4")
+    server = _DropFirstReply(shared, ("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        remote = RemoteQueue(*server.server_address[:2])
+        job = remote.claim("n1", "mp4")
+        assert server.dropped and job is not None
+        assert shared.counts("mp4") == {"leased": 1, "pending": 2}
+        remote.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_permanent_failure_is_not_handed_out_again(tmp_path):
+    q = SqliteQueue(str(tmp_path / "q.db"))
+    q.publish(_jobs(2), "mp4")
+    removed, flaky = q.claim("n1", "mp4"), q.claim("n1", "mp4")
+    assert q.complete("n1", "mp4", removed["key"], False, "Video unavailable", error_class="unavailable")
+    assert q.complete("n1", "mp4", flaky["key"], False, "timed out", error_class="network")
+    assert q.counts("mp4") == {"failed": 1, "pending": 1}
+    assert q.claim("n2", "mp4")["key"] == flaky["key"]
@@ -0,0 +1,20 @@
+from PySide6.QtCore import QCoreApplication
+
+from myvideodownload.history import EventLog, HistoryModel
+
+
+def test_clear_drops_buffered_and_logged_entries(tmp_path):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    log = EventLog(str(tmp_path / "history.jsonl"))
+    model = HistoryModel(event_log=log)
+    model.add("old", status="success")
+    model.flush()
+    model.add("buffered", status="success")
+    model.clear()
+    model.flush()
+    assert model.rowCount() == 0
+    model.add("new", status="success")
+    model.flush()
+    app.processEvents()
+    assert [r["text"] for r in log.load_tail(10)] == ["new"]
+    assert [r["text"] for r in HistoryModel(event_log=log)._rows] == ["new"]
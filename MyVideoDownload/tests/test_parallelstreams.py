@@ -0,0 +1,17 @@
+from myvideodownload.parallelstreams import _GroupProgress
+
+
+def test_streams_of_an_entry_reach_the_hooks_summed():
+    seen = []
+    progress = _GroupProgress([seen.append])
+    progress({"status": "downloading", "filename": "x.mp4", "downloaded_bytes": 5})
+    progress.start(["c.fv.mp4", "c.fa.m4a"])
+    progress({"status": "downloading", "filename": "c.fv.mp4", "downloaded_bytes": 300, "total_bytes": 600, "speed": 10.0})
+    progress({"status": "downloading", "filename": "c.fa.m4a", "downloaded_bytes": 100, "total_bytes_estimate": 200, "speed": 5.0})
+    progress({"status": "finished", "filename": "c.fa.m4a", "downloaded_bytes": 200, "total_bytes": 200})
+    progress.stop()
+    assert seen[0]["downloaded_bytes"] == 5  # not part of a group: passed through
+    assert (seen[1]["downloaded_bytes"], seen[1]["total_bytes"]) == (300, 600)
+    assert (seen[2]["downloaded_bytes"], seen[2]["total_bytes"], seen[2]["speed"]) == (400, 800, 15.0)
+    assert seen[2]["_percent_str"].strip() == "50.0%"
+    assert seen[3]["status"] == "finished" and seen[3]["total_bytes"] == 200
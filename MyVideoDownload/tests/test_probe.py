@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+import yt_dlp
+
+from myvideodownload.downloader import DownloadWorker
+from myvideodownload.probe import ProbeReport, compact_formats
+
+
+def _video(height):
+    return {"format_id": f"v{height}", "height": height, "vcodec": "avc1.64001F", "acodec": "none", "ext": "mp4", "url": "x"}
+
+
+AUDIO = {"format_id": "a", "vcodec": "none", "acodec": "mp4a.40.2", "ext": "m4a", "url": "x"}
+
+
+def test_expected_height_follows_the_download_format_chain(tmp_path, monkeypatch):
+    # The chain tries the requested height, then 720/480/360, before "best below the maximum"
+    monkeypatch.setattr(DownloadWorker, "_ffmpeg_caps", classmethod(lambda cls: SimpleNamespace(dir=None, can_mp3=True)))
+    opts = DownloadWorker("x", "mp4", str(tmp_path), max_height=1080)._build_opts()
+    report = ProbeReport(1080, yt_dlp.YoutubeDL(dict(opts, logger=None, progress_hooks=[], postprocessor_hooks=[])))
+
+    report.add("fallback", compact_formats({"formats": [_video(900), _video(720), AUDIO]}))
+    report.add("exact", compact_formats({"formats": [_video(1440), _video(1080), _video(900), AUDIO]}))
+    report.add("too small", compact_formats({"formats": [_video(240), AUDIO]}))
+
+    assert report.expected == {720: 1, 1080: 1, 240: 1}
+    assert report.best == {900: 1, 1440: 1, 240: 1}
+    assert report.below == [("fallback", 720), ("too small", 240)]
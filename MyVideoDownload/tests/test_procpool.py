@@ -0,0 +1,28 @@
+import threading
+
+from myvideodownload.procpool import EntryProcessPool
+
+
+def _job(index, **extra):
+    return {"stub": {"url": f"http://127.0.0.1:9/e{index}", "title": f"Entry {index}"}, "index": index, "extra": extra or None, "url": "x"}
+
+
+def _run(settings, jobs):
+    pool = EntryProcessPool({"quiet": True}, settings, processes=1)
+    return list(pool.run(jobs, lambda ev: None))
+
+
+def test_crashed_process_fails_every_entry():
+    # _init raises (no "mode" in settings): the executor breaks before run_entry ever returns
+    results = _run({}, [_job(1), _job(2)])
+    assert sorted(job["index"] for job, _ in results) == [1, 2]
+    for _, result in results:
+        assert result["error"]
+        assert result["failed_routes"] == []
+        assert not result["seen"]
+
+
+def test_unpicklable_job_is_an_error(tmp_path):
+    settings = {"mode": "mp4", "root_dir": str(tmp_path), "min_free_bytes": 0}
+    (job, result), = _run(settings, [_job(1, lock=threading.Lock())])
+    assert result["error"].startswith("Entry 1: ")
@@ -0,0 +1,23 @@
+import threading
+import time
+
+from myvideodownload.profiling import PipelineProfiler
+
+
+def test_helper_threads_are_timed_and_sampled():
+    prof = PipelineProfiler(sample_interval=0.005)
+    prof.start("download")
+
+    def helper():
+        prof.switch("ignored")  # only the owner switches phases
+        with prof.attach("prefetch:extraction"):
+            time.sleep(0.2)
+
+    t = threading.Thread(target=helper)
+    t.start()
+    t.join()
+    prof.stop()
+    assert "ignored" not in prof.wall
+    assert prof.wall["prefetch:extraction"] >= 0.2
+    assert any(k.startswith("[prefetch:extraction];") and "helper" in k for k in prof.stacks)
+    assert "switches" in prof.summary_lines()[2]
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import yt_dlp
+from yt_dlp.utils import DownloadError
+
+from myvideodownload.distqueue import SqliteQueue
+from myvideodownload.downloader import DownloadWorker
+
+
+def _job(vid):
+    stub = {"_type": "url", "url": f"http://127.0.0.1:9/{vid}", "ie_key": "Generic", "id": vid, "title": vid}
+    return {"stub": stub, "index": 1, "extra": None, "url": "u"}
+
+
+def test_archived_entry_is_done_and_removed_video_fails_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(DownloadWorker, "_ffmpeg_caps", classmethod(lambda cls: SimpleNamespace(dir=None, can_mp3=True)))
+    root, path = tmp_path / "root", str(tmp_path / "q.db")
+    root.mkdir()
+    (root / ".download-archive.txt").write_text("generic v1\n", encoding="utf-8")
+    shared = SqliteQueue(path)
+    shared.publish([_job("v1"), _job("v2")], "mp4")
+    worker = DownloadWorker("", "mp4", str(root), space_check=False, shared_queue=path)
+    extracted = []
+
+    def extract(job):
+        extracted.append(job["stub"]["id"])
+        raise DownloadError("ERROR: [generic] v2: Video unavailable")
+
+    worker._extract_entry = extract
+    with yt_dlp.YoutubeDL(worker._build_opts()) as ydl:
+        worker._download(ydl)
+    worker._queue.close()
+
+    assert extracted == ["v2"]  # v1 is skipped by its stub, before any request
+    assert shared.counts("mp4") == {"done": 1, "failed": 1}
@@ -0,0 +1,24 @@
+import io
+
+from yt_dlp.networking import Response
+from yt_dlp.networking.exceptions import HTTPError, ProxyError
+from yt_dlp.utils import DownloadError, ExtractorError
+
+from myvideodownload.retry import NETWORK, OTHER, THROTTLED, UNAVAILABLE, classify
+
+
+def _wrapped(err, msg=None):
+    # How yt-dlp hands errors to the engine: a DownloadError carrying the cause in exc_info
+    return DownloadError(f"ERROR: {msg or err}", exc_info=(type(err), err, None))
+
+
+def test_types_and_status_decide_before_message_text():
+    # A proxy refusing the tunnel says "403 Forbidden" but is a transport failure
+    assert classify(_wrapped(ProxyError("Tunnel connection failed: 403 Forbidden"))) == NETWORK
+    # A reset on a URL that happens to contain "private video"
+    assert classify(_wrapped(ConnectionResetError("reset"), "https://x/private video.mp4: reset")) == NETWORK
+    # The response status wins over the text yt-dlp put around it
+    http = HTTPError(Response(io.BytesIO(b""), "http://x/", {}, status=429))
+    assert classify(_wrapped(ExtractorError("Unable to download: HTTP Error 403: Forbidden", cause=http))) == THROTTLED
+    assert classify(DownloadError("ERROR: [generic] x: Video unavailable")) == UNAVAILABLE
+    assert classify(DownloadError("ERROR: something else")) == OTHER
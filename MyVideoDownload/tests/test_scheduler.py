@@ -0,0 +1,24 @@
+from myvideodownload.scheduler import EntryScheduler
+
+
+def _jobs(name, n):
+    return [{"stub": {"title": f"{name}{i}"}, "index": i, "extra": None, "url": name} for i in range(1, n + 1)]
+
+
+def _titles(jobs):
+    return [j["stub"]["title"] for j in jobs]
+
+
+def test_pending_matches_pop_order_and_finished_sources_leave_the_rotation():
+    sched = EntryScheduler()
+    sched.add_source(_jobs("a", 3))
+    sched.add_source(_jobs("b", 1))
+    sched.add_stream(iter(_jobs("c", 60)))
+    assert _titles([sched.pop()]) == ["a1"]  # pulls the first batch of the stream
+    sched.pin("2:30")
+    expected = _titles(sched.pending(6))
+    assert expected == ["c30", "b1", "c1", "a2", "c2", "a3"]
+    assert _titles(sched.pop() for _ in range(6)) == expected
+    assert sorted(sched._sources) == [2]  # a and b are done
+    assert len(list(iter(sched.pop, None))) == 60 - 3
+    assert not sched._turns and not sched.pending()
@@ -0,0 +1,49 @@
+import json
+from types import SimpleNamespace
+
+from myvideodownload.downloader import DownloadWorker
+from myvideodownload.runstats import SAMPLES, RunStats
+from myvideodownload.scheduler import STREAM_BUFFER, EntryScheduler
+
+
+def _listing(pulled, fail_after=None):
+    i = 0
+    while True:
+        if i == fail_after:
+            raise OSError("page 3 failed")
+        i += 1
+        pulled.append(i)
+        yield i, {"id": f"v{i}"}
+
+
+def test_channel_is_pulled_a_buffer_at_a_time_and_a_failed_page_ends_it(tmp_path, monkeypatch):
+    monkeypatch.setattr(DownloadWorker, "_ffmpeg_caps", classmethod(lambda cls: SimpleNamespace(dir=None, can_mp3=True)))
+    worker = DownloadWorker("", "mp4", str(tmp_path), space_check=False, streaming=True)
+    skipped = []
+    worker.skipped.connect(skipped.append)
+    pulled = []
+    sched = EntryScheduler()
+    sched.add_stream(worker._stream_jobs("chan", _listing(pulled, fail_after=2 * STREAM_BUFFER), {}))
+    sched.add_source([{"stub": {"id": "single"}, "index": 1}])
+    assert pulled == []  # nothing is listed before the first pop
+    first = [sched.pop()["stub"]["id"] for _ in range(2)]
+    assert first == ["v1", "single"]  # a single video is not stuck behind the channel
+    assert len(pulled) == STREAM_BUFFER and len(sched) == STREAM_BUFFER - 1
+    rest = []
+    while (job := sched.pop()) is not None:
+        rest.append(job["index"])
+    assert rest == list(range(2, 2 * STREAM_BUFFER + 1))
+    assert skipped == ["chan: page 3 failed"] and not sched.streaming
+
+
+def test_run_stats_keep_samples_and_spill_every_skip(tmp_path):
+    spill = tmp_path / "last-run-skipped.jsonl"
+    stats = RunStats(max_height=1080, spill_path=str(spill))
+    for i in range(3 * SAMPLES):
+        stats.add_skipped({"title": f"v{i}", "reason": "x"})
+        stats.add_height(f"v{i}", 720, 1080)
+    stats.close()
+    assert (stats.skipped, len(stats.skipped_samples)) == (3 * SAMPLES, SAMPLES)
+    assert (stats.lower, len(stats.lower_samples)) == (3 * SAMPLES, SAMPLES)
+    lines = spill.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(l)["title"] for l in lines] == [f"v{i}" for i in range(3 * SAMPLES)]
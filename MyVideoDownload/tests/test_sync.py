@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+import yt_dlp
+
+from myvideodownload.downloader import DownloadWorker
+from myvideodownload.sync import SyncStore
+
+CHANNEL = "https://example.com/@channel/videos"
+
+
+def _stub(vid):
+    return {"_type": "url", "url": f"https://example.com/{vid}", "ie_key": "Generic", "id": vid}
+
+
+def test_archived_entries_count_as_seen_for_a_channel_mirrored_before_sync(tmp_path, monkeypatch):
+    monkeypatch.setattr(DownloadWorker, "_ffmpeg_caps", classmethod(lambda cls: SimpleNamespace(dir=None, can_mp3=True)))
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / ".download-archive.txt").write_text("".join(f"generic v{i}\n" for i in range(1, 6)), encoding="utf-8")
+    store = SyncStore(str(tmp_path / "sync.json"))
+    worker = DownloadWorker(CHANNEL, "mp4", str(root), sync=True, sync_store=store)
+    pulled = []
+
+    def entries():
+        for vid in ["new1", "v1", "v2", "v3", "v4", "v5"]:
+            pulled.append(vid)
+            yield _stub(vid)
+
+    with yt_dlp.YoutubeDL(worker._build_opts()) as ydl:
+        ydl.extract_info = lambda *a, **k: {"_type": "playlist", "id": "c", "title": "Channel", "entries": entries()}
+        jobs = worker._list_source_once(ydl, CHANNEL)
+        assert [j["stub"]["id"] for j in jobs] == ["new1"]
+        assert pulled == ["new1", "v1", "v2", "v3"]  # newest-first early stop
+        assert worker._sync_new == 1
+        assert store.known(CHANNEL) == {"v1", "v2", "v3"}
+
+        # Archived between listing and download: prefetch returns None, the entry still counts as seen
+        worker._mark_synced(ydl, {"stub": _stub("v5"), "extra": {}, "url": CHANNEL}, None)
+        worker._mark_synced(ydl, {"stub": _stub("new1"), "extra": {}, "url": CHANNEL}, None)
+    assert store.known(CHANNEL) == {"v1", "v2", "v3", "v5"}
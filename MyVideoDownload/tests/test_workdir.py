@@ -0,0 +1,50 @@
+import logging
+import os
+from types import SimpleNamespace
+
+import yt_dlp
+
+from myvideodownload import downloader
+from myvideodownload.downloader import _MoveToRootPP, _install_audio_copy, _keep_existing
+from myvideodownload.placement import output_template
+
+
+class _Transcoder:
+    target = "mp3"
+
+    def __init__(self, *args, **kwargs):
+        self.converted = []
+
+    def convert(self, src, dst):
+        with open(dst, "wb") as f:
+            f.write(b"audio")
+        self.converted.append(src)
+        return None
+
+
+def test_audio_copy_uses_the_video_already_in_the_root(tmp_path, monkeypatch):
+    # An MP4-only run left the video in the root; a multi-output run with a work dir adds just the audio
+    monkeypatch.setattr(downloader, "BatchTranscoder", _Transcoder)
+    root, work, archive = tmp_path / "root", tmp_path / "work", tmp_path / "archive.txt"
+    video = root / "Video" / "001 - Video - Clip.mp4"
+    video.parent.mkdir(parents=True)
+    video.write_bytes(b"video")
+    archive.write_text("generic v1\n", encoding="utf-8")
+    done = []
+    worker = SimpleNamespace(
+        work_dir=str(work), _entry_root=str(root), _logger=logging.getLogger("test"), _audio_done=set(),
+        file_done=SimpleNamespace(emit=done.append),
+    )
+    ydl = yt_dlp.YoutubeDL({"outtmpl": output_template(str(work)), "download_archive": str(archive), "quiet": True})
+    ydl.add_post_processor(_MoveToRootPP(worker), when="after_move")
+    _install_audio_copy(ydl, worker, None, "mp3")
+    entry = {"id": "v1", "title": "Clip", "ext": "mp4", "playlist_index": 1, "extractor": "generic", "extractor_key": "Generic"}
+
+    assert _keep_existing(ydl, worker, entry)
+    audio = str(video.with_suffix(".mp3"))
+    assert os.path.exists(audio)
+    assert video.read_bytes() == b"video"
+    assert done == [audio]
+    assert not work.exists()
+    assert archive.read_text(encoding="utf-8").split("\n") == ["generic v1", "generic v1 mp3", ""]
+    assert ydl.in_download_archive(entry)